@@ -0,0 +1,144 @@
+"""
+Full-Chain Analytics
+--------------------
+Whole-chain metrics for one expiry, computed with NumPy on the
+:class:`OptionChain` columns rather than per-row loops:
+
+  * max pain — the expiry price at which option writers pay out least,
+    from cumulative sums over the sorted strikes (O(n), no n×n payoff grid);
+  * OI walls — the strikes holding the most call / put open interest;
+  * OI-weighted resistance (call OI above spot) and support (put OI below);
+  * PCR and change-in-OI totals over each ``PCR_WINDOWS`` window of strikes
+    around ATM (``all`` = the whole chain);
+  * change-in-OI aggregates — net build-up and the largest single-strike
+    additions and unwinding on each side.
+
+The scraper runs this once per expiry on every changed payload and the
+snapshot encodes the result once, so ``/api/analytics`` is a cached lookup.
+With ``NSE_FAST_PARSE=1`` only the ATM window is parsed, and the metrics
+cover that window instead of the whole chain.
+
+Usage:
+    from backend.analytics import chain_analytics
+    stats = chain_analytics(chain.for_expiry(expiry), spot=22480.5, strike_step=50)
+"""
+
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.option_chain import OptionChain
+
+# Strikes either side of ATM for each PCR window, e.g. PCR_WINDOWS=3,5,10,all
+PCR_WINDOWS: Tuple[Optional[int], ...] = tuple(
+    None if w.strip().lower() == "all" else int(w)
+    for w in os.environ.get("PCR_WINDOWS", "3,5,10,all").split(",")
+    if w.strip()
+)
+# Strikes listed per side as OI walls
+OI_WALLS = int(os.environ.get("OI_WALLS", "3"))
+
+
+def _strike(value: float) -> Any:
+    return int(value) if float(value).is_integer() else float(value)
+
+
+def _ratio(num: float, den: float) -> Optional[float]:
+    return round(num / den, 3) if den else None
+
+
+def max_pain(strike: np.ndarray, call_oi: np.ndarray, put_oi: np.ndarray) -> Tuple[Optional[float], np.ndarray]:
+    """
+    (max-pain strike, total writer payout at each strike). ``strike`` must be
+    sorted. For an expiry at strike K, calls below K pay ``Σ oi·(K - s)`` =
+    ``K·Σoi - Σoi·s`` over s <= K, and puts above K the mirror image, so both
+    come from running sums.
+    """
+    if strike.size == 0:
+        return None, np.zeros(0)
+    c = call_oi.astype(np.float64)
+    p = put_oi.astype(np.float64)
+    call_pay = strike * np.cumsum(c) - np.cumsum(c * strike)
+    put_pay = np.cumsum((p * strike)[::-1])[::-1] - strike * np.cumsum(p[::-1])[::-1]
+    payout = call_pay + put_pay
+    return float(strike[int(np.argmin(payout))]), payout
+
+
+def oi_walls(strike: np.ndarray, oi: np.ndarray, n: int = OI_WALLS) -> List[Dict[str, Any]]:
+    """The ``n`` strikes with the most open interest, largest first."""
+    n = min(n, int(np.count_nonzero(oi)))
+    if n <= 0:
+        return []
+    top = np.argpartition(oi, -n)[-n:]
+    top = top[np.argsort(oi[top])[::-1]]
+    return [{"strike": _strike(strike[i]), "oi": int(oi[i])} for i in top]
+
+
+def _weighted_strike(strike: np.ndarray, weights: np.ndarray) -> Optional[float]:
+    total = weights.sum()
+    return round(float((strike * weights).sum() / total), 2) if total > 0 else None
+
+
+def _extreme(strike: np.ndarray, values: np.ndarray, largest: bool) -> Optional[Dict[str, Any]]:
+    """Strike with the largest positive (or most negative) value, if any."""
+    if values.size == 0:
+        return None
+    i = int(np.argmax(values) if largest else np.argmin(values))
+    if (values[i] <= 0) if largest else (values[i] >= 0):
+        return None
+    return {"strike": _strike(strike[i]), "chg_oi": int(values[i])}
+
+
+def chain_analytics(chain: OptionChain, spot: float, strike_step: int,
+                    windows: Tuple[Optional[int], ...] = PCR_WINDOWS) -> Dict[str, Any]:
+    """Max pain, OI walls, support/resistance, windowed PCR and OI-change totals for one expiry's chain."""
+    strike = chain.strike
+    ce_oi, pe_oi = chain.ce_oi, chain.pe_oi
+    ce_chg, pe_chg = chain.ce_chg_oi, chain.pe_chg_oi
+    atm = round(spot / strike_step) * strike_step
+    pain, _ = max_pain(strike, ce_oi, pe_oi)
+
+    # Running sums make every window an O(1) difference after two binary searches
+    totals = {
+        name: np.concatenate(([0], np.cumsum(col)))
+        for name, col in (("call_oi", ce_oi), ("put_oi", pe_oi), ("call_chg_oi", ce_chg), ("put_chg_oi", pe_chg))
+    }
+    pcr_windows = []
+    for w in windows:
+        if w is None:
+            lo, hi = 0, len(strike)
+        else:
+            lo = int(np.searchsorted(strike, atm - w * strike_step, "left"))
+            hi = int(np.searchsorted(strike, atm + w * strike_step, "right"))
+        sums = {name: int(cum[hi] - cum[lo]) for name, cum in totals.items()}
+        pcr_windows.append({
+            "window": "all" if w is None else w,
+            "strikes": hi - lo,
+            **sums,
+            "pcr": _ratio(sums["put_oi"], sums["call_oi"]),
+            "chg_pcr": _ratio(sums["put_chg_oi"], sums["call_chg_oi"]),
+        })
+
+    above, below = strike >= spot, strike <= spot
+    call_chg, put_chg = int(ce_chg.sum()), int(pe_chg.sum())
+    return {
+        "spot": float(spot),
+        "atm_strike": _strike(atm),
+        "strikes": len(strike),
+        "max_pain": _strike(pain) if pain is not None else None,
+        "call_walls": oi_walls(strike, ce_oi),
+        "put_walls": oi_walls(strike, pe_oi),
+        "resistance": _weighted_strike(strike[above], ce_oi[above]),
+        "support": _weighted_strike(strike[below], pe_oi[below]),
+        "pcr_windows": pcr_windows,
+        "change": {
+            "call_chg_oi": call_chg,
+            "put_chg_oi": put_chg,
+            "net_chg_oi": put_chg - call_chg,
+            "call_max_addition": _extreme(strike, ce_chg, largest=True),
+            "put_max_addition": _extreme(strike, pe_chg, largest=True),
+            "call_max_unwinding": _extreme(strike, ce_chg, largest=False),
+            "put_max_unwinding": _extreme(strike, pe_chg, largest=False),
+        },
+    }
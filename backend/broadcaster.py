@@ -0,0 +1,125 @@
+"""
+Snapshot Broadcaster
+--------------------
+Fan-out of new scrape snapshots to Server-Sent Events subscribers.
+
+Each snapshot's pre-encoded JSON is wrapped once per topic (symbol/expiry
+view) into a ready SSE frame and handed to every subscriber's bounded queue.
+Only the newest snapshot matters to a dashboard, so a slow client whose queue
+is full has its oldest pending frame dropped rather than stalling the
+publisher or growing memory. Frames carry the snapshot version as the SSE ``id`` so a reconnecting
+browser (``Last-Event-ID``) is sent the current frame only if it missed it.
+
+Usage:
+    from backend.broadcaster import Broadcaster
+    hub = Broadcaster()
+    hub.publish(("NIFTY", None), version, frame)
+    with hub.subscribe(("NIFTY", None)) as sub:
+        frame = await sub.next_frame(timeout=15)
+"""
+
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, Hashable, Iterator, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 4  # pending frames per subscriber before the oldest is dropped
+
+
+def encode_event(version: int, data: bytes, event: str = "snapshot") -> bytes:
+    """Wrap an already-encoded single-line JSON body in an SSE frame tagged with ``version``."""
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (version, event.encode("ascii"), data)
+
+
+class Subscriber:
+    """One connected client: a bounded queue of pending SSE frames."""
+
+    def __init__(self, topic: Hashable, queue_size: int):
+        self.topic = topic
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def offer(self, frame: Optional[bytes]) -> None:
+        """Enqueue without blocking; drop the oldest pending frame if full."""
+        while True:
+            try:
+                self.queue.put_nowait(frame)
+                return
+            except asyncio.QueueFull:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except asyncio.QueueEmpty:
+                    pass
+
+    async def next_frame(self, timeout: float) -> Optional[bytes]:
+        """
+        Next frame, ``b""`` on timeout (caller sends a keep-alive), or None
+        once the broadcaster has closed.
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return b""
+
+
+class Broadcaster:
+    """Topic-keyed SSE fan-out with latest-frame replay for reconnects."""
+
+    def __init__(self, queue_size: int = QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[Hashable, Set[Subscriber]] = {}
+        self._latest: Dict[Hashable, Tuple[int, bytes]] = {}
+        self._published = 0
+
+    def topics(self) -> Iterator[Hashable]:
+        """Topics that currently have at least one subscriber."""
+        return iter([topic for topic, subs in self._subscribers.items() if subs])
+
+    def latest(self, topic: Hashable) -> Optional[Tuple[int, bytes]]:
+        return self._latest.get(topic)
+
+    def publish(self, topic: Hashable, version: int, frame: bytes) -> None:
+        """Remember ``frame`` as the topic's latest and push it to subscribers."""
+        self._latest[topic] = (version, frame)
+        self._published += 1
+        for sub in self._subscribers.get(topic, ()):
+            sub.offer(frame)
+
+    @contextmanager
+    def subscribe(self, topic: Hashable, last_event_id: Optional[str] = None) -> Iterator[Subscriber]:
+        """
+        Register a subscriber for the duration of the ``with`` block. The
+        latest frame is queued straight away unless ``last_event_id`` shows
+        the client already has it.
+        """
+        sub = Subscriber(topic, self.queue_size)
+        latest = self._latest.get(topic)
+        if latest is not None and str(latest[0]) != (last_event_id or ""):
+            sub.offer(latest[1])
+        self._subscribers.setdefault(topic, set()).add(sub)
+        try:
+            yield sub
+        finally:
+            subs = self._subscribers.get(topic)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[topic]
+
+    def close(self) -> None:
+        """Wake every subscriber with an end-of-stream marker (shutdown)."""
+        for subs in self._subscribers.values():
+            for sub in subs:
+                sub.offer(None)
+
+    def stats(self) -> Dict[str, Any]:
+        subs = [sub for group in self._subscribers.values() for sub in group]
+        return {
+            "subscribers": len(subs),
+            "topics": len(self._subscribers),
+            "published": self._published,
+            "dropped_frames": sum(sub.dropped for sub in subs),
+        }
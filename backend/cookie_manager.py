@@ -1,228 +1,514 @@
 """
-NSE Cookie Manager — Auto-Refresh Edition
+NSE Cookie Manager — Session Pool Edition
 ------------------------------------------
 Automatically fetches and refreshes NSE session cookies using curl_cffi
 (the same TLS-fingerprint library the scraper uses). No Playwright needed.
-No manual copy-paste. Cookies are refreshed every 90 minutes automatically.
-
-Priority order:
-  1. curl_cffi auto-fetch (visits NSE homepage + option-chain to get a session)
-  2. NSE_COOKIES env var / .env file fallback (manual override)
-  3. Previously cached cookies (last resort if all refreshes fail)
+No manual copy-paste.
+
+Keeps a pool of ``NSE_SESSION_POOL_SIZE`` (default 2) independently warmed
+sessions ("slots"), all warmed at startup. Each slot is bound to one browser
+``Profile`` (user-agent, client hints and impersonation target) for its whole
+life, and carries a health score
+built from its recent success rate, latency and error streak. Scrapes use the
+healthiest ready slot; a slot NSE refuses (401/403), or that fails
+``QUARANTINE_AFTER_ERRORS`` times in a row, is quarantined and re-warmed in
+the background while the others carry on.
+
+Refreshes run in a background task, never on the scrape path. A slot's
+candidate cookie set is warmed ``COOKIE_REFRESH_AHEAD_SECONDS`` before its TTL
+(or right away once quarantined), checked against a lightweight NSE API call
+and only then swapped in. A candidate NSE refuses is dropped.
+
+Refreshes follow the market calendar: outside the session window (nights,
+weekends, holidays) slots are left alone and the next warm-up is scheduled
+``COOKIE_WARMUP_LEAD_SECONDS`` before the next open. Off-hours a refresh
+only happens when a scrape asks for cookies, e.g. the one at startup, which
+warms the whole pool.
+
+Candidate order:
+  1. Cookies posted to /api/set-cookies (manual override, first slot, checked first)
+  2. curl_cffi auto-fetch (visits NSE homepage + option-chain to get a session)
+  3. NSE_COOKIES env var / .env file fallback
+If none is accepted the slot keeps its current state and is retried after
+``REFRESH_RETRY_SECONDS``.
 
 Usage:
     from backend.cookie_manager import CookieManager
-    cookie_str = await CookieManager.get_cookies()
+    await CookieManager.start()
+    slot = await CookieManager.acquire()
+    response = await NSESession.get(url, profile=slot.profile, headers=slot.headers())
+    CookieManager.report(slot, response.status_code, latency)
 """
 
 import asyncio
 import logging
 import time
 import os
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from backend.market_calendar import IST, MarketCalendar
+from backend.metrics import COOKIE_REFRESH
+from backend.nse_session import BASE_URL, NSESession, PROFILES, Profile
+from backend.tracing import Tracer
 
 logger = logging.getLogger(__name__)
 
 # ── TTL ──────────────────────────────────────────────────────────────────────
 COOKIE_TTL_SECONDS = 80 * 60   # refresh 10 min before NSE's 90-min expiry
+# Start warming the next set this long before the active one reaches the TTL
+REFRESH_AHEAD_SECONDS = float(os.environ.get("COOKIE_REFRESH_AHEAD_SECONDS", "300"))
+# After a refresh in which no candidate was accepted, wait this long before retrying
+REFRESH_RETRY_SECONDS = 60
+# A scrape with no cookies at all (cold start) waits this long for the first set
+COLD_START_WAIT_SECONDS = 45
+# Outside market hours, warm sessions up this long before the next open
+WARMUP_LEAD_SECONDS = float(os.environ.get("COOKIE_WARMUP_LEAD_SECONDS", "600"))
+STRATEGIES = ("auto", "env", "api")
+
+# ── Pool & health ────────────────────────────────────────────────────────────
+# Sessions kept warm; with one, a quarantined session leaves scrapes nothing to use while it re-warms
+POOL_SIZE = max(1, int(os.environ.get("NSE_SESSION_POOL_SIZE", "2")))
+# Errors (5xx, network, timeouts) in a row before a slot is quarantined and re-warmed
+QUARANTINE_AFTER_ERRORS = 3
+# Weight of the newest request in a slot's success/latency averages
+HEALTH_ALPHA = 0.3
+# Latency at which a slot's score halves
+LATENCY_REFERENCE_SECONDS = 2.0
 
 # ── Warm-up sequence — must hit these in order to build a valid NSE session ──
 WARMUP_SEQUENCE = [
-    "https://www.nseindia.com",
-    "https://www.nseindia.com/option-chain",
+    BASE_URL,
+    f"{BASE_URL}/option-chain",
 ]
-
-# ── Base headers that mirror a real Chrome 136 desktop browser ───────────────
-_BASE_HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/136.0.0.0 Safari/537.36"
-    ),
-    "Accept": (
-        "text/html,application/xhtml+xml,application/xml;"
-        "q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8"
-    ),
-    "Accept-Language": "en-US,en;q=0.7",
-    "Accept-Encoding": "gzip, deflate, br, zstd",
-    "Cache-Control": "no-cache",
-    "Pragma": "no-cache",
-    "sec-ch-ua": '"Chromium";v="136", "Google Chrome";v="136", "Not.A/Brand";v="99"',
-    "sec-ch-ua-mobile": "?0",
-    "sec-ch-ua-platform": '"Windows"',
-    "sec-fetch-dest": "document",
-    "sec-fetch-mode": "navigate",
-    "sec-fetch-site": "none",
-    "sec-fetch-user": "?1",
-    "upgrade-insecure-requests": "1",
-}
+# Small cookie-protected API used to check a candidate set before swapping it in
+VALIDATE_URL = f"{BASE_URL}/api/option-chain-contract-info?symbol=NIFTY"
+
+
+class CookieSlot:
+    """One pooled NSE identity: a browser profile, its cookie set and its health."""
+
+    def __init__(self, index: int, profile: Profile):
+        self.index = index
+        self.profile = profile
+        self.cookies: Optional[str] = None
+        self.fetched_at = 0.0
+        self.source = "none"
+        self.quarantined: Optional[str] = None  # reason, while out of rotation
+        self.retry_at = 0.0
+        # Exponentially weighted recent success (1 = all ok) and latency in seconds
+        self.success = 1.0
+        self.latency: Optional[float] = None
+        self.error_streak = 0
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def name(self) -> str:
+        return f"{self.index}:{self.profile.name}"
+
+    @property
+    def ready(self) -> bool:
+        return self.cookies is not None and self.quarantined is None
+
+    def score(self) -> float:
+        """Higher is healthier; 0 when out of rotation."""
+        if not self.ready:
+            return 0.0
+        latency_factor = 1 / (1 + (self.latency or 0) / LATENCY_REFERENCE_SECONDS)
+        return self.success * latency_factor / (1 + self.error_streak)
+
+    def due_in(self, now: float) -> float:
+        """Seconds until this slot should be re-warmed (<= 0: now)."""
+        if not self.ready:
+            return self.retry_at - now
+        return max(self.fetched_at + COOKIE_TTL_SECONDS - REFRESH_AHEAD_SECONDS, self.retry_at) - now
+
+    def headers(self) -> Dict[str, str]:
+        """API request headers for this slot's profile, with its cookies."""
+        return {**self.profile.api_headers(), "Cookie": self.cookies or ""}
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "profile": self.profile.name,
+            "state": "quarantined" if self.quarantined else ("ready" if self.cookies else "warming"),
+            "quarantine_reason": self.quarantined,
+            "source": self.source,
+            "cookie_age_seconds": int(now - self.fetched_at) if self.cookies else None,
+            "score": round(self.score(), 3),
+            "success": round(self.success, 3),
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "error_streak": self.error_streak,
+            "requests": self.requests,
+            "errors": self.errors,
+        }
 
 
 class CookieManager:
     """
-    Thread-safe async singleton.
-    Automatically keeps NSE session cookies fresh via curl_cffi.
+    Async singleton.
+    Owns the pool of NSE session slots and keeps them warm from a background task.
     """
 
-    _cookie_string: Optional[str] = None
-    _fetched_at: float = 0.0
-    _lock: asyncio.Lock = asyncio.Lock()
-    _source: str = "none"
+    CALENDAR = MarketCalendar()
+    _slots: List[CookieSlot] = []
+    _manual: Optional[str] = None  # /api/set-cookies candidate waiting to be checked
+    _demand: bool = False  # a scrape found no usable slot — refresh even outside market hours
+    _refresher: Optional[asyncio.Task] = None
+    _wake: asyncio.Event = asyncio.Event()
+    _ready: asyncio.Event = asyncio.Event()  # set once the first slot is usable
+    _stats: Dict[str, Any] = {
+        "refreshes": 0,
+        "swaps": 0,
+        "quarantines": 0,
+        "refresh_seconds_total": 0.0,
+        "last_refresh_seconds": None,
+        "last_refresh_at": None,
+        "strategies": {name: {"attempts": 0, "accepted": 0} for name in STRATEGIES},
+    }
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+
+    @classmethod
+    async def start(cls) -> None:
+        """Start the background refresher (no-op if running); it warms every slot on the first scrape."""
+        cls._ensure_refresher()
+
+    @classmethod
+    async def close(cls) -> None:
+        if cls._refresher is None:
+            return
+        # wait_for() can swallow a cancel that lands as a wake-up fires, so repeat until it sticks
+        while not cls._refresher.done():
+            cls._refresher.cancel()
+            await asyncio.wait({cls._refresher}, timeout=1)
+        cls._refresher = None
 
     # ── Public API ────────────────────────────────────────────────────────────
 
     @classmethod
-    async def get_cookies(cls, force: bool = False) -> Optional[str]:
+    async def acquire(cls, exclude: Optional[CookieSlot] = None) -> Optional[CookieSlot]:
         """
-        Return a valid NSE cookie string, refreshing automatically as needed.
+        The healthiest ready slot, without waiting on a warm-up.
 
         Args:
-            force: If True, bypass the cache and fetch immediately.
+            exclude: A slot not to return (e.g. the one a hedged request is backing up).
         Returns:
-            Semicolon-separated cookie string, or None if all methods fail.
+            None if no slot is usable (only a cold start waits, up to
+            COLD_START_WAIT_SECONDS, for the first one).
         """
-        async with cls._lock:
-            age = time.time() - cls._fetched_at
-            is_stale = age >= COOKIE_TTL_SECONDS
+        cls._ensure_refresher()
+        now = time.time()
+        if any(slot.due_in(now) <= 0 for slot in cls._slots):
+            # Off-hours, only a scrape left with no usable slot warms one up early
+            cls._demand = cls._demand or not any(slot.ready for slot in cls._slots)
+            cls._wake.set()
+        if not any(slot.cookies for slot in cls._slots):
+            try:
+                await asyncio.wait_for(cls._ready.wait(), timeout=COLD_START_WAIT_SECONDS)
+            except asyncio.TimeoutError:
+                logger.error("Could not obtain NSE cookies via any method.")
+        ready = [slot for slot in cls._slots if slot.ready and slot is not exclude]
+        if not ready:
+            return None
+        return max(ready, key=CookieSlot.score)
 
-            if not force and cls._cookie_string and not is_stale:
-                logger.debug(
-                    f"Using cached NSE cookies "
-                    f"(age={age:.0f}s, source={cls._source})"
-                )
-                return cls._cookie_string
+    @classmethod
+    def report(cls, slot: CookieSlot, status_code: Optional[int], latency: float) -> None:
+        """
+        Record the outcome of a request made with ``slot``.
 
-            reason = (
-                "forced" if force
-                else ("stale" if is_stale else "first-fetch")
-            )
-            logger.info(f"Cookie refresh triggered ({reason})…")
-
-            # ── Strategy 1: auto-fetch via curl_cffi ─────────────────────────
-            fresh = await cls._fetch_via_curl_cffi()
-            if fresh:
-                cls._cookie_string = fresh
-                cls._fetched_at = time.time()
-                cls._source = "auto"
-                logger.info(
-                    f"✅ NSE cookies auto-refreshed via curl_cffi "
-                    f"({len(fresh)} chars)."
-                )
-                return cls._cookie_string
-
-            # ── Strategy 2: env var / .env override ──────────────────────────
-            env_cookies = os.environ.get("NSE_COOKIES", "").strip()
-            if env_cookies:
-                cls._cookie_string = env_cookies
-                cls._fetched_at = time.time()
-                cls._source = "env"
-                logger.info(
-                    f"Using NSE_COOKIES env var ({len(env_cookies)} chars)."
-                )
-                return cls._cookie_string
+        Args:
+            status_code: HTTP status, or None for a network error / timeout.
+            latency: Seconds the request took.
+        """
+        ok = status_code == 200
+        slot.requests += 1
+        slot.success += HEALTH_ALPHA * ((1.0 if ok else 0.0) - slot.success)
+        if ok:
+            slot.latency = latency if slot.latency is None else slot.latency + HEALTH_ALPHA * (latency - slot.latency)
+            slot.error_streak = 0
+            return
+        slot.errors += 1
+        slot.error_streak += 1
+        if status_code in (401, 403):
+            cls._quarantine(slot, f"HTTP {status_code}")
+        elif slot.error_streak >= QUARANTINE_AFTER_ERRORS:
+            cls._quarantine(slot, f"{slot.error_streak} errors in a row")
+
+    @classmethod
+    def submit(cls, cookie_string: str) -> None:
+        """Queue manually supplied cookies for the first slot; swapped in once NSE accepts them."""
+        cls._manual = cookie_string
+        cls._ensure_refresher()
+        cls._wake.set()
+
+    @classmethod
+    def get_source(cls) -> str:
+        """Source of the healthiest slot's cookies: 'auto', 'env', 'api', or 'none'."""
+        best = cls._best()
+        return best.source if best else "none"
+
+    @classmethod
+    def cookie_age(cls) -> Optional[int]:
+        """Age in seconds of the healthiest slot's cookies."""
+        best = cls._best()
+        return int(time.time() - best.fetched_at) if best else None
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        """Refresh timings, per-strategy acceptance and per-slot health for /health."""
+        now = time.time()
+        stats = {k: v for k, v in cls._stats.items() if k not in ("strategies", "refresh_seconds_total")}
+        refreshes = stats["refreshes"]
+        stats["avg_refresh_seconds"] = round(cls._stats["refresh_seconds_total"] / refreshes, 3) if refreshes else None
+        stats["next_refresh_in_seconds"] = (
+            max(int(cls._next_slot(now)[1]), 0) if cls._refresher and cls._slots else None
+        )
+        stats["strategies"] = {
+            name: {**s, "success_rate": round(s["accepted"] / s["attempts"], 3) if s["attempts"] else None}
+            for name, s in cls._stats["strategies"].items()
+        }
+        stats["sessions"] = [slot.stats(now) for slot in cls._slots]
+        return stats
+
+    # ── Internal: pool ────────────────────────────────────────────────────────
+
+    @classmethod
+    def _best(cls) -> Optional[CookieSlot]:
+        ready = [slot for slot in cls._slots if slot.ready]
+        return max(ready, key=CookieSlot.score) if ready else None
+
+    @classmethod
+    def _quarantine(cls, slot: CookieSlot, reason: str) -> None:
+        if slot.quarantined is None:
+            slot.quarantined = reason
+            cls._stats["quarantines"] += 1
+            logger.info(f"NSE session {slot.name} quarantined ({reason}) — re-warming in the background.")
+        cls._wake.set()
+
+    # ── Internal: background refresh ──────────────────────────────────────────
+
+    @classmethod
+    def _ensure_refresher(cls) -> None:
+        if not cls._slots:
+            cls._slots = [CookieSlot(i, PROFILES[i % len(PROFILES)]) for i in range(POOL_SIZE)]
+        if cls._refresher is None or cls._refresher.done():
+            cls._refresher = asyncio.create_task(cls._run())
 
-            # ── Strategy 3: reuse stale cache rather than returning None ──────
-            if cls._cookie_string:
+    @classmethod
+    def _next_slot(cls, now: float) -> Tuple[CookieSlot, float]:
+        """The slot to warm next and how long until it is due (held until shortly before the open off-hours)."""
+        if cls._manual:
+            return cls._slots[0], 0.0
+        slot = min(cls._slots, key=lambda s: s.due_in(now))
+        delay = slot.due_in(now)
+        if not cls._demand:
+            when = datetime.fromtimestamp(now, IST)
+            if not cls.CALENDAR.is_session_window(when):
+                warm_at = cls.CALENDAR.next_open(when) - timedelta(seconds=WARMUP_LEAD_SECONDS)
+                delay = max(delay, (warm_at - when).total_seconds())
+        return slot, delay
+
+    @classmethod
+    async def _run(cls) -> None:
+        while True:
+            slot, delay = cls._next_slot(time.time())
+            if delay > 0:
+                cls._wake.clear()
+                try:
+                    await asyncio.wait_for(cls._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue  # re-check: a wake-up does not always make a refresh due
+            manual = cls._manual is not None
+            demand, cls._demand = cls._demand, False
+            try:
+                with Tracer.span("cookie_refresh", session=slot.name):
+                    accepted = await cls._refresh(slot)
+            except Exception as e:
+                logger.error(f"Cookie refresh failed: {e}")
+                accepted = False
+            if accepted or manual:  # a refused manual set says nothing about NSE — no back-off
+                slot.retry_at = 0.0
+            else:
+                slot.retry_at = time.time() + REFRESH_RETRY_SECONDS
+            if demand and accepted and not all(s.cookies for s in cls._slots):
+                cls._demand = True  # keep going off-hours until the whole pool is warm
+
+    @classmethod
+    async def _refresh(cls, slot: CookieSlot) -> bool:
+        """Warm and check candidates for ``slot`` in order; swap in the first NSE accepts."""
+        reason = "manual" if cls._manual else (
+            "first-fetch" if slot.cookies is None
+            else slot.quarantined if slot.quarantined
+            else "ahead of expiry"
+        )
+        logger.info(f"Cookie refresh triggered for {slot.name} ({reason})…")
+        started = time.perf_counter()
+        accepted = False
+        try:
+            for source, fetch in cls._candidates(slot):
+                stat = cls._stats["strategies"][source]
+                stat["attempts"] += 1
+                with Tracer.span(f"candidate:{source}"):
+                    cookies = await fetch()
+                if not cookies:
+                    continue
+                with Tracer.span("validate", source=source):
+                    verdict = await cls._validate(slot.profile, cookies)
+                    Tracer.annotate(verdict=verdict)
+                if verdict or (verdict is None and not slot.ready):
+                    stat["accepted"] += 1
+                    cls._swap(slot, cookies, source)
+                    accepted = True
+                    return True
                 logger.warning(
-                    "All refresh methods failed — reusing existing cookies."
+                    f"{source} cookies for {slot.name} "
+                    f"{'rejected by NSE' if verdict is False else 'could not be checked'} — keeping the current set."
                 )
-                return cls._cookie_string
+            if slot.cookies:
+                logger.warning(f"All refresh methods failed for {slot.name} — keeping existing cookies.")
+            else:
+                logger.error(f"Could not obtain NSE cookies for {slot.name} via any method.")
+            return False
+        finally:
+            elapsed = time.perf_counter() - started
+            COOKIE_REFRESH.observe(elapsed, result="accepted" if accepted else "failed")
+            cls._stats["refreshes"] += 1
+            cls._stats["refresh_seconds_total"] += elapsed
+            cls._stats["last_refresh_seconds"] = round(elapsed, 3)
+            cls._stats["last_refresh_at"] = time.time()
 
-            logger.error("Could not obtain NSE cookies via any method.")
-            return None
+    @classmethod
+    def _candidates(cls, slot: CookieSlot) -> List[Tuple[str, Callable[[], Awaitable[Optional[str]]]]]:
+        if cls._manual:
+            manual, cls._manual = cls._manual, None
+
+            async def from_api() -> Optional[str]:
+                return manual
+            return [("api", from_api)]
+
+        async def from_auto() -> Optional[str]:
+            return await cls._fetch_via_curl_cffi(slot.profile)
+
+        async def from_env() -> Optional[str]:
+            return os.environ.get("NSE_COOKIES", "").strip() or None
+
+        candidates = [("auto", from_auto)]
+        if os.environ.get("NSE_COOKIES", "").strip():
+            candidates.append(("env", from_env))
+        return candidates
 
     @classmethod
-    def invalidate(cls) -> None:
-        """Force a refresh on the next call to get_cookies()."""
-        cls._fetched_at = 0.0
-        logger.info("NSE cookie cache invalidated — will refresh on next request.")
+    async def _validate(cls, profile: Profile, cookies: str) -> Optional[bool]:
+        """True if NSE accepts ``cookies``, False if it refuses them, None if it could not tell."""
+        try:
+            response = await NSESession.get(
+                VALIDATE_URL, profile=profile, headers={**profile.api_headers(), "Cookie": cookies}, timeout=10
+            )
+        except Exception as e:
+            logger.warning(f"Cookie check failed: {e}")
+            return None
+        if response.status_code == 200:
+            return True
+        if response.status_code in (401, 403):
+            return False
+        return None
 
     @classmethod
-    def get_source(cls) -> str:
-        """'auto', 'env', or 'none'."""
-        return cls._source
+    def _swap(cls, slot: CookieSlot, cookies: str, source: str) -> None:
+        slot.cookies = cookies
+        slot.fetched_at = time.time()
+        slot.source = source
+        slot.quarantined = None
+        slot.success, slot.error_streak = 1.0, 0
+        cls._stats["swaps"] += 1
+        cls._ready.set()
+        logger.info(f"✅ NSE cookies refreshed for {slot.name} ({source}, {len(cookies)} chars).")
 
     # ── Internal: curl_cffi auto-fetch ────────────────────────────────────────
 
     @classmethod
-    async def _fetch_via_curl_cffi(cls) -> Optional[str]:
+    async def _fetch_via_curl_cffi(cls, profile: Profile) -> Optional[str]:
         """
-        Open a curl_cffi session (impersonating Chrome 136), visit the NSE
-        homepage then the option-chain page to collect all session cookies,
-        and return them as a single semicolon-separated string.
+        Visit the NSE homepage then the option-chain page on the profile's
+        curl_cffi session to collect all session cookies, and return them as a
+        single semicolon-separated string.
 
         curl_cffi handles TLS fingerprinting automatically — NSE's WAF sees
         a real Chrome browser, not a Python script.
         """
         loop = asyncio.get_event_loop()
         try:
-            result = await loop.run_in_executor(None, cls._curl_cffi_sync)
+            result = await loop.run_in_executor(None, cls._curl_cffi_sync, profile)
             return result
         except Exception as e:
             logger.error(f"curl_cffi cookie fetch failed: {e}")
             return None
 
     @classmethod
-    def _curl_cffi_sync(cls) -> Optional[str]:
-        """Synchronous curl_cffi session — runs in a thread pool."""
+    def _curl_cffi_sync(cls, profile: Profile) -> Optional[str]:
+        """Synchronous warm-up on the profile's pooled curl_cffi session — runs in a thread pool."""
         try:
-            from curl_cffi import requests as curl_requests
-
-            with curl_requests.Session(impersonate="chrome136") as session:
-                # Step 1: hit the homepage to seed initial cookies
-                try:
-                    r1 = session.get(
-                        "https://www.nseindia.com",
-                        headers=_BASE_HEADERS,
-                        timeout=20,
-                        allow_redirects=True,
-                    )
-                    logger.debug(
-                        f"NSE homepage: HTTP {r1.status_code}, "
-                        f"cookies so far: {len(session.cookies)}"
-                    )
-                except Exception as e:
-                    logger.warning(f"NSE homepage warmup failed: {e}")
-
-                time.sleep(1.5)  # brief human-like pause
-
-                # Step 2: hit option-chain to get the session/nsit cookie
-                try:
-                    headers2 = {
-                        **_BASE_HEADERS,
-                        "Referer": "https://www.nseindia.com/",
-                        "sec-fetch-site": "same-origin",
-                    }
-                    r2 = session.get(
-                        "https://www.nseindia.com/option-chain",
-                        headers=headers2,
-                        timeout=20,
-                        allow_redirects=True,
-                    )
-                    logger.debug(
-                        f"NSE option-chain: HTTP {r2.status_code}, "
-                        f"cookies so far: {len(session.cookies)}"
-                    )
-                except Exception as e:
-                    logger.warning(f"NSE option-chain warmup failed: {e}")
-
-                time.sleep(1.0)
-
-                # Collect all cookies from the session jar
-                cookies = session.cookies
-                if not cookies:
-                    logger.warning("curl_cffi returned no cookies from NSE.")
-                    return None
-
-                cookie_str = "; ".join(
-                    f"{name}={value}"
-                    for name, value in cookies.items()
+            session = NSESession.warmup_session(profile)
+            headers = profile.navigate_headers()
+            # Step 1: hit the homepage to seed initial cookies
+            try:
+                r1 = session.get(
+                    WARMUP_SEQUENCE[0],
+                    headers=headers,
+                    timeout=20,
+                    allow_redirects=True,
+                )
+                NSESession.record(r1)
+                logger.debug(
+                    f"NSE homepage: HTTP {r1.status_code}, "
+                    f"cookies so far: {len(session.cookies)}"
+                )
+            except Exception as e:
+                logger.warning(f"NSE homepage warmup failed: {e}")
+
+            time.sleep(1.5)  # brief human-like pause
+
+            # Step 2: hit option-chain to get the session/nsit cookie
+            try:
+                headers2 = {
+                    **headers,
+                    "Referer": f"{BASE_URL}/",
+                    "sec-fetch-site": "same-origin",
+                }
+                r2 = session.get(
+                    WARMUP_SEQUENCE[1],
+                    headers=headers2,
+                    timeout=20,
+                    allow_redirects=True,
                 )
-                logger.info(
-                    f"curl_cffi captured {len(list(cookies.items()))} "
-                    f"cookies from NSE."
+                NSESession.record(r2)
+                logger.debug(
+                    f"NSE option-chain: HTTP {r2.status_code}, "
+                    f"cookies so far: {len(session.cookies)}"
                 )
-                return cookie_str
+            except Exception as e:
+                logger.warning(f"NSE option-chain warmup failed: {e}")
+
+            time.sleep(1.0)
+
+            # Collect all cookies from the session jar
+            cookies = session.cookies
+            if not cookies:
+                logger.warning("curl_cffi returned no cookies from NSE.")
+                return None
+
+            cookie_str = "; ".join(
+                f"{name}={value}"
+                for name, value in cookies.items()
+            )
+            logger.info(
+                f"curl_cffi captured {len(list(cookies.items()))} "
+                f"cookies from NSE ({profile.name})."
+            )
+            return cookie_str
 
         except ImportError:
             logger.error(
@@ -0,0 +1,257 @@
+"""
+Persistent OI History
+---------------------
+Append-only SQLite (WAL mode) record of every OI point and every successful
+scrape result, so a deploy or crash no longer blanks the 5–60 minute change
+columns for an hour. Off unless ``HISTORY_DB_PATH`` names the database file.
+
+Only the displayed ATM window is persisted: the scraper records points for
+window strikes and ``record`` drops the full-chain ``chain`` rows from the
+stored result, so write volume stays at the window's size however long the
+chain is. The full chain lives in memory only; set
+``HISTORY_DB_FULL_CHAIN=1`` to persist it too (then a restart also restores
+the off-window history, at 10–100× the writes).
+
+Writes never touch the event loop: ``HistoryDB.record`` only queues the cycle,
+and one writer thread commits queued cycles in batches every
+``HISTORY_DB_FLUSH_SECONDS``. The same thread drops rows older than
+``HISTORY_DB_RETENTION_DAYS`` and truncates the WAL once an hour. On startup
+``HistoryDB.load`` returns the recent points and the latest snapshot per symbol
+(with when it was recorded) from an indexed range scan.
+
+Usage:
+    from backend.history_db import HistoryDB
+    HistoryDB.start()
+    points, latest, latest_ts = HistoryDB.load("NIFTY", since=time.time() - 65 * 60)
+    HistoryDB.record("NIFTY", result, points)
+    HistoryDB.close()
+"""
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.option_chain import loads
+from backend.snapshot import dumps
+
+logger = logging.getLogger(__name__)
+
+# Opt-in: empty (the default) disables persistence, e.g. HISTORY_DB_PATH=data/oi_history.sqlite3
+HISTORY_DB_PATH = os.environ.get("HISTORY_DB_PATH", "")
+HISTORY_DB_FLUSH_SECONDS = float(os.environ.get("HISTORY_DB_FLUSH_SECONDS", "5"))
+HISTORY_DB_BATCH_CYCLES = int(os.environ.get("HISTORY_DB_BATCH_CYCLES", "32"))
+HISTORY_DB_RETENTION_DAYS = float(os.environ.get("HISTORY_DB_RETENTION_DAYS", "7"))
+HISTORY_DB_QUEUE_SIZE = int(os.environ.get("HISTORY_DB_QUEUE_SIZE", "1024"))
+# Persist every strike's points and chain rows, not just the ATM window
+HISTORY_DB_FULL_CHAIN = os.environ.get("HISTORY_DB_FULL_CHAIN", "0") == "1"
+COMPACT_INTERVAL_SECONDS = 3600
+
+# (expiry, strike, side, epoch seconds, oi)
+OIPoint = Tuple[str, float, str, float, float]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS oi_points (
+    symbol TEXT NOT NULL,
+    expiry TEXT NOT NULL,
+    strike REAL NOT NULL,
+    side   TEXT NOT NULL,
+    ts     REAL NOT NULL,
+    oi     REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS oi_points_symbol_ts ON oi_points (symbol, ts);
+CREATE TABLE IF NOT EXISTS snapshots (
+    symbol TEXT NOT NULL,
+    ts     REAL NOT NULL,
+    data   BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_symbol_ts ON snapshots (symbol, ts);
+"""
+
+_STOP = object()
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints; fine for a cache
+    return conn
+
+
+class HistoryDB:
+    """Process-wide singleton around the history database and its writer thread."""
+
+    _path: Optional[str] = None
+    _reader: Optional[sqlite3.Connection] = None
+    _queue: "queue.Queue" = queue.Queue(maxsize=HISTORY_DB_QUEUE_SIZE)
+    _thread: Optional[threading.Thread] = None
+    _stats: Dict[str, Any] = {
+        "queued_cycles": 0,
+        "dropped_cycles": 0,
+        "written_points": 0,
+        "written_snapshots": 0,
+        "flushes": 0,
+        "last_flush_ms": None,
+        "compactions": 0,
+        "errors": 0,
+    }
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+
+    @classmethod
+    def start(cls, path: str = HISTORY_DB_PATH) -> bool:
+        """Open the database and start the writer. False if persistence is disabled or unavailable."""
+        if cls._thread is not None:
+            return True
+        if not path:
+            logger.info("HISTORY_DB_PATH is not set — OI history will not persist across restarts.")
+            return False
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            cls._reader = _connect(path)
+            cls._reader.executescript(_SCHEMA)
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"Could not open history database {path}: {e}")
+            cls._reader = None
+            return False
+        cls._path = path
+        cls._thread = threading.Thread(target=cls._writer, name="history-db-writer", daemon=True)
+        cls._thread.start()
+        logger.info(f"OI history database: {path}")
+        return True
+
+    @classmethod
+    def close(cls, timeout: float = 10.0) -> None:
+        """Flush everything queued and stop the writer thread."""
+        if cls._thread is None:
+            return
+        cls._queue.put(_STOP)
+        cls._thread.join(timeout)
+        cls._thread = None
+        if cls._reader is not None:
+            cls._reader.close()
+            cls._reader = None
+        logger.info("OI history database closed.")
+
+    # ── Reads / writes ────────────────────────────────────────────────────────
+
+    @classmethod
+    def load(cls, symbol: str, since: float) -> Tuple[List[OIPoint], Optional[Dict[str, Any]], Optional[float]]:
+        """
+        OI points for ``symbol`` recorded at or after ``since`` (oldest first),
+        the most recent stored scrape result, if any, and its epoch timestamp.
+        """
+        if cls._reader is None:
+            return [], None, None
+        points = cls._reader.execute(
+            "SELECT expiry, strike, side, ts, oi FROM oi_points WHERE symbol = ? AND ts >= ? ORDER BY ts",
+            (symbol, since),
+        ).fetchall()
+        row = cls._reader.execute(
+            "SELECT data, ts FROM snapshots WHERE symbol = ? ORDER BY ts DESC LIMIT 1", (symbol,)
+        ).fetchone()
+        if row is None:
+            return points, None, None
+        return points, loads(zlib.decompress(row[0])), row[1]
+
+    @classmethod
+    def record(cls, symbol: str, result: Optional[Dict[str, Any]], points: List[OIPoint]) -> None:
+        """
+        Queue one cycle: the OI points it appended and, when successful, the
+        scrape result. Never blocks; the cycle is dropped if the writer is
+        far behind.
+        """
+        if cls._thread is None:
+            return
+        if result is not None and result.get("status") != "success":
+            result = None
+        elif result is not None and not HISTORY_DB_FULL_CHAIN:
+            result = {k: v for k, v in result.items() if k != "chain"}
+        if not points and result is None:
+            return
+        try:
+            cls._queue.put_nowait((symbol, time.time(), result, points))
+            cls._stats["queued_cycles"] += 1
+        except queue.Full:
+            cls._stats["dropped_cycles"] += 1
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        stats = dict(cls._stats)
+        stats["enabled"] = cls._thread is not None
+        stats["path"] = cls._path
+        stats["queue_depth"] = cls._queue.qsize()
+        return stats
+
+    # ── Writer thread ─────────────────────────────────────────────────────────
+
+    @classmethod
+    def _writer(cls) -> None:
+        conn = _connect(cls._path)
+        pending: List[Tuple] = []
+        last_flush = time.monotonic()
+        last_compact = 0.0
+        stopping = False
+        while not stopping:
+            wait = max(0.0, HISTORY_DB_FLUSH_SECONDS - (time.monotonic() - last_flush))
+            try:
+                item = cls._queue.get(timeout=wait)
+                if item is _STOP:
+                    stopping = True
+                else:
+                    pending.append(item)
+            except queue.Empty:
+                pass
+            due = time.monotonic() - last_flush >= HISTORY_DB_FLUSH_SECONDS
+            if pending and (stopping or due or len(pending) >= HISTORY_DB_BATCH_CYCLES):
+                cls._flush(conn, pending)
+                pending = []
+            if due or stopping:
+                last_flush = time.monotonic()
+            if time.monotonic() - last_compact >= COMPACT_INTERVAL_SECONDS:
+                cls._compact(conn)
+                last_compact = time.monotonic()
+        conn.close()
+
+    @classmethod
+    def _flush(cls, conn: sqlite3.Connection, cycles: List[Tuple]) -> None:
+        started = time.perf_counter()
+        point_rows = []
+        snapshot_rows = []
+        for symbol, ts, result, points in cycles:
+            point_rows.extend((symbol, *point) for point in points)
+            if result is not None:
+                snapshot_rows.append((symbol, ts, zlib.compress(dumps(result), 6)))
+        try:
+            with conn:
+                conn.executemany("INSERT INTO oi_points VALUES (?, ?, ?, ?, ?, ?)", point_rows)
+                conn.executemany("INSERT INTO snapshots VALUES (?, ?, ?)", snapshot_rows)
+        except sqlite3.Error as e:
+            cls._stats["errors"] += 1
+            logger.error(f"History database write failed: {e}")
+            return
+        cls._stats["written_points"] += len(point_rows)
+        cls._stats["written_snapshots"] += len(snapshot_rows)
+        cls._stats["flushes"] += 1
+        cls._stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    @classmethod
+    def _compact(cls, conn: sqlite3.Connection) -> None:
+        """Apply the retention window and fold the WAL back into the main file."""
+        cutoff = time.time() - HISTORY_DB_RETENTION_DAYS * 86400
+        try:
+            with conn:
+                conn.execute("DELETE FROM oi_points WHERE ts < ?", (cutoff,))
+                conn.execute("DELETE FROM snapshots WHERE ts < ?", (cutoff,))
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error as e:
+            cls._stats["errors"] += 1
+            logger.error(f"History database compaction failed: {e}")
+            return
+        cls._stats["compactions"] += 1
@@ -0,0 +1,204 @@
+"""
+Market Calendar & Scrape Scheduler
+----------------------------------
+Decides when the background scraper should hit NSE next.
+
+``MarketCalendar`` knows the NSE F&O session (pre-open 09:00, normal market
+09:15–15:30 IST, weekends and holidays from a local file). ``ScrapeScheduler``
+turns that into a delay per cycle:
+
+  * closed (night, weekend, holiday): sleep until just before the next open
+  * first/last ``SCRAPE_EDGE_MINUTES`` of the session and expiry days:
+    ``SCRAPE_INTERVAL_FAST``
+  * rest of the session and a short grace period after the close:
+    ``SCRAPE_INTERVAL``
+
+Once a few distinct ``records.timestamp`` values have been seen, fetches are
+phased to land just after NSE's own next refresh (never later than the
+interval above), and every delay gets ``±SCRAPE_JITTER`` random spread.
+
+Usage:
+    from backend.market_calendar import ScrapeScheduler
+    scheduler = ScrapeScheduler()
+    scheduler.observe(payload_timestamp)
+    await asyncio.sleep(scheduler.next_delay(expiries=["30-Oct-2026"]))
+"""
+
+import logging
+import os
+import random
+from datetime import date, datetime, time as dtime, timedelta
+from pathlib import Path
+from statistics import median
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import pytz
+
+logger = logging.getLogger(__name__)
+
+IST = pytz.timezone('Asia/Kolkata')
+
+PRE_OPEN = dtime(9, 0)
+MARKET_OPEN = dtime(9, 15)
+MARKET_CLOSE = dtime(15, 30)
+
+HOLIDAYS_FILE = os.environ.get("NSE_HOLIDAYS_FILE", str(Path(__file__).with_name("nse_holidays.txt")))
+SCRAPE_INTERVAL = float(os.environ.get("SCRAPE_INTERVAL", "30"))
+SCRAPE_INTERVAL_FAST = float(os.environ.get("SCRAPE_INTERVAL_FAST", "15"))
+SCRAPE_EDGE_MINUTES = float(os.environ.get("SCRAPE_EDGE_MINUTES", "15"))
+SCRAPE_JITTER = float(os.environ.get("SCRAPE_JITTER", "0.1"))  # fraction of the delay
+# Keep polling this long after the close to pick up NSE's final snapshot
+CLOSE_GRACE_MINUTES = 15
+# Wake this long before the open so the first fetch lands right at 09:15
+OPEN_LEAD_SECONDS = 30
+# Fetch this long after NSE's expected refresh, and never sooner than MIN_DELAY
+ALIGN_OFFSET_SECONDS = 2.0
+MIN_DELAY_SECONDS = 5.0
+NSE_TIMESTAMP_FORMAT = "%d-%b-%Y %H:%M:%S"
+
+
+def load_holidays(path: str) -> Set[date]:
+    """Dates from a holiday file (``YYYY-MM-DD`` per line, ``#`` comments)."""
+    holidays = set()
+    try:
+        lines = Path(path).read_text().splitlines()
+    except OSError as e:
+        logger.warning(f"NSE holiday file not readable ({e}); only weekends are treated as closed.")
+        return holidays
+    for line in lines:
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        try:
+            holidays.add(date.fromisoformat(line))
+        except ValueError:
+            logger.warning(f"Ignoring bad holiday entry {line!r} in {path}")
+    return holidays
+
+
+class MarketCalendar:
+    """NSE trading days and session times in IST."""
+
+    def __init__(self, holidays: Optional[Iterable[date]] = None):
+        self.holidays = set(holidays) if holidays is not None else load_holidays(HOLIDAYS_FILE)
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in self.holidays
+
+    def phase(self, now: datetime) -> str:
+        """'pre_open', 'open', 'post_close' (grace period) or 'closed'."""
+        now = now.astimezone(IST)
+        if not self.is_trading_day(now.date()):
+            return "closed"
+        t = now.time()
+        grace_end = (datetime.combine(now.date(), MARKET_CLOSE) + timedelta(minutes=CLOSE_GRACE_MINUTES)).time()
+        if PRE_OPEN <= t < MARKET_OPEN:
+            return "pre_open"
+        if MARKET_OPEN <= t < MARKET_CLOSE:
+            return "open"
+        if MARKET_CLOSE <= t < grace_end:
+            return "post_close"
+        return "closed"
+
+    def is_session_window(self, now: datetime) -> bool:
+        """True from pre-open until the end of the post-close grace period on trading days."""
+        return self.phase(now) != "closed"
+
+    def next_open(self, now: datetime) -> datetime:
+        """The next 09:15 IST on a trading day strictly after ``now``."""
+        now = now.astimezone(IST)
+        day = now.date()
+        while True:
+            candidate = IST.localize(datetime.combine(day, MARKET_OPEN))
+            if candidate > now and self.is_trading_day(day):
+                return candidate
+            day += timedelta(days=1)
+
+
+class ScrapeScheduler:
+    """Per-cycle delay for the background scraper; see the module docstring."""
+
+    def __init__(self, calendar: Optional[MarketCalendar] = None, rng: Optional[random.Random] = None):
+        self.calendar = calendar or MarketCalendar()
+        self.rng = rng or random.Random()
+        self._refreshes: List[datetime] = []  # distinct NSE payload timestamps, oldest first
+        self.last_reason = "startup"
+        self.next_run: Optional[datetime] = None
+
+    def observe(self, payload_timestamp: Optional[str]) -> None:
+        """Record an NSE ``records.timestamp`` ('18-Oct-2026 10:15:30')."""
+        if not payload_timestamp:
+            return
+        try:
+            ts = IST.localize(datetime.strptime(payload_timestamp, NSE_TIMESTAMP_FORMAT))
+        except ValueError:
+            return
+        if self._refreshes and ts <= self._refreshes[-1]:
+            return
+        self._refreshes = (self._refreshes + [ts])[-20:]
+
+    @property
+    def cadence(self) -> Optional[float]:
+        """Median seconds between NSE refreshes, once at least three gaps are known."""
+        if len(self._refreshes) < 4:
+            return None
+        gaps = [(b - a).total_seconds() for a, b in zip(self._refreshes, self._refreshes[1:])]
+        return median(gaps)
+
+    def is_expiry_day(self, day: date, expiries: Iterable[str]) -> bool:
+        for expiry in expiries:
+            try:
+                if datetime.strptime(expiry, "%d-%b-%Y").date() == day:
+                    return True
+            except ValueError:
+                continue
+        return False
+
+    def next_delay(self, now: Optional[datetime] = None, expiries: Iterable[str] = ()) -> float:
+        """Seconds to sleep before the next cycle."""
+        now = (now or datetime.now(IST)).astimezone(IST)
+        phase = self.calendar.phase(now)
+
+        if phase == "closed":
+            wake = self.calendar.next_open(now) - timedelta(seconds=OPEN_LEAD_SECONDS)
+            delay = max((wake - now).total_seconds(), MIN_DELAY_SECONDS)
+            self.last_reason = "market closed"
+        elif phase == "pre_open":
+            wake = IST.localize(datetime.combine(now.date(), MARKET_OPEN))
+            delay = max((wake - now).total_seconds(), MIN_DELAY_SECONDS)
+            self.last_reason = "pre-open"
+        else:
+            open_at = IST.localize(datetime.combine(now.date(), MARKET_OPEN))
+            close_at = IST.localize(datetime.combine(now.date(), MARKET_CLOSE))
+            edge = timedelta(minutes=SCRAPE_EDGE_MINUTES)
+            if phase == "open" and (now - open_at < edge or close_at - now < edge):
+                delay, self.last_reason = SCRAPE_INTERVAL_FAST, "near open/close"
+            elif phase == "open" and self.is_expiry_day(now.date(), expiries):
+                delay, self.last_reason = SCRAPE_INTERVAL_FAST, "expiry day"
+            else:
+                delay, self.last_reason = SCRAPE_INTERVAL, phase
+            aligned = self._until_next_refresh(now)
+            if aligned is not None and aligned < delay:
+                delay = max(aligned, MIN_DELAY_SECONDS)
+                self.last_reason += ", aligned to NSE refresh"
+            delay *= 1 + self.rng.uniform(-SCRAPE_JITTER, SCRAPE_JITTER)
+
+        self.next_run = now + timedelta(seconds=delay)
+        return delay
+
+    def _until_next_refresh(self, now: datetime) -> Optional[float]:
+        cadence = self.cadence
+        if not cadence:
+            return None
+        last = self._refreshes[-1]
+        elapsed = (now - last).total_seconds()
+        periods = int(elapsed // cadence) + 1
+        return periods * cadence - elapsed + ALIGN_OFFSET_SECONDS
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "reason": self.last_reason,
+            "next_run": self.next_run.isoformat() if self.next_run else None,
+            "nse_refresh_seconds": self.cadence,
+            "holidays_loaded": len(self.calendar.holidays),
+        }
@@ -0,0 +1,234 @@
+"""
+Prometheus Metrics
+------------------
+A small in-process registry rendered in the Prometheus text exposition format
+at ``/metrics`` — counters, gauges and histograms with labels, plus callback
+metrics read from the existing ``stats()`` singletons at scrape time. No
+client library needed.
+
+Metrics are per process: in multi-worker mode (SHARED_SNAPSHOT_DIR) scrape
+phases and NSE counters come from the leader, request latency from whichever
+worker served the request. The ``worker_role`` gauge tells them apart.
+
+Usage:
+    from backend.metrics import REGISTRY, SCRAPE_PHASE, NSE_RETRIES
+    with SCRAPE_PHASE.time("decode"):
+        data = loads(body)
+    NSE_RETRIES.inc(cause="json_error")
+    body = REGISTRY.render()
+"""
+
+import math
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PREFIX = "premiumeater_"
+
+# Seconds; covers sub-millisecond decode/process up to slow NSE fetches
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = PREFIX + name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    @contextmanager
+    def time(self, *label_values: str, **labels: Any) -> Iterator[None]:
+        """Observe the duration of the ``with`` block (label values positionally or by name)."""
+        labels.update(zip(self.labels, label_values))
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """Gauge or counter whose samples are read from ``collect()`` at render time."""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str],
+                 collect: Callable[[], Iterable[Tuple[Sequence[Any], float]]], kind: str = "gauge"):
+        super().__init__(name, documentation, labels)
+        self.kind = kind
+        self.collect = collect
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labels, [str(v) for v in key])} {_format_value(value)}"
+            for key, value in self.collect()
+            if value is not None
+        ]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def callback(self, name: str, documentation: str, labels: Sequence[str],
+                 collect: Callable[[], Iterable[Tuple[Sequence[Any], float]]], kind: str = "gauge") -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, labels, collect, kind))
+
+    def render(self) -> bytes:
+        lines: List[str] = []
+        for metric in self._metrics:
+            samples = metric.samples()
+            if samples:
+                lines.extend(metric.header())
+                lines.extend(samples)
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+REGISTRY = Registry()
+
+SCRAPE_PHASE = REGISTRY.histogram(
+    "scrape_phase_seconds",
+    "Time spent in each phase of a scrape (cookie, fetch, decode, parse, process, analytics, alerts, publish).",
+    ["phase"],
+)
+NSE_RETRIES = REGISTRY.counter(
+    "nse_retries_total",
+    "NSE API attempts that had to be retried, by cause.",
+    ["cause"],
+)
+COOKIE_REFRESH = REGISTRY.histogram(
+    "cookie_refresh_seconds",
+    "Duration of background cookie refreshes (warm-up plus check), by outcome.",
+    ["result"],
+)
+EVENT_LOOP_LAG = REGISTRY.histogram(
+    "event_loop_lag_seconds",
+    "How late a periodic event-loop timer fired.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+HTTP_REQUEST = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "Time from request start to the last response byte, by route.",
+    ["route", "status"],
+)
+
+
+class RequestTimer:
+    """
+    ASGI middleware timing requests to selected paths into HTTP_REQUEST.
+    Plain ASGI (no BaseHTTPMiddleware) so streaming responses pass straight through.
+    """
+
+    def __init__(self, app, routes: Dict[str, str]):
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        route = self.routes.get(scope.get("path")) if scope["type"] == "http" else None
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status: Optional[int] = None
+
+        async def timed_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body"):
+                HTTP_REQUEST.observe(time.perf_counter() - started, route=route, status=status)
+
+        await self.app(scope, receive, timed_send)
@@ -0,0 +1,277 @@
+"""
+NSE HTTP Session Pool
+---------------------
+Long-lived, connection-pooled curl_cffi sessions for all NSE traffic — one per
+browser ``Profile`` in use. Opening a fresh AsyncSession per request paid a
+full TCP + TLS handshake every scrape; reusing one keeps the HTTP/2 connection
+warm across cycles and retries and avoids the bursty reconnects NSE's WAF
+dislikes.
+
+A ``Profile`` ties a user-agent to the matching client hints and curl_cffi
+impersonation target, so the TLS fingerprint, headers and cookies of one
+pooled identity always agree (see CookieManager's session pool).
+
+Sessions open lazily and are closed on shutdown. A profile's session is
+recycled (closed and reopened with a fresh connection) whenever the scraper
+hits a cookie or fingerprint error with it.
+
+Usage:
+    from backend.nse_session import NSESession, PROFILES
+    await NSESession.start()
+    response = await NSESession.get(api_url, profile=PROFILES[0], headers=PROFILES[0].api_headers())
+    await NSESession.recycle("HTTP 403", PROFILES[0])
+    await NSESession.close()
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, NamedTuple, Optional
+
+from curl_cffi import CurlInfo
+from curl_cffi import requests as curl_requests
+
+logger = logging.getLogger(__name__)
+
+# Point at a local stand-in (benchmarks/nse_mock.py) with NSE_BASE_URL=http://127.0.0.1:9000
+BASE_URL = os.environ.get("NSE_BASE_URL", "https://www.nseindia.com").rstrip("/")
+MAX_CLIENTS = int(os.environ.get("NSE_MAX_CONNECTIONS", "4"))
+# Cap on concurrent NSE API requests across all symbol scrapers
+MAX_IN_FLIGHT = int(os.environ.get("NSE_MAX_IN_FLIGHT", "2"))
+
+
+class Profile(NamedTuple):
+    """A consistent browser identity: curl_cffi impersonation target plus matching headers."""
+
+    name: str
+    impersonate: str
+    user_agent: str
+    sec_ch_ua: str
+    platform: str
+
+    def navigate_headers(self) -> Dict[str, str]:
+        """Headers of a top-level page load (cookie warm-ups)."""
+        return {
+            "User-Agent": self.user_agent,
+            "Accept": (
+                "text/html,application/xhtml+xml,application/xml;"
+                "q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8"
+            ),
+            "Accept-Language": "en-US,en;q=0.7",
+            "Accept-Encoding": "gzip, deflate, br, zstd",
+            "Cache-Control": "no-cache",
+            "Pragma": "no-cache",
+            "sec-ch-ua": self.sec_ch_ua,
+            "sec-ch-ua-mobile": "?0",
+            "sec-ch-ua-platform": f'"{self.platform}"',
+            "sec-fetch-dest": "document",
+            "sec-fetch-mode": "navigate",
+            "sec-fetch-site": "none",
+            "sec-fetch-user": "?1",
+            "upgrade-insecure-requests": "1",
+        }
+
+    def api_headers(self) -> Dict[str, str]:
+        """Headers of an XHR from the option-chain page."""
+        return {
+            "User-Agent": self.user_agent,
+            "Accept": "*/*",
+            "Accept-Language": "en-US,en;q=0.7",
+            "Accept-Encoding": "gzip, deflate, br, zstd",
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "Referer": f"{BASE_URL}/option-chain",
+            "sec-ch-ua": self.sec_ch_ua,
+            "sec-ch-ua-mobile": "?0",
+            "sec-ch-ua-platform": f'"{self.platform}"',
+            "sec-fetch-dest": "empty",
+            "sec-fetch-mode": "cors",
+            "sec-fetch-site": "same-origin",
+            "sec-gpc": "1",
+            "priority": "u=1, i",
+            "Pragma": "no-cache",
+        }
+
+
+_CHROME_136_HINTS = '"Chromium";v="136", "Google Chrome";v="136", "Not.A/Brand";v="99"'
+_CHROME_131_HINTS = '"Google Chrome";v="131", "Chromium";v="131", "Not_A Brand";v="24"'
+
+# Desktop Chrome builds curl_cffi can impersonate; pooled sessions take them in turn
+PROFILES = [
+    Profile(
+        "chrome136-win", "chrome136",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
+        _CHROME_136_HINTS, "Windows",
+    ),
+    Profile(
+        "chrome131-win", "chrome131",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
+        _CHROME_131_HINTS, "Windows",
+    ),
+    Profile(
+        "chrome136-mac", "chrome136",
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
+        _CHROME_136_HINTS, "macOS",
+    ),
+    Profile(
+        "chrome136-linux", "chrome136",
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
+        _CHROME_136_HINTS, "Linux",
+    ),
+]
+DEFAULT_PROFILE = PROFILES[0]
+
+
+def _session_args(profile: Profile) -> Dict[str, Any]:
+    args: Dict[str, Any] = {
+        "impersonate": profile.impersonate,
+        "timeout": 30.0,
+        "curl_infos": [CurlInfo.NUM_CONNECTS],
+    }
+    proxy = os.environ.get("HTTP_PROXY")
+    if proxy:
+        args["proxies"] = {"http": proxy, "https": proxy}
+    return args
+
+
+class NSESession:
+    """
+    Process-wide async singleton around pooled curl_cffi AsyncSessions (one per
+    profile), plus long-lived sync Sessions for CookieManager's threaded warm-ups.
+    """
+
+    _sessions: Dict[str, curl_requests.AsyncSession] = {}
+    _warmups: Dict[str, curl_requests.Session] = {}
+    _lock: asyncio.Lock = asyncio.Lock()
+    _in_flight: asyncio.Semaphore = asyncio.Semaphore(MAX_IN_FLIGHT)
+    _created_at: Dict[str, float] = {}
+    # In-flight requests per session, so a recycle never aborts another caller's request
+    _users: Dict[curl_requests.AsyncSession, int] = {}
+    _stats: Dict[str, Any] = {
+        "requests": 0,
+        "new_connections": 0,
+        "reused_connections": 0,
+        "sessions_created": 0,
+        "recycles": 0,
+        "last_recycle_reason": None,
+        "http_version": None,
+    }
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+
+    @classmethod
+    async def start(cls) -> None:
+        """Open the default profile's session (no-op if already open)."""
+        async with cls._lock:
+            cls._ensure_open(DEFAULT_PROFILE)
+
+    @classmethod
+    async def close(cls) -> None:
+        """Close all shared sessions; called from the app lifespan on shutdown."""
+        async with cls._lock:
+            for name in list(cls._sessions):
+                await cls._close_locked(name)
+            for warmup in cls._warmups.values():
+                warmup.close()
+            cls._warmups.clear()
+        logger.info("NSE session pool closed.")
+
+    @classmethod
+    async def recycle(cls, reason: str, profile: Optional[Profile] = None) -> None:
+        """Drop a profile's pooled connection (all of them if None) so the next request starts clean."""
+        async with cls._lock:
+            for name in [profile.name] if profile else list(cls._sessions):
+                await cls._close_locked(name)
+            cls._stats["recycles"] += 1
+            cls._stats["last_recycle_reason"] = reason
+        logger.info(f"NSE session recycled ({reason}{', ' + profile.name if profile else ''}).")
+
+    # ── Requests ──────────────────────────────────────────────────────────────
+
+    @classmethod
+    async def get(cls, url: str, profile: Profile = DEFAULT_PROFILE, **kwargs) -> curl_requests.Response:
+        """GET through the profile's shared session, opening it lazily if needed."""
+        async with cls._in_flight:
+            async with cls._lock:
+                session = cls._ensure_open(profile)
+                cls._users[session] = cls._users.get(session, 0) + 1
+            try:
+                response = await session.get(url, **kwargs)
+            finally:
+                async with cls._lock:
+                    cls._users[session] -= 1
+                    if not cls._users[session]:
+                        del cls._users[session]
+                        if session is not cls._sessions.get(profile.name):
+                            await cls._close_session(session)  # recycled while we were using it
+        cls._record(response)
+        return response
+
+    @classmethod
+    def warmup_session(cls, profile: Profile = DEFAULT_PROFILE) -> curl_requests.Session:
+        """
+        Long-lived sync session for a profile's cookie warm-ups (runs in a worker
+        thread). The cookie jar is cleared so every warm-up builds a fresh NSE
+        session while still reusing the pooled connection.
+        """
+        warmup = cls._warmups.get(profile.name)
+        if warmup is None:
+            warmup = cls._warmups[profile.name] = curl_requests.Session(**_session_args(profile))
+            cls._stats["sessions_created"] += 1
+        warmup.cookies.clear()
+        return warmup
+
+    @classmethod
+    def record(cls, response: curl_requests.Response) -> None:
+        """Count a response made through :meth:`warmup_session`."""
+        cls._record(response)
+
+    # ── Stats ─────────────────────────────────────────────────────────────────
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        """Handshake and reuse counters for /health."""
+        stats = dict(cls._stats)
+        total = stats["new_connections"] + stats["reused_connections"]
+        stats["reuse_rate"] = round(stats["reused_connections"] / total, 3) if total else None
+        now = time.time()
+        stats["session_age_seconds"] = {name: int(now - cls._created_at[name]) for name in cls._sessions}
+        return stats
+
+    # ── Internal ──────────────────────────────────────────────────────────────
+
+    @classmethod
+    def _ensure_open(cls, profile: Profile) -> curl_requests.AsyncSession:
+        session = cls._sessions.get(profile.name)
+        if session is None:
+            session = curl_requests.AsyncSession(max_clients=MAX_CLIENTS, **_session_args(profile))
+            cls._sessions[profile.name] = session
+            cls._created_at[profile.name] = time.time()
+            cls._stats["sessions_created"] += 1
+            logger.info(f"Opened pooled NSE session ({profile.name}, impersonate={profile.impersonate}).")
+        return session
+
+    @classmethod
+    async def _close_locked(cls, name: str) -> None:
+        """Detach a profile's session; close it now unless requests are still using it."""
+        session = cls._sessions.pop(name, None)
+        if session is not None and session not in cls._users:
+            await cls._close_session(session)
+
+    @staticmethod
+    async def _close_session(session: curl_requests.AsyncSession) -> None:
+        try:
+            await session.close()
+        except Exception as e:
+            logger.warning(f"Error closing NSE session: {e}")
+
+    @classmethod
+    def _record(cls, response: curl_requests.Response) -> None:
+        cls._stats["requests"] += 1
+        connects = response.infos.get(CurlInfo.NUM_CONNECTS)
+        if connects:
+            cls._stats["new_connections"] += int(connects)
+        elif connects is not None:
+            cls._stats["reused_connections"] += 1
+        cls._stats["http_version"] = response.http_version
@@ -0,0 +1,183 @@
+"""
+OI History Store
+----------------
+Bounded, array-backed time series of open interest per (strike, side).
+
+Each key owns a preallocated pair of NumPy rings (timestamps + OI). Appends
+are O(1), "value at or before t" lookups are a binary search over at most two
+sorted segments, and pruning just advances the ring's start pointer. Keys are
+kept in LRU order so strikes that drift out of the chain are evicted instead
+of accumulating forever. ``max_keys`` is a soft cap: keys appended since the
+last ``begin_cycle()`` are never evicted, so a chain bigger than the cap grows
+the store rather than thrashing it.
+
+Usage:
+    from backend.oi_history import OIHistoryStore
+    store = OIHistoryStore(capacity=256, max_keys=128)
+    store.begin_cycle()
+    store.append(22500, "CE", now, 1_250_000)
+    past_oi = store.value_at_or_before(22500, "CE", now - timedelta(minutes=5))
+    past = store.values_at_or_before(22500, "CE", lookback_epochs)   # NaN where none
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+from typing import Hashable, Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+Timestamp = Union[datetime, float]
+
+
+def _to_epoch(ts: Timestamp) -> float:
+    return ts.timestamp() if isinstance(ts, datetime) else float(ts)
+
+
+class _OIRing:
+    """Fixed-capacity ring of (timestamp, oi) points, oldest first."""
+
+    __slots__ = ("_ts", "_oi", "_start", "_size", "cycle")
+
+    def __init__(self, capacity: int):
+        self._ts = np.empty(capacity, dtype=np.float64)
+        self._oi = np.empty(capacity, dtype=np.float64)
+        self._start = 0
+        self._size = 0
+        self.cycle = 0  # store cycle of the last append
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def latest_ts(self) -> Optional[float]:
+        if not self._size:
+            return None
+        return float(self._ts[(self._start + self._size - 1) % self._ts.shape[0]])
+
+    def append(self, ts: float, oi: float) -> None:
+        cap = self._ts.shape[0]
+        if self._size < cap:
+            idx = (self._start + self._size) % cap
+            self._size += 1
+        else:
+            # Full — overwrite the oldest point
+            idx = self._start
+            self._start = (self._start + 1) % cap
+        self._ts[idx] = ts
+        self._oi[idx] = oi
+
+    def _rank(self, ts: float, side: str) -> int:
+        """Number of stored points before ``ts`` (searchsorted semantics)."""
+        cap = self._ts.shape[0]
+        end = self._start + self._size
+        if end <= cap:
+            return int(np.searchsorted(self._ts[self._start:end], ts, side))
+        # Wrapped: older points live in [start:cap], newer in [0:end-cap]
+        older = cap - self._start
+        newer = int(np.searchsorted(self._ts[:end - cap], ts, side))
+        if newer:
+            return older + newer
+        return int(np.searchsorted(self._ts[self._start:cap], ts, side))
+
+    def value_at_or_before(self, ts: float) -> Optional[float]:
+        if not self._size:
+            return None
+        n = self._rank(ts, "right")
+        if n == 0:
+            return None
+        return float(self._oi[(self._start + n - 1) % self._ts.shape[0]])
+
+    def values_at_or_before(self, ts: np.ndarray) -> np.ndarray:
+        """:meth:`value_at_or_before` for many timestamps in one pass; NaN where there is none."""
+        cap = self._ts.shape[0]
+        end = self._start + self._size
+        if end <= cap:
+            n = self._ts[self._start:end].searchsorted(ts, "right")
+        else:
+            older = cap - self._start
+            newer = self._ts[:end - cap].searchsorted(ts, "right")
+            n = np.where(newer > 0, older + newer, self._ts[self._start:cap].searchsorted(ts, "right"))
+        values = self._oi.take((n + (self._start - 1)) % cap)
+        values[n == 0] = np.nan
+        return values
+
+    def prune(self, cutoff: float) -> None:
+        """Drop points strictly older than ``cutoff``."""
+        if not self._size or self._ts[self._start] >= cutoff:
+            return
+        n = self._rank(cutoff, "left")
+        if n:
+            self._start = (self._start + n) % self._ts.shape[0]
+            self._size -= n
+
+
+class OIHistoryStore:
+    """
+    OI history for many (strike, side) keys with bounded memory.
+
+    Args:
+        capacity: Points kept per key; the oldest point is overwritten once full.
+        max_keys: Keys kept before the least recently updated one is evicted
+            (never one appended to in the current cycle).
+    """
+
+    def __init__(self, capacity: int = 256, max_keys: int = 128):
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self._rings: "OrderedDict[Tuple[Hashable, str], _OIRing]" = OrderedDict()
+        self._cycle = 0
+
+    def __len__(self) -> int:
+        return len(self._rings)
+
+    def __contains__(self, key: Tuple[Hashable, str]) -> bool:
+        return key in self._rings
+
+    def __iter__(self) -> Iterator[Tuple[Hashable, str]]:
+        return iter(self._rings)
+
+    def begin_cycle(self) -> None:
+        """Start a scrape cycle: keys appended from now on are safe from eviction until the next one."""
+        self._cycle += 1
+
+    def append(self, strike: Hashable, side: str, ts: Timestamp, oi: float) -> None:
+        key = (strike, side)
+        ring = self._rings.get(key)
+        if ring is None:
+            ring = self._rings[key] = _OIRing(self.capacity)
+            while len(self._rings) > self.max_keys:
+                # LRU order: once the oldest key is from this cycle, all of them are
+                oldest = next(iter(self._rings.values()))
+                if oldest.cycle == self._cycle:
+                    break
+                self._rings.popitem(last=False)
+        else:
+            self._rings.move_to_end(key)
+        ring.cycle = self._cycle
+        ring.append(_to_epoch(ts), oi)
+
+    def value_at_or_before(self, strike: Hashable, side: str, ts: Timestamp) -> Optional[float]:
+        """Most recent OI recorded at or before ``ts``, or None if there is none."""
+        ring = self._rings.get((strike, side))
+        if ring is None:
+            return None
+        return ring.value_at_or_before(_to_epoch(ts))
+
+    def values_at_or_before(self, strike: Hashable, side: str, ts: np.ndarray) -> Optional[np.ndarray]:
+        """Most recent OI at or before each epoch in ``ts`` (NaN where none), or None for an unknown key."""
+        ring = self._rings.get((strike, side))
+        if ring is None or not len(ring):
+            return None
+        return ring.values_at_or_before(ts)
+
+    def prune(self, cutoff: Timestamp) -> None:
+        """Drop points older than ``cutoff`` and forget keys left empty."""
+        cutoff = _to_epoch(cutoff)
+        for key in list(self._rings):
+            ring = self._rings[key]
+            ring.prune(cutoff)
+            if not len(ring):
+                del self._rings[key]
+
+    def clear(self) -> None:
+        self._rings.clear()
@@ -0,0 +1,201 @@
+"""
+Option Chain Columns
+--------------------
+Flattens the option-chain-v3 ``records.data`` / ``filtered.data`` rows into
+typed NumPy columns sorted by strike, so the scraper can select the strike
+window with a binary search instead of walking a DataFrame with iterrows().
+
+With ``parse_option_chain`` the body is decoded with orjson (when installed)
+and only the rows inside a strike window derived from ``underlyingValue`` are
+materialized, so per-cycle work beyond the decode scales with the window rather
+than the whole chain.
+
+Usage:
+    from backend.option_chain import extract_option_chain
+    chain = extract_option_chain(data['filtered']['data'])
+    window = chain.between(22350, 22650)
+"""
+
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional — fall back to the stdlib decoder
+    orjson = None
+
+# (column suffix, NSE field, dtype) — missing values become 0 like fillna(0) did
+LEG_FIELDS = (
+    ("oi", "openInterest", np.int64),
+    ("chg_oi", "changeinOpenInterest", np.int64),
+    ("ltp", "lastPrice", np.float64),
+    ("iv", "impliedVolatility", np.float64),
+    ("volume", "totalTradedVolume", np.int64),
+)
+LEGS = ("ce", "pe")
+
+
+def _num(value: Any) -> float:
+    """Coerce an NSE numeric field to float, treating missing/garbage as 0."""
+    if value is None:
+        return 0.0
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return value if value == value else 0.0  # NaN -> 0
+
+
+class OptionChain:
+    """
+    Column-oriented option chain, sorted by strike.
+
+    Attributes:
+        strike: float64 strike prices.
+        expiry: object array of the row's expiry string ("" if NSE omitted it).
+        ce_present / pe_present: bool masks — False where the row had no leg.
+        ce_oi, ce_chg_oi, ce_ltp, ce_iv, ce_volume: call-leg columns.
+        pe_oi, pe_chg_oi, pe_ltp, pe_iv, pe_volume: put-leg columns.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+        for name, values in columns.items():
+            setattr(self, name, values)
+
+    def __len__(self) -> int:
+        return int(self.strike.shape[0])
+
+    def take(self, index) -> "OptionChain":
+        """New chain holding ``index`` (slice, mask or positions) of every column."""
+        return OptionChain({name: values[index] for name, values in self.columns.items()})
+
+    def between(self, low: float, high: float) -> "OptionChain":
+        """Rows with ``low <= strike <= high`` — O(log n) on the sorted strikes."""
+        lo = int(np.searchsorted(self.strike, low, "left"))
+        hi = int(np.searchsorted(self.strike, high, "right"))
+        return self.take(slice(lo, hi))
+
+    def for_expiry(self, expiry: str) -> "OptionChain":
+        """Rows for one expiry, still sorted by strike."""
+        return self.take(self.expiry == expiry)
+
+    def expiries(self) -> List[str]:
+        """Distinct non-empty expiry strings present in the chain."""
+        return [e for e in dict.fromkeys(self.expiry.tolist()) if e]
+
+
+def loads(body) -> Any:
+    """Decode a JSON body with orjson when available, else the stdlib."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def _row_expiry(row: Dict[str, Any]) -> str:
+    """Expiry of a row — v3 uses ``expiryDates``, older payloads ``expiryDate``."""
+    expiry = row.get("expiryDates") or row.get("expiryDate")
+    if not expiry:
+        for leg in ("CE", "PE"):
+            if isinstance(row.get(leg), dict):
+                expiry = row[leg].get("expiryDate")
+                if expiry:
+                    break
+    return expiry if isinstance(expiry, str) else ""
+
+
+def extract_option_chain(
+    rows: Iterable[Dict[str, Any]],
+    low: Optional[float] = None,
+    high: Optional[float] = None,
+) -> OptionChain:
+    """
+    Build an :class:`OptionChain` from raw NSE option-chain rows.
+
+    Args:
+        rows: ``records.data`` / ``filtered.data`` entries.
+        low, high: Optional inclusive strike bounds; rows outside are skipped
+            before any leg is unpacked.
+    """
+    strikes: List[float] = []
+    expiries: List[str] = []
+    present: Dict[str, List[bool]] = {leg: [] for leg in LEGS}
+    values: Dict[str, List[float]] = {
+        f"{leg}_{suffix}": [] for leg in LEGS for suffix, _, _ in LEG_FIELDS
+    }
+
+    for row in rows:
+        strike = row.get("strikePrice")
+        if strike is None:
+            continue
+        strike = _num(strike)
+        if (low is not None and strike < low) or (high is not None and strike > high):
+            continue
+        strikes.append(strike)
+        expiries.append(_row_expiry(row))
+        for leg in LEGS:
+            leg_data: Optional[Dict[str, Any]] = row.get(leg.upper())
+            has_leg = isinstance(leg_data, dict)
+            present[leg].append(has_leg)
+            for suffix, field, _ in LEG_FIELDS:
+                values[f"{leg}_{suffix}"].append(_num(leg_data.get(field)) if has_leg else 0.0)
+
+    strike_arr = np.asarray(strikes, dtype=np.float64)
+    order = np.argsort(strike_arr, kind="stable")
+    columns: Dict[str, np.ndarray] = {
+        "strike": strike_arr[order],
+        "expiry": np.asarray(expiries, dtype=object)[order],
+    }
+    for leg in LEGS:
+        columns[f"{leg}_present"] = np.asarray(present[leg], dtype=bool)[order]
+        for suffix, _, dtype in LEG_FIELDS:
+            name = f"{leg}_{suffix}"
+            columns[name] = np.asarray(values[name], dtype=np.float64)[order].astype(dtype)
+    return OptionChain(columns)
+
+
+def parse_option_chain(
+    body,
+    window: Optional[Callable[[float], Tuple[float, float]]] = None,
+    records_first: bool = False,
+) -> Optional[Tuple[OptionChain, float, List[str]]]:
+    """
+    Decode an option-chain-v3 body and keep only the strikes that matter.
+
+    ``records.underlyingValue`` and ``records.expiryDates`` are read first;
+    ``window(underlying)`` then gives the ``(low, high)`` strike bounds and only
+    those rows are materialized. Without ``window`` the whole chain is kept.
+
+    Args:
+        body: Raw response bytes/str, or the already-decoded payload dict.
+        window: Maps the underlying price to inclusive ``(low, high)`` strike bounds.
+        records_first: Read ``records.data`` (every expiry) ahead of
+            ``filtered.data`` (nearest expiry only).
+
+    Returns:
+        ``(chain, underlying, expiry_dates)``, or None if the body is empty or
+        has no option rows.
+    """
+    data = body if isinstance(body, dict) else loads(body)
+    if not data:
+        return None
+    records = data.get("records") or {}
+    underlying = records.get("underlyingValue")
+    if underlying is None:
+        return None
+    expiry_dates = records.get("expiryDates") or []
+
+    filtered = data.get("filtered") or {}
+    if records_first and records.get("data"):
+        rows = records["data"]
+    else:
+        rows = filtered.get("data") or records.get("data")
+    if rows is None:
+        return None
+
+    low = high = None
+    if window is not None:
+        low, high = window(float(underlying))
+    return extract_option_chain(rows, low, high), underlying, expiry_dates
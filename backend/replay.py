@@ -0,0 +1,187 @@
+"""
+Historical Replay
+-----------------
+Feeds a directory of recorded option-chain-v3 responses through the same
+parse → process → alert pipeline the live scraper uses, with a simulated IST
+clock, so alert thresholds can be tested and the processing path profiled
+without NSE or cookies.
+
+Each recording's time comes from its ``records.timestamp``; recordings without
+one (or that repeat the previous time) are spaced ``--interval`` seconds apart.
+Alerts go to an in-process collector that applies the dispatcher's cooldown on
+simulated time instead of being sent.
+
+Usage:
+    python -m backend.replay recordings/2026-01-05/ --symbol NIFTY
+    python -m backend.replay recordings/ --speed 1 --out replay.jsonl   # real time
+    python -m backend.replay recordings/ --threshold 20
+"""
+
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from backend.option_chain import loads
+from backend.scraper import WebScraper
+from backend.snapshot import dumps
+from backend.telegram_notification import ALERT_COOLDOWN_SECONDS, OIAlert
+
+NSE_TIMESTAMP_FORMAT = "%d-%b-%Y %H:%M:%S"
+
+
+class ReplayClock:
+    """Simulated IST clock, advanced by the replay loop."""
+
+    def __init__(self, start: Optional[datetime] = None):
+        self.current = start or datetime.now(WebScraper.IST)
+
+    def __call__(self) -> datetime:
+        return self.current
+
+    def set(self, when: datetime) -> None:
+        self.current = when
+
+
+class AlertCollector:
+    """Alert sink that records what would have been sent, honouring the cooldown on simulated time."""
+
+    def __init__(self, clock: ReplayClock, cooldown: float = ALERT_COOLDOWN_SECONDS):
+        self.clock = clock
+        self.cooldown = cooldown
+        self.triggered = 0
+        self.sent: List[Tuple[datetime, OIAlert]] = []
+        self._last_sent: Dict[Tuple, datetime] = {}
+
+    def __call__(self, alerts: List[OIAlert]) -> None:
+        now = self.clock()
+        self.triggered += len(alerts)
+        for alert in alerts:
+            last = self._last_sent.get(alert.dedup_key)
+            if last is not None and (now - last).total_seconds() < self.cooldown:
+                continue
+            self._last_sent[alert.dedup_key] = now
+            self.sent.append((now, alert))
+
+
+def recordings(directory: str) -> List[Path]:
+    """Recorded ``*.json`` bodies in ``directory``, in name order."""
+    return sorted(Path(directory).glob("*.json"))
+
+
+def payload_time(data: Dict[str, Any]) -> Optional[datetime]:
+    """``records.timestamp`` as an IST datetime, if present and parseable."""
+    stamp = (data.get("records") or {}).get("timestamp")
+    try:
+        return WebScraper.IST.localize(datetime.strptime(stamp, NSE_TIMESTAMP_FORMAT))
+    except (TypeError, ValueError):
+        return None
+
+
+class Replay:
+    """
+    One replay run for one symbol.
+
+    Args:
+        symbol: Index the recordings belong to (sets the strike step).
+        interval: Seconds between recordings that carry no usable timestamp.
+        speed: 0 replays as fast as possible; 1 in real time; 10 at ten times speed.
+        threshold: Alert threshold in percent (default ALERT_THRESHOLD_PCT).
+    """
+
+    def __init__(self, symbol: str = WebScraper.SYMBOL, interval: float = 30, speed: float = 0,
+                 threshold: Optional[float] = None):
+        self.clock = ReplayClock()
+        self.alerts = AlertCollector(self.clock)
+        self.scraper = WebScraper(symbol, clock=self.clock, alert_sink=self.alerts, alert_threshold=threshold)
+        self.interval = interval
+        self.speed = speed
+        self.stats: Dict[str, Any] = {
+            "snapshots": 0, "skipped": 0, "unchanged": 0, "parse_s": 0.0, "process_s": 0.0, "wall_s": 0.0,
+        }
+
+    def run(self, paths: List[Path]) -> Iterator[Tuple[Path, Dict[str, Any]]]:
+        """Yield ``(path, response)`` per recording — the same dict the live scrape publishes."""
+        previous: Optional[datetime] = None
+        started = time.perf_counter()
+        for path in paths:
+            t0 = time.perf_counter()
+            data = loads(path.read_bytes())
+            parsed = self.scraper.parse_payload(data) if data else None
+            t1 = time.perf_counter()
+            self.stats["parse_s"] += t1 - t0
+            if parsed is None:
+                self.stats["skipped"] += 1
+                continue
+
+            when = payload_time(data)
+            if previous is not None and (when is None or when <= previous):
+                when = previous + timedelta(seconds=self.interval)
+            when = when or self.clock()
+            if self.speed and previous is not None:
+                time.sleep((when - previous).total_seconds() / self.speed)
+            self.clock.set(when)
+            previous = when
+
+            t2 = time.perf_counter()
+            response = self.scraper.build_response(*parsed)
+            self.stats["process_s"] += time.perf_counter() - t2
+            if response.get("status") == "unchanged":
+                self.stats["unchanged"] += 1
+                continue
+            self.stats["snapshots"] += 1
+            yield path, response
+        self.stats["wall_s"] = time.perf_counter() - started
+
+    def report(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        n = stats["snapshots"] or 1
+        stats["snapshots_per_sec"] = round(stats["snapshots"] / stats["wall_s"], 1) if stats["wall_s"] else None
+        stats["parse_ms_avg"] = round(stats.pop("parse_s") * 1000 / n, 3)
+        stats["process_ms_avg"] = round(stats.pop("process_s") * 1000 / n, 3)
+        stats["wall_s"] = round(stats["wall_s"], 3)
+        stats["alerts_triggered"] = self.alerts.triggered
+        stats["alerts_sent"] = len(self.alerts.sent)
+        return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="directory of recorded option-chain-v3 *.json bodies")
+    parser.add_argument("--symbol", default=WebScraper.SYMBOL)
+    parser.add_argument("--interval", type=float, default=30, help="seconds between untimestamped recordings")
+    parser.add_argument("--speed", type=float, default=0, help="0 = as fast as possible, 1 = real time")
+    parser.add_argument("--threshold", type=float, help="alert threshold in percent")
+    parser.add_argument("--out", help="write each response as a JSON line to this file")
+    parser.add_argument("--alerts", action="store_true", help="print every alert that would have been sent")
+    parser.add_argument("--verbose", action="store_true", help="log the scraper's per-cycle debug output")
+    args = parser.parse_args()
+
+    paths = recordings(args.directory)
+    if not paths:
+        parser.error(f"no *.json recordings in {args.directory}")
+
+    replay = Replay(args.symbol, interval=args.interval, speed=args.speed, threshold=args.threshold)
+    out = open(args.out, "wb") if args.out else None
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO, format="%(name)s - %(levelname)s - %(message)s")
+        logging.getLogger("backend.scraper").setLevel(logging.DEBUG)
+    try:
+        for _, response in replay.run(paths):
+            if out is not None:
+                out.write(dumps(response) + b"\n")
+    finally:
+        if out is not None:
+            out.close()
+
+    if args.alerts:
+        for when, alert in replay.alerts.sent:
+            print(f"{when:%H:%M:%S}  {alert.expiry or '-':<12} {alert.strike:>8}  {alert.key:<14} {alert.value:8.2f}%")
+    for key, value in replay.report().items():
+        print(f"{key:>18}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+NSE Request Resilience
+----------------------
+Failure handling for the scrape path, shared by every symbol's scraper:
+
+  * ``backoff_delay`` — exponential backoff with full jitter between retries,
+    so scrapers that fail together do not retry in lock-step.
+  * ``CircuitBreaker`` — after ``BREAKER_FAILURES`` failed NSE requests in a
+    row, stop calling NSE for ``BREAKER_OPEN_SECONDS`` (doubling on each
+    consecutive trip, up to ``BREAKER_MAX_OPEN_SECONDS``), then let a single
+    probe through; its result closes or re-opens the circuit.
+  * ``LatencyTracker`` — recent successful request latencies; with
+    ``NSE_HEDGE=1`` a second (hedged) request goes out on another session
+    once the first has taken longer than the ``NSE_HEDGE_PERCENTILE`` latency.
+
+Usage:
+    from backend.resilience import CircuitBreaker, LatencyTracker, backoff_delay
+    breaker = CircuitBreaker()
+    if breaker.allow():
+        ...
+        breaker.record(ok)
+    await asyncio.sleep(backoff_delay(attempt))
+"""
+
+import logging
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_SECONDS = float(os.environ.get("NSE_RETRY_BASE_SECONDS", "1"))
+RETRY_MAX_SECONDS = float(os.environ.get("NSE_RETRY_MAX_SECONDS", "8"))
+BREAKER_FAILURES = int(os.environ.get("BREAKER_FAILURES", "6"))
+BREAKER_OPEN_SECONDS = float(os.environ.get("BREAKER_OPEN_SECONDS", "60"))
+BREAKER_MAX_OPEN_SECONDS = float(os.environ.get("BREAKER_MAX_OPEN_SECONDS", "600"))
+HEDGE_ENABLED = os.environ.get("NSE_HEDGE", "0") == "1"
+HEDGE_PERCENTILE = float(os.environ.get("NSE_HEDGE_PERCENTILE", "95"))
+# Successful requests needed before the percentile is trusted for hedging
+HEDGE_MIN_SAMPLES = 20
+# Never hedge sooner than this, however fast NSE has been
+HEDGE_MIN_DELAY_SECONDS = 0.5
+
+
+def backoff_delay(attempt: int, base: float = RETRY_BASE_SECONDS, cap: float = RETRY_MAX_SECONDS,
+                  rng: random.Random = random) -> float:
+    """Seconds to wait before retry ``attempt`` (0-based): uniform in [0, min(cap, base * 2**attempt)]."""
+    return rng.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Closed → open after repeated failures → half-open single probe → closed or open again."""
+
+    def __init__(self, failures: int = BREAKER_FAILURES, open_seconds: float = BREAKER_OPEN_SECONDS,
+                 max_open_seconds: float = BREAKER_MAX_OPEN_SECONDS):
+        self.failures = failures
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.state = "closed"
+        self.failure_streak = 0
+        self.trips = 0  # consecutive trips without a success in between
+        self.opened_at = 0.0
+        self.open_until = 0.0
+        self._probing = False
+        self._stats = {"opened": 0, "rejected": 0}
+
+    def allow(self) -> bool:
+        """True if a request may go to NSE now. In half-open state only one probe at a time."""
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.time() < self.open_until:
+                self._stats["rejected"] += 1
+                return False
+            self.state = "half_open"
+            logger.info("Circuit half-open — probing NSE.")
+        if self._probing:
+            self._stats["rejected"] += 1
+            return False
+        self._probing = True
+        return True
+
+    def record(self, ok: bool) -> None:
+        """Outcome of a request that :meth:`allow` let through."""
+        self._probing = False
+        if ok:
+            if self.state != "closed":
+                logger.info("Circuit closed — NSE is answering again.")
+            self.state = "closed"
+            self.failure_streak = 0
+            self.trips = 0
+            return
+        self.failure_streak += 1
+        if self.state == "half_open" or self.failure_streak >= self.failures:
+            self._trip()
+
+    def retry_in(self) -> float:
+        """Seconds until the circuit lets a probe through (0 when closed)."""
+        return max(self.open_until - time.time(), 0.0) if self.state == "open" else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "failure_streak": self.failure_streak,
+            "retry_in_seconds": round(self.retry_in(), 1),
+            **self._stats,
+        }
+
+    def _trip(self) -> None:
+        duration = min(self.open_seconds * 2 ** self.trips, self.max_open_seconds)
+        self.trips += 1
+        self.state = "open"
+        self.opened_at = time.time()
+        self.open_until = self.opened_at + duration
+        self._stats["opened"] += 1
+        logger.warning(
+            f"Circuit open for {duration:.0f}s after {self.failure_streak} failed NSE requests."
+        )
+
+
+class LatencyTracker:
+    """Sliding window of successful request latencies, for the hedging threshold."""
+
+    def __init__(self, size: int = 200, percentile: float = HEDGE_PERCENTILE):
+        self.samples: Deque[float] = deque(maxlen=size)
+        self.percentile = percentile
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def quantile(self) -> Optional[float]:
+        """The configured percentile of recent latencies, once enough samples exist."""
+        if len(self.samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        index = min(int(len(ordered) * self.percentile / 100), len(ordered) - 1)
+        return ordered[index]
+
+    def hedge_after(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None when hedging is off or not yet calibrated."""
+        if not HEDGE_ENABLED:
+            return None
+        q = self.quantile()
+        return max(q, HEDGE_MIN_DELAY_SECONDS) if q is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        q = self.quantile()
+        return {
+            "hedging": HEDGE_ENABLED,
+            "samples": len(self.samples),
+            f"p{self.percentile:g}_ms": round(q * 1000, 1) if q is not None else None,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+        }
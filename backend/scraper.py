@@ -1,270 +1,446 @@
-from curl_cffi import requests as curl_requests
 from curl_cffi.requests.errors import RequestsError
-import pandas as pd
+import numpy as np
 import random
+import hashlib
 import logging
 import os
-from typing import Dict, Any, List, Tuple, Optional
+import time
+from typing import Callable, Dict, Any, List, Tuple, Optional
 from datetime import datetime, timedelta
 import json
 import asyncio
-from backend.telegram_notification import check_and_notify_oi_changes
-from backend.cookie_manager import CookieManager
+from backend.telegram_notification import OIAlert, TelegramDispatcher, collect_oi_alerts
+from backend.cookie_manager import CookieManager, CookieSlot
+from backend.nse_session import BASE_URL as NSE_BASE_URL, NSESession
+from backend.market_calendar import MarketCalendar
+from backend.metrics import NSE_RETRIES, SCRAPE_PHASE
+from backend.tracing import Tracer
+from backend.resilience import CircuitBreaker, LatencyTracker, backoff_delay
+from backend.oi_history import OIHistoryStore
+from backend.analytics import chain_analytics
+from backend.option_chain import OptionChain, loads, parse_option_chain
 import pytz
 
+logger = logging.getLogger(__name__)
+
+
 class WebScraper:
-    # Class variables to maintain state between refreshes
-    last_oi_data = {}
-    oi_history = {}
+    """
+    Option-chain scraper for one index. Each instance keeps its own strike
+    step, window and OI history, so several symbols can run side by side.
+    """
     SYMBOL = "NIFTY"
     STRIKES_TO_SHOW = 3  # Number of strikes above and below ATM
+    STRIKE_STEPS = {"NIFTY": 50, "BANKNIFTY": 100, "FINNIFTY": 50, "MIDCPNIFTY": 25}
     OI_CHANGE_INTERVALS_MIN = (5, 10, 15, 30, 60)
+    # Keep a little more than the longest lookback so the 60m column can fill
+    OI_HISTORY_RETENTION_MIN = max(OI_CHANGE_INTERVALS_MIN) + 5
+    OI_HISTORY_CAPACITY = int(os.environ.get("OI_HISTORY_CAPACITY", "256"))  # points per key
+    # Floor for the history key cap (two keys, CE/PE, per strike). Each cycle
+    # raises the cap to OI_HISTORY_KEY_HEADROOM × the payload's keys, and keys
+    # written in the current cycle are never evicted, so every strike of every
+    # tracked expiry keeps its history however long the chain
+    OI_HISTORY_MAX_KEYS = int(os.environ.get("OI_HISTORY_MAX_KEYS", "2048"))
+    # Room for strikes that drifted out of the chain but are still within retention
+    OI_HISTORY_KEY_HEADROOM = 1.5
+    # Expiries processed from each fetch: indexes into records.expiryDates and/or
+    # "monthly" (last expiry of the nearest expiry's month), e.g. EXPIRIES=0,monthly
+    EXPIRIES = [e.strip().lower() for e in os.environ.get("EXPIRIES", "0,monthly").split(",") if e.strip()]
+    # Decode with orjson and only materialize the ATM window (set NSE_FAST_PARSE=1).
+    # Trade-off: everything downstream then sees only the ±STRIKES_TO_SHOW window —
+    # /api/analytics (max pain, OI walls, PCR "all"), the full-chain strike index
+    # behind /api/data?window=/from=/to= and OI history for off-window strikes.
+    # Leave it off when those full-chain features matter.
+    FAST_PARSE = os.environ.get("NSE_FAST_PARSE", "0") == "1"
     IST = pytz.timezone('Asia/Kolkata')
+    CALENDAR = MarketCalendar()
+    # NSE-wide failure state, shared by every symbol's scraper
+    BREAKER = CircuitBreaker()
+    LATENCY = LatencyTracker()
     
-    # User agents to avoid blocking
-    USER_AGENTS = [
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36"
-    ]
+    def __init__(self, symbol: str = SYMBOL, strike_step: Optional[int] = None, strikes_to_show: int = STRIKES_TO_SHOW,
+                 record_points: bool = False, record_full_chain: bool = False,
+                 clock: Optional[Callable[[], datetime]] = None,
+                 alert_sink: Callable[[List[OIAlert]], None] = TelegramDispatcher.submit,
+                 alert_threshold: Optional[float] = None):
+        self.symbol = symbol.upper()
+        self.strike_step = strike_step or WebScraper.STRIKE_STEPS.get(self.symbol, 100)
+        self.strikes_to_show = strikes_to_show
+        # State maintained between refreshes
+        self.last_oi_data = {}
+        self.oi_history = OIHistoryStore(
+            capacity=WebScraper.OI_HISTORY_CAPACITY, max_keys=WebScraper.OI_HISTORY_MAX_KEYS
+        )
+        # (expiry, strike, side, epoch, oi) appended since the last take_new_points(),
+        # kept only when the caller persists them — the ATM window's strikes
+        # unless record_full_chain (the in-memory history always covers the chain)
+        self.new_points = [] if record_points else None
+        self.record_full_chain = record_full_chain
+        # Replay swaps in a simulated IST clock and its own alert collector
+        self.clock = clock
+        self.alert_sink = alert_sink
+        self.alert_threshold = alert_threshold
+        # records.timestamp of the last parsed payload (NSE's own refresh time)
+        self.last_payload_timestamp = None
+        # (records.timestamp, digest of the in-window rows) of the last processed payload
+        self.last_fingerprint = None
+        self.unchanged_cycles = 0
+        # Failed cycles since the last good one, and when that was (epoch seconds)
+        self.consecutive_failures = 0
+        self.last_success_at: Optional[float] = None
+        self.last_error: Optional[str] = None
 
-    @staticmethod
-    async def fetch_nse_data() -> Tuple[Optional[pd.DataFrame], Optional[float], Optional[datetime.date]]:
-        """Fetch option chain data from NSE with automatic cookie refresh via CookieManager."""
-        option_chain_url = "https://www.nseindia.com/option-chain"
-        # v3 API endpoint
-        api_url = f"https://www.nseindia.com/api/option-chain-v3?type=Indices&symbol={WebScraper.SYMBOL}"
+    def now(self) -> datetime:
+        """Current IST time (simulated when a clock is injected)"""
+        return self.clock() if self.clock is not None else datetime.now(WebScraper.IST)
 
-        proxy = os.environ.get("HTTP_PROXY", None)
+    def take_new_points(self) -> List[Tuple[str, float, str, float, float]]:
+        """Hand over the OI points recorded since the last call (for persistence)"""
+        if self.new_points is None:
+            return []
+        points, self.new_points = self.new_points, []
+        return points
+
+    def restore_history(self, points) -> None:
+        """Rebuild OI history and change baselines from persisted points, oldest first"""
+        for expiry_key, strike, side, ts, oi in points:
+            if float(strike).is_integer():
+                strike = int(strike)
+            self.oi_history.append((expiry_key, strike), side, ts, oi)
+            self.last_oi_data[(expiry_key, strike, "CALL" if side == "CE" else "PUT")] = int(oi)
+
+    async def fetch_nse_data(self) -> Tuple[Optional[OptionChain], Optional[float], List[str]]:
+        """
+        Fetch option chain data from NSE with automatic cookie refresh via CookieManager.
+        Returns the chain, the underlying price and records.expiryDates.
+        Retries back off exponentially with jitter; nothing is sent while the
+        shared circuit breaker is open.
+        """
+        # v3 API endpoint
+        api_url = f"{NSE_BASE_URL}/api/option-chain-v3?type=Indices&symbol={self.symbol}"
 
-        base_headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
-            "Accept": "*/*",
-            "Accept-Language": "en-US,en;q=0.7",
-            "Accept-Encoding": "gzip, deflate, br, zstd",
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Referer": option_chain_url,
-            "sec-ch-ua": '"Chromium";v="136", "Google Chrome";v="136", "Not.A/Brand";v="99"',
-            "sec-ch-ua-mobile": "?0",
-            "sec-ch-ua-platform": '"Windows"',
-            "sec-fetch-dest": "empty",
-            "sec-fetch-mode": "cors",
-            "sec-fetch-site": "same-origin",
-            "sec-gpc": "1",
-            "priority": "u=1, i",
-            "Pragma": "no-cache"
-        }
-        
         max_retries = 3
-        retry_delay = 2
         last_exception = None
+        self.last_error = None
 
         for attempt in range(max_retries):
             try:
-                client_args = {
-                    "impersonate": "chrome136",
-                    "timeout": 30.0
-                }
-                if proxy:
-                    client_args["proxies"] = {
-                        "http": proxy,
-                        "https": proxy
-                    }
-                    logging.info(f"Using proxy: {proxy}")
-
                 logging.info(f"NSE API Attempt {attempt+1}/{max_retries}")
 
-                # On retries after the first attempt, force a fresh cookie fetch
-                force_refresh = (attempt > 0)
-                cookies = await CookieManager.get_cookies(force=force_refresh)
-                if not cookies:
-                    logging.warning("CookieManager returned no cookies; skipping attempt.")
-                    await asyncio.sleep(retry_delay)
+                with SCRAPE_PHASE.time("cookie"), Tracer.span("cookie"):
+                    slot = await CookieManager.acquire()
+                if slot is None:
+                    logging.warning("No NSE session is ready; skipping attempt.")
+                    NSE_RETRIES.inc(cause="no_session")
+                    await asyncio.sleep(backoff_delay(attempt))
                     continue
 
-                api_headers = {**base_headers, "Cookie": cookies}
+                if not WebScraper.BREAKER.allow():
+                    retry_in = WebScraper.BREAKER.retry_in()
+                    logging.warning(f"Circuit open — not calling NSE for {self.symbol}.")
+                    self.last_error = (
+                        f"NSE requests paused after repeated failures; retrying in {retry_in:.0f}s"
+                        if retry_in else "NSE requests paused while a probe is in flight"
+                    )
+                    return None, None, []
 
-                async with curl_requests.AsyncSession(**client_args) as client:
-                    response = await client.get(api_url, headers=api_headers, timeout=15)
+                # Every request the breaker lets through must report back, or a
+                # half-open probe that raised would stay "in flight" for good.
+                # Report before backing off so a failed probe re-opens the circuit at once.
+                ok = False
+                backoff = False
+                try:
+                    with SCRAPE_PHASE.time("fetch"), Tracer.span("fetch", attempt=attempt + 1):
+                        slot, response = await self._get(api_url, slot)
 
                     if response.status_code != 200:
-                        logging.warning(
-                            f"NSE API Error: {response.status_code} — invalidating cookies."
-                        )
-                        CookieManager.invalidate()  # Force browser refresh on next attempt
-                        await asyncio.sleep(retry_delay)
+                        logging.warning(f"NSE API Error: {response.status_code} (session {slot.name})")
+                        NSE_RETRIES.inc(cause="non_200")
+                        last_exception = f"HTTP {response.status_code}"
+                        if response.status_code in (401, 403):
+                            # Session refused — the pool quarantines and re-warms it; start that
+                            # profile over on a clean connection in case it is a fingerprint block,
+                            # and retry straight away on the next healthiest session
+                            await NSESession.recycle(f"HTTP {response.status_code}", slot.profile)
+                            continue
+                        backoff = True
                         continue
-                    
+                
                     try:
-                        response.encoding = 'utf-8'
-                        data = response.json()
+                        with SCRAPE_PHASE.time("decode"), Tracer.span("decode", bytes=len(response.content)):
+                            if WebScraper.FAST_PARSE:
+                                data = loads(response.content)
+                            else:
+                                response.encoding = 'utf-8'
+                                data = response.json()
                     except Exception as json_error:
+                        NSE_RETRIES.inc(cause="json_error")
+                        last_exception = json_error
                         logging.error(f"JSON Parse Error: {str(json_error)} — Body: {response.text[:500] if hasattr(response, 'text') else 'N/A'}")
-                        await asyncio.sleep(retry_delay)
+                        backoff = True
                         continue
-                    
+                
                     if not data:
-                        ist_hour = datetime.now(WebScraper.IST).hour
-                        # NSE returns empty JSON when market is closed (before 9am or after 3:30pm)
-                        if ist_hour < 9 or ist_hour >= 16:
+                        # NSE returns empty JSON when market is closed (nights, weekends, holidays)
+                        if not WebScraper.CALENDAR.is_session_window(self.now()):
+                            ok = True
                             logging.info("NSE returned empty data — market is closed.")
-                            return None, None, None  # will surface as market_closed
+                            return None, None, []  # will surface as market_closed
+                        NSE_RETRIES.inc(cause="empty_body")
+                        last_exception = "empty response"
                         logging.warning("Empty JSON returned from NSE during market hours")
-                        await asyncio.sleep(retry_delay)
+                        backoff = True
                         continue
 
-                    # v3 API may return data under 'filtered' or 'records'
-                    if 'filtered' in data and data['filtered'].get('data'):
-                        rawop = pd.DataFrame(data['filtered']['data']).fillna(0)
-                    elif 'records' in data and 'data' in data.get('records', {}):
-                        rawop = pd.DataFrame(data['records']['data']).fillna(0)
-                    else:
+                    with SCRAPE_PHASE.time("parse"), Tracer.span("parse"):
+                        parsed = self.parse_payload(data)
+                    if parsed is None:
+                        NSE_RETRIES.inc(cause="unexpected_body")
+                        last_exception = "unexpected response"
                         logging.warning(
                             "Unexpected NSE response. Status=%s Body=%s",
                             response.status_code,
                             response.text[:500] if hasattr(response, 'text') else str(data)[:500]
                         )
-                        await asyncio.sleep(retry_delay)
+                        backoff = True
                         continue
-                    
-                    current_price = data['records']['underlyingValue']
-                    
-                    expiry_date = None
-                    if 'expiryDates' in data['records'] and len(data['records']['expiryDates']) > 0:
-                        expiry_str = data['records']['expiryDates'][0]
-                        try:
-                            expiry_date = datetime.strptime(expiry_str, "%d-%b-%Y").date()
-                        except ValueError:
-                            try:
-                                expiry_date = datetime.strptime(expiry_str, "%Y-%m-%d").date()
-                            except ValueError:
-                                expiry_date = None
-                    
-                    logging.info(f"Successfully fetched option chain. Current {WebScraper.SYMBOL}: {current_price}")
-                    return rawop, current_price, expiry_date
-                    
+                    ok = True
+                    rawop, current_price, expiry_dates = parsed
+                
+                    logging.info(f"Successfully fetched option chain. Current {self.symbol}: {current_price}")
+                    return rawop, current_price, expiry_dates
+                finally:
+                    WebScraper.BREAKER.record(ok)
+                    if backoff:
+                        await asyncio.sleep(backoff_delay(attempt))
+                
             except RequestsError as e:
                 last_exception = e
+                NSE_RETRIES.inc(cause="network")
                 logging.warning(f"Network error on attempt {attempt+1}: {str(e)}")
-                await asyncio.sleep(retry_delay)
+                await asyncio.sleep(backoff_delay(attempt))
                 continue
                 
             except Exception as e:
                 last_exception = e
+                NSE_RETRIES.inc(cause="error")
                 logging.error(f"Unexpected error on attempt {attempt+1}: {str(e)}")
-                await asyncio.sleep(retry_delay)
+                await asyncio.sleep(backoff_delay(attempt))
                 continue
                 
         logging.error(f"All {max_retries} attempts failed. Last error: {str(last_exception)}")
-        return None, None, None
+        self.last_error = f"Failed to fetch data from NSE ({last_exception})" if last_exception else None
+        return None, None, []
+
+    async def _get(self, api_url: str, slot: CookieSlot) -> Tuple[CookieSlot, Any]:
+        """
+        GET the API with ``slot``. With hedging on, a second request goes out on
+        another session once this one outlasts the recent latency percentile;
+        the first 200 wins and the other request is cancelled.
+        """
+        primary = asyncio.ensure_future(self._request(api_url, slot))
+        hedge_after = WebScraper.LATENCY.hedge_after()
+        if hedge_after is None:
+            return await primary
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        backup_slot = await CookieManager.acquire(exclude=slot) or slot
+        WebScraper.LATENCY.hedged += 1
+        logging.info(f"NSE request on {slot.name} slower than {hedge_after:.2f}s — hedging on {backup_slot.name}")
+        backup = asyncio.ensure_future(self._request(api_url, backup_slot))
+        pending = {primary, backup}
+        answered = []
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        continue
+                    if task.result()[1].status_code == 200:
+                        if task is backup:
+                            WebScraper.LATENCY.hedge_wins += 1
+                        return task.result()
+                    answered.append(task.result())
+        finally:
+            for task in pending:
+                task.cancel()
+        return answered[0] if answered else primary.result()
+
+    async def _request(self, api_url: str, slot: CookieSlot) -> Tuple[CookieSlot, Any]:
+        """One API request on ``slot``, reported to the session pool's health scores."""
+        started = time.perf_counter()
+        try:
+            with Tracer.span("http", session=slot.name):
+                response = await NSESession.get(api_url, profile=slot.profile, headers=slot.headers(), timeout=15)
+                Tracer.annotate(status=response.status_code)
+        except RequestsError:
+            CookieManager.report(slot, None, time.perf_counter() - started)
+            await NSESession.recycle("network error", slot.profile)
+            raise
+        latency = time.perf_counter() - started
+        CookieManager.report(slot, response.status_code, latency)
+        if response.status_code == 200:
+            WebScraper.LATENCY.add(latency)
+        return slot, response
+
+    def parse_payload(self, data: Dict[str, Any]) -> Optional[Tuple[OptionChain, float, List[str]]]:
+        """
+        Decoded option-chain-v3 body -> (chain, underlying price, records.expiryDates),
+        or None if the payload has no option rows.
+        """
+        # v3 API may return data under 'filtered' or 'records'; 'filtered'
+        # only carries the nearest expiry, so prefer 'records' for several.
+        # Same parser bench_parse measures; FAST_PARSE trims to the ATM window
+        parsed = parse_option_chain(
+            data,
+            window=self.strike_bounds if WebScraper.FAST_PARSE else None,
+            records_first=len(WebScraper.EXPIRIES) > 1,
+        )
+        if parsed is not None:
+            self.last_payload_timestamp = data['records'].get('timestamp')
+        return parsed
 
     @staticmethod
-    def get_atm_strike(current_price):
-        """Calculate the At-The-Money strike price"""
-        strike_diff = 50 if WebScraper.SYMBOL == "NIFTY" else 100
-        return round(current_price / strike_diff) * strike_diff
+    def parse_expiry(expiry_str: str) -> Optional[datetime.date]:
+        """Parse an NSE expiry string ('30-Jan-2026' or '2026-01-30')"""
+        try:
+            return datetime.strptime(expiry_str, "%d-%b-%Y").date()
+        except ValueError:
+            try:
+                return datetime.strptime(expiry_str, "%Y-%m-%d").date()
+            except ValueError:
+                return None
 
     @staticmethod
-    def process_data(rawop, current_price, expiry_date):
-        """Process option chain data and update history"""
-        current_time = datetime.now(WebScraper.IST)
+    def select_expiries(expiry_dates: List[str]) -> List[str]:
+        """Pick the configured EXPIRIES out of records.expiryDates (in EXPIRIES order, no duplicates)"""
+        selected = []
+        for spec in WebScraper.EXPIRIES:
+            expiry = None
+            if spec == "monthly" and expiry_dates:
+                # expiryDates is ascending, so the last match is the month's final expiry
+                nearest = WebScraper.parse_expiry(expiry_dates[0])
+                for candidate in expiry_dates:
+                    d = WebScraper.parse_expiry(candidate)
+                    if nearest and d and (d.year, d.month) == (nearest.year, nearest.month):
+                        expiry = candidate
+            elif spec.isdigit() and int(spec) < len(expiry_dates):
+                expiry = expiry_dates[int(spec)]
+            if expiry and expiry not in selected:
+                selected.append(expiry)
+        return selected
+
+    def get_atm_strike(self, current_price):
+        """Calculate the At-The-Money strike price"""
+        return round(current_price / self.strike_step) * self.strike_step
+
+    def strike_bounds(self, current_price) -> Tuple[float, float]:
+        """Inclusive (low, high) strikes of the window shown around ATM"""
+        atm_strike = self.get_atm_strike(current_price)
+        span = self.strikes_to_show * self.strike_step
+        return atm_strike - span, atm_strike + span
+
+    def process_data(self, rawop, current_price, expiry_date):
+        """
+        Process option chain data for one expiry and update history.
+        OI state is keyed by expiry so several expiries can share one scraper.
+
+        Every strike on the step grid is processed and tracked, and returned
+        as ``chain`` (sorted by strike) for the snapshot's strike index;
+        ``data`` is the ±strikes_to_show window around ATM that the page,
+        PCR and alerts use.
+        """
+        current_time = self.now()
+        now_ts = current_time.timestamp()
         
         if rawop is None or current_price is None:
             return None
         
+        if expiry_date and not isinstance(expiry_date, str):
+            expiry_date = expiry_date.strftime("%d-%b-%Y") if hasattr(expiry_date, 'strftime') else str(expiry_date)
+        expiry_key = expiry_date or ""
+        
         # Get ATM strike
-        atm_strike = WebScraper.get_atm_strike(current_price)
+        atm_strike = self.get_atm_strike(current_price)
         
-        # Filter strikes around ATM
-        strike_range = []
-        strike_diff = 50 if WebScraper.SYMBOL == "NIFTY" else 100
-        for i in range(-WebScraper.STRIKES_TO_SHOW, WebScraper.STRIKES_TO_SHOW + 1):
-            strike_range.append(atm_strike + (i * strike_diff))
+        # Keep the strikes on the step grid; the chain is already sorted by strike
+        strike_diff = self.strike_step
+        on_grid = np.mod(rawop.strike - atm_strike, strike_diff) == 0
+        window = rawop.take(on_grid)
         
-        filtered_data = []
+        chain_data = []
+        # The displayed window around ATM; only its points are persisted by default
+        low, high = self.strike_bounds(current_price)
         
-        for _, row in rawop.iterrows():
-            strike = row['strikePrice']
-            if strike in strike_range:
-                # Call processing
-                call_oi = 0
-                call_oi_change = 0
-                if 'CE' in row and row['CE'] != 0:
-                    ce = row['CE']
-                    if isinstance(ce, dict):
-                        call_oi = ce.get('openInterest', 0)
-                        prev_call_oi = WebScraper.last_oi_data.get((strike, "CALL"), call_oi)
-                        call_oi_change = call_oi - prev_call_oi
-                        WebScraper.last_oi_data[(strike, "CALL")] = call_oi
-                        call_key = f"{strike}_CE"
-                        if call_key not in WebScraper.oi_history:
-                            WebScraper.oi_history[call_key] = []
-                        WebScraper.oi_history[call_key].append({'timestamp': current_time, 'oi': call_oi})
-                
-                # Put processing
-                put_oi = 0
-                put_oi_change = 0
-                if 'PE' in row and row['PE'] != 0:
-                    pe = row['PE']
-                    if isinstance(pe, dict):
-                        put_oi = pe.get('openInterest', 0)
-                        prev_put_oi = WebScraper.last_oi_data.get((strike, "PUT"), put_oi)
-                        put_oi_change = put_oi - prev_put_oi
-                        WebScraper.last_oi_data[(strike, "PUT")] = put_oi
-                        put_key = f"{strike}_PE"
-                        if put_key not in WebScraper.oi_history:
-                            WebScraper.oi_history[put_key] = []
-                        WebScraper.oi_history[put_key].append({'timestamp': current_time, 'oi': put_oi})
-                
-                filtered_data.append({
-                    'strike': strike,
-                    'is_atm': strike == atm_strike,
-                    'call_oi': call_oi,
-                    'call_oi_change': call_oi_change,
-                    'put_oi': put_oi,
-                    'put_oi_change': put_oi_change
-                })
+        # Plain lists: indexing NumPy scalars per row would dominate the loop
+        columns = zip(
+            window.strike.tolist(), window.ce_present.tolist(), window.ce_oi.tolist(),
+            window.pe_present.tolist(), window.pe_oi.tolist(),
+        )
+        for strike, ce_present, ce_oi, pe_present, pe_oi in columns:
+            if strike.is_integer():
+                strike = int(strike)
+            record = self.new_points is not None and (self.record_full_chain or low <= strike <= high)
+            
+            # Call processing
+            call_oi = 0
+            call_oi_change = 0
+            if ce_present:
+                call_oi = ce_oi
+                prev_call_oi = self.last_oi_data.get((expiry_key, strike, "CALL"), call_oi)
+                call_oi_change = call_oi - prev_call_oi
+                self.last_oi_data[(expiry_key, strike, "CALL")] = call_oi
+                self.oi_history.append((expiry_key, strike), "CE", now_ts, call_oi)
+                if record:
+                    self.new_points.append((expiry_key, strike, "CE", now_ts, call_oi))
+            
+            # Put processing
+            put_oi = 0
+            put_oi_change = 0
+            if pe_present:
+                put_oi = pe_oi
+                prev_put_oi = self.last_oi_data.get((expiry_key, strike, "PUT"), put_oi)
+                put_oi_change = put_oi - prev_put_oi
+                self.last_oi_data[(expiry_key, strike, "PUT")] = put_oi
+                self.oi_history.append((expiry_key, strike), "PE", now_ts, put_oi)
+                if record:
+                    self.new_points.append((expiry_key, strike, "PE", now_ts, put_oi))
+            
+            chain_data.append({
+                'strike': strike,
+                'is_atm': strike == atm_strike,
+                'call_oi': call_oi,
+                'call_oi_change': call_oi_change,
+                'put_oi': put_oi,
+                'put_oi_change': put_oi_change
+            })
         
-        # Percentage change calculation
-        for item in filtered_data:
-            strike = item['strike']
-            call_key = f"{strike}_CE"
-            put_key = f"{strike}_PE"
-            if call_key in WebScraper.oi_history:
-                current_call_oi = item['call_oi']
-                for interval in WebScraper.OI_CHANGE_INTERVALS_MIN:
-                    past_time = current_time - timedelta(minutes=interval)
-                    past_entries = [entry for entry in WebScraper.oi_history[call_key] if entry['timestamp'] <= past_time]
-                    if past_entries:
-                        past_entry = sorted(past_entries, key=lambda x: x['timestamp'], reverse=True)[0]
-                        past_oi = past_entry['oi']
-                        if past_oi > 0:
-                            pct_change = ((current_call_oi - past_oi) / past_oi) * 100
-                            item[f'call_pct_{interval}m'] = pct_change
-            if put_key in WebScraper.oi_history:
-                current_put_oi = item['put_oi']
-                for interval in WebScraper.OI_CHANGE_INTERVALS_MIN:
-                    past_time = current_time - timedelta(minutes=interval)
-                    past_entries = [entry for entry in WebScraper.oi_history[put_key] if entry['timestamp'] <= past_time]
-                    if past_entries:
-                        past_entry = sorted(past_entries, key=lambda x: x['timestamp'], reverse=True)[0]
-                        past_oi = past_entry['oi']
-                        if past_oi > 0:
-                            pct_change = ((current_put_oi - past_oi) / past_oi) * 100
-                            item[f'put_pct_{interval}m'] = pct_change
+        # Percentage change calculation — one vectorised binary search per key
+        intervals = WebScraper.OI_CHANGE_INTERVALS_MIN
+        lookbacks = np.array([(current_time - timedelta(minutes=interval)).timestamp() for interval in intervals])
+        for item in chain_data:
+            key = (expiry_key, item['strike'])
+            for side, prefix, current_oi in (("CE", "call", item['call_oi']), ("PE", "put", item['put_oi'])):
+                past = self.oi_history.values_at_or_before(key, side, lookbacks)
+                if past is None:
+                    continue
+                for interval, past_oi in zip(intervals, past.tolist()):
+                    if past_oi > 0:  # NaN (no point that old) compares False
+                        item[f'{prefix}_pct_{interval}m'] = ((current_oi - past_oi) / past_oi) * 100
         
         # Cleanup old history
-        cutoff_time = current_time - timedelta(minutes=40)
-        for key in WebScraper.oi_history:
-            WebScraper.oi_history[key] = [entry for entry in WebScraper.oi_history[key] if entry['timestamp'] >= cutoff_time]
+        cutoff_time = current_time - timedelta(minutes=WebScraper.OI_HISTORY_RETENTION_MIN)
+        self.oi_history.prune(cutoff_time)
         
-        # Sort by strike
-        filtered_data.sort(key=lambda x: x['strike'])
+        # The displayed window, by binary search on the sorted strikes
+        lo = int(np.searchsorted(window.strike, low, "left"))
+        hi = int(np.searchsorted(window.strike, high, "right"))
+        filtered_data = chain_data[lo:hi]
         
         # PCR calculation
-        sorted_data = sorted(filtered_data, key=lambda x: x['strike'])
+        sorted_data = filtered_data
         atm_index = next((i for i, item in enumerate(sorted_data) if item['is_atm']), len(sorted_data) // 2)
         start_idx = max(0, atm_index - 3)
         end_idx = min(len(sorted_data), atm_index + 4)
@@ -277,19 +453,19 @@ class WebScraper:
         put_oi_total = int(sum(float(item['put_oi']) for item in selected_strikes))
         pcr = round(put_oi_total / call_oi_total, 2) if call_oi_total > 0 else 0
         
-        # Debug output
-        print("\n=== PCR Calculation (7 Strikes) ===")
-        print(f"Selected Strikes: {[item['strike'] for item in selected_strikes]}")
-        print(f"ATM Strike: {next((item['strike'] for item in selected_strikes if item['is_atm']), 'N/A')}")
-        print(f"Call OIs: {[item['call_oi'] for item in selected_strikes]}")
-        print(f"Put OIs: {[item['put_oi'] for item in selected_strikes]}")
-        print(f"Total Call OI: {call_oi_total}")
-        print(f"Total Put OI: {put_oi_total}")
-        print(f"PCR: {pcr}")
-        print("================================\n")
+        # Debug output (built only when backend.scraper logs at DEBUG)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                f"PCR calculation (7 strikes): strikes={[item['strike'] for item in selected_strikes]} "
+                f"atm={next((item['strike'] for item in selected_strikes if item['is_atm']), 'N/A')} "
+                f"call_oi={[item['call_oi'] for item in selected_strikes]} "
+                f"put_oi={[item['put_oi'] for item in selected_strikes]} "
+                f"total_call={call_oi_total} total_put={put_oi_total} pcr={pcr}"
+            )
         
         result = {
             'data': filtered_data,
+            'chain': chain_data,
             'current_price': float(current_price) if current_price else 0,
             'atm_strike': int(atm_strike) if atm_strike else 0,
             'timestamp': current_time.strftime("%H:%M:%S"),
@@ -297,57 +473,150 @@ class WebScraper:
             'total_call_oi': int(call_oi_total),
             'total_put_oi': int(put_oi_total)
         }
-        if expiry_date:
-            if isinstance(expiry_date, str):
-                result['expiry_date'] = expiry_date
-            else:
-                result['expiry_date'] = expiry_date.strftime("%d-%b-%Y") if hasattr(expiry_date, 'strftime') else str(expiry_date)
-        else:
-            result['expiry_date'] = None
+        result['expiry_date'] = expiry_date or None
             
         return result
 
-    @staticmethod
-    async def scrape_oi_data(url: str) -> Dict[str, Any]:
+    def fingerprint(self, rawop: OptionChain, current_price, expiry_dates: List[str]) -> Tuple[Optional[str], bytes]:
+        """NSE's records.timestamp plus a hash of the price, expiries and every numeric column in the strike window"""
+        window = rawop.between(*self.strike_bounds(current_price))
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((current_price, list(expiry_dates))).encode())
+        for name, values in window.columns.items():
+            if values.dtype != object:
+                digest.update(np.ascontiguousarray(values).tobytes())
+        return self.last_payload_timestamp, digest.digest()
+
+    def build_response(self, rawop: OptionChain, current_price, expiry_dates: List[str]) -> Dict[str, Any]:
+        """
+        Process every configured expiry of one parsed payload into the API
+        response and hand the cycle's alerts to ``alert_sink``. Shared by the
+        live scrape and replay.
+        
+        A payload identical to the last one processed (NSE refreshes less often
+        than we poll) returns ``{'status': 'unchanged'}`` without touching OI
+        state, so history gets no duplicate points and the change columns keep
+        showing the last real move.
+        """
+        started = time.perf_counter()
+        fingerprint = self.fingerprint(rawop, current_price, expiry_dates)
+        if fingerprint == self.last_fingerprint:
+            self.unchanged_cycles += 1
+            SCRAPE_PHASE.observe(time.perf_counter() - started, phase="process")
+            return {'status': 'unchanged', 'symbol': self.symbol}
+        alert_seconds = analytics_seconds = 0.0
+        self.oi_history.begin_cycle()
+        self.oi_history.max_keys = max(
+            WebScraper.OI_HISTORY_MAX_KEYS, int(2 * len(rawop) * WebScraper.OI_HISTORY_KEY_HEADROOM)
+        )
+        
+        # Process every configured expiry from the one payload. Rows without an
+        # expiry field belong to the nearest expiry, as in the filtered view.
+        selected = WebScraper.select_expiries(expiry_dates)
+        in_chain = set(rawop.expiries())
+        expiries = {}
+        analytics = {}
+        chains = {}
+        alerts = []
+        for expiry in selected or [None]:
+            if in_chain:
+                if expiry not in in_chain:
+                    continue
+                chain = rawop.for_expiry(expiry)
+            elif expiries:
+                break
+            else:
+                chain = rawop
+            with Tracer.span("process_data", expiry=expiry):
+                processed = self.process_data(chain, current_price, expiry)
+            if not processed:
+                continue
+            if processed.get('data'):
+                alert_started = time.perf_counter()
+                alerts.extend(collect_oi_alerts(
+                    processed['data'], symbol=self.symbol, expiry=processed.get('expiry_date'),
+                    threshold=self.alert_threshold,
+                ))
+                alert_seconds += time.perf_counter() - alert_started
+            chains[processed.get('expiry_date') or ""] = processed.get('chain', [])
+            analytics_started = time.perf_counter()
+            with Tracer.span("analytics", expiry=expiry, strikes=len(chain)):
+                analytics[processed.get('expiry_date') or ""] = chain_analytics(chain, current_price, self.strike_step)
+            analytics_seconds += time.perf_counter() - analytics_started
+            expiries[processed.get('expiry_date') or ""] = {
+                'oi_data': processed.get('data', []),
+                'atm_strike': int(processed.get('atm_strike', 0)),
+                'timestamp': processed.get('timestamp', self.now().strftime("%H:%M:%S")),
+                'expiry_date': processed.get('expiry_date'),
+                'pcr': float(processed.get('pcr', 0)),
+                'total_call_oi': int(processed.get('total_call_oi', 0)),
+                'total_put_oi': int(processed.get('total_put_oi', 0)),
+            }
+        
+        if not expiries:
+            return {'status': 'error', 'message': "Failed to process data"}
+        self.last_fingerprint = fingerprint
+        # One queued batch per cycle; the dispatcher sends it off the event loop
+        alert_started = time.perf_counter()
+        with Tracer.span("alerts", count=len(alerts)):
+            self.alert_sink(alerts)
+        alert_seconds += time.perf_counter() - alert_started
+        
+        # Forget change baselines for expiries no longer tracked
+        for key in [k for k in self.last_oi_data if k[0] not in expiries]:
+            del self.last_oi_data[key]
+        
+        # Top-level fields mirror the first (default) expiry for existing clients
+        primary = next(iter(expiries.values()))
+        response = {
+            'status': 'success',
+            'symbol': self.symbol,
+            **primary,
+            'current_price': float(current_price) if current_price else 0,
+            'expiry_dates': [e for e in expiries if e],
+            'expiries': expiries,
+            'analytics': analytics,
+            'chain': chains,
+            'last_updated': self.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        
+        self.log_response(response)
+        
+        SCRAPE_PHASE.observe(time.perf_counter() - started - alert_seconds - analytics_seconds, phase="process")
+        SCRAPE_PHASE.observe(alert_seconds, phase="alerts")
+        SCRAPE_PHASE.observe(analytics_seconds, phase="analytics")
+        return response
+
+    def log_response(self, response: Dict[str, Any]) -> None:
+        """Dump a cycle's full response at DEBUG; costs one level check otherwise."""
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Final response:\n{json.dumps(response, indent=2, default=str)}")
+
+    async def scrape_oi_data(self, url: str) -> Dict[str, Any]:
         """Main method to scrape OI data from NSE"""
         try:
-            rawop, current_price, expiry_date = await WebScraper.fetch_nse_data()
+            with Tracer.span("fetch_nse_data"):
+                rawop, current_price, expiry_dates = await self.fetch_nse_data()
             if rawop is None:
-                ist_hour = datetime.now(WebScraper.IST).hour
-                if ist_hour < 9 or ist_hour >= 16:
+                if not WebScraper.CALENDAR.is_session_window(self.now()):
                     return {
                         'status': 'market_closed',
                         'message': 'Market is closed. Data will refresh automatically when market opens at 9:15 AM IST.',
-                        'timestamp': datetime.now(WebScraper.IST).strftime('%Y-%m-%d %H:%M:%S')
+                        'timestamp': self.now().strftime('%Y-%m-%d %H:%M:%S')
                     }
-                return {'status': 'error', 'message': 'Failed to fetch data from NSE'}
-            
-            processed_data = WebScraper.process_data(rawop, current_price, expiry_date)
-            if processed_data and processed_data.get('data'):
-                check_and_notify_oi_changes(processed_data['data'])
-            
-            if not processed_data:
-                return {'status': 'error', 'message': "Failed to process data"}
-            
-            response = {
-                'status': 'success',
-                'oi_data': processed_data.get('data', []),
-                'current_price': float(processed_data.get('current_price', 0)),
-                'atm_strike': int(processed_data.get('atm_strike', 0)),
-                'timestamp': processed_data.get('timestamp', datetime.now(WebScraper.IST).strftime("%H:%M:%S")),
-                'expiry_date': processed_data.get('expiry_date'),
-                'pcr': float(processed_data.get('pcr', 0)),
-                'total_call_oi': int(processed_data.get('total_call_oi', 0)),
-                'total_put_oi': int(processed_data.get('total_put_oi', 0)),
-                'last_updated': datetime.now(WebScraper.IST).strftime('%Y-%m-%d %H:%M:%S')
-            }
-            
-            print("\n=== Final Response ===")
-            print(json.dumps(response, indent=2, default=str))
-            print("====================\n")
+                return self._failed(self.last_error or 'Failed to fetch data from NSE')
             
+            with Tracer.span("build_response"):
+                response = self.build_response(rawop, current_price, expiry_dates)
+            if response.get('status') in ('success', 'unchanged'):
+                self.consecutive_failures = 0
+                self.last_success_at = time.time()
             return response
         
         except Exception as e:
             logging.exception("Error in scrape_oi_data")
-            return {'status': 'error', 'message': f"Failed to fetch OI data: {str(e)}"}
+            return self._failed(f"Failed to fetch OI data: {str(e)}")
+
+    def _failed(self, message: str) -> Dict[str, Any]:
+        self.consecutive_failures += 1
+        return {'status': 'error', 'message': message}
@@ -0,0 +1,268 @@
+"""
+Shared Snapshots (multi-worker mode)
+------------------------------------
+Lets several uvicorn/gunicorn workers serve the same data while only one of
+them talks to NSE.
+
+Workers race for an exclusive ``flock`` on ``<dir>/leader.lock``. The winner
+runs the background scraper and, after every publish, writes the snapshot —
+its data plus every pre-encoded view, analytics body and rendered page
+(identity/gzip/br) — to ``<dir>/<SYMBOL>.snap`` via write-and-rename, then
+bumps that symbol's sequence number in the memory-mapped ``<dir>/sequence``
+file. The other workers poll the sequence numbers (a memory read, no
+syscall) and, when one moves, map the new segment read-only and serve its
+bodies as ``memoryview`` slices, so nothing is re-encoded or copied per worker. A renamed-over segment
+stays mapped until the last response using it is gone.
+
+The lock dies with the leader process; followers retry it periodically and the
+first to get it takes over scraping.
+
+Enabled by ``SHARED_SNAPSHOT_DIR`` (e.g. ``/dev/shm/premiumeater``).
+
+Usage:
+    from backend.shared_snapshot import SharedSnapshots
+    if SharedSnapshots.configure(directory, symbols) and not SharedSnapshots.try_lead():
+        for snapshot in SharedSnapshots.poll():
+            store.ingest(snapshot)
+    SharedSnapshots.publish(snapshot)   # leader, after each scrape
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows — always single worker there
+    fcntl = None
+
+from backend.option_chain import loads
+from backend.snapshot import EncodedBody, Snapshot, dumps
+
+logger = logging.getLogger(__name__)
+
+SHARED_SNAPSHOT_DIR = os.environ.get("SHARED_SNAPSHOT_DIR", "")
+MAGIC = b"PESNAP1\0"
+MAX_SYMBOLS = 64
+_SEQ = struct.Struct("<Q")
+_HEADER_LEN = struct.Struct("<I")
+
+
+def _encode_segment(snapshot: Snapshot) -> bytes:
+    """Snapshot -> MAGIC | header length | JSON header | blobs (offsets relative to the blob area)."""
+    blobs: List[bytes] = []
+    offset = 0
+
+    def add(blob: Optional[bytes]) -> Optional[List[int]]:
+        nonlocal offset
+        if blob is None:
+            return None
+        blobs.append(blob)
+        span = [offset, len(blob)]
+        offset += len(blob)
+        return span
+
+    header = {
+        "symbol": snapshot.symbol,
+        "version": snapshot.version,
+        "boot": snapshot.boot,
+        "created_at": snapshot.created_at,
+        "data": add(dumps(snapshot.data)),
+        "views": [
+            [expiry, body.etag, add(body.identity), add(body.gzip), add(body.br)]
+            for expiry, body in snapshot.views()
+        ],
+        "analytics": [
+            [expiry, body.etag, add(body.identity), add(body.gzip), add(body.br)]
+            for expiry, body in snapshot.analytics_bodies()
+        ],
+        "pages": [
+            [expiry, body.etag, add(body.identity), add(body.gzip), add(body.br)]
+            for expiry, body in snapshot.pages()
+        ],
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    return b"".join([MAGIC, _HEADER_LEN.pack(len(header_bytes)), header_bytes, *blobs])
+
+
+def _decode_segment(buf: mmap.mmap) -> Snapshot:
+    """Map a segment back to a Snapshot whose bodies are zero-copy slices of ``buf``."""
+    if buf[:len(MAGIC)] != MAGIC:
+        raise ValueError("bad segment magic")
+    (header_len,) = _HEADER_LEN.unpack_from(buf, len(MAGIC))
+    start = len(MAGIC) + _HEADER_LEN.size
+    header = json.loads(buf[start:start + header_len])
+    view = memoryview(buf)[start + header_len:]
+
+    def part(span: Optional[List[int]]):
+        return view[span[0]:span[0] + span[1]] if span else None
+
+    def bodies(entries: List[List[Any]]) -> Dict[Optional[str], EncodedBody]:
+        return {
+            expiry: EncodedBody.from_encoded(part(identity), part(gz), part(br), etag)
+            for expiry, etag, identity, gz, br in entries
+        }
+
+    return Snapshot(
+        header["symbol"], header["version"], loads(bytes(part(header["data"]))), bodies(header["views"]),
+        boot=header["boot"], created_at=header["created_at"], pages=bodies(header.get("pages", [])),
+        analytics=bodies(header.get("analytics", [])),
+    )
+
+
+class SharedSnapshots:
+    """Process-wide singleton: leader lock, sequence map and segment files."""
+
+    _dir: Optional[str] = None
+    _symbols: List[str] = []
+    _lock_file = None
+    _seq_file = None
+    _seq: Optional[mmap.mmap] = None
+    _seen: Dict[str, int] = {}
+    _stats: Dict[str, Any] = {"published": 0, "loaded": 0, "load_errors": 0, "promotions": 0}
+
+    @classmethod
+    def configure(cls, directory: str = SHARED_SNAPSHOT_DIR, symbols: Optional[List[str]] = None) -> bool:
+        """Set up the shared directory. False (single-worker mode) if disabled or unsupported."""
+        if not directory or fcntl is None:
+            return False
+        symbols = list(symbols or [])
+        if len(symbols) > MAX_SYMBOLS:
+            raise ValueError(f"At most {MAX_SYMBOLS} symbols can be shared")
+        os.makedirs(directory, exist_ok=True)
+        seq_path = os.path.join(directory, "sequence")
+        fd = os.open(seq_path, os.O_RDWR | os.O_CREAT, 0o644)
+        if os.fstat(fd).st_size < MAX_SYMBOLS * _SEQ.size:
+            os.ftruncate(fd, MAX_SYMBOLS * _SEQ.size)
+        cls._seq_file = fd
+        cls._seq = mmap.mmap(fd, MAX_SYMBOLS * _SEQ.size)
+        cls._dir = directory
+        cls._symbols = symbols
+        cls._seen = {symbol: 0 for symbol in symbols}
+        return True
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return cls._dir is not None
+
+    @classmethod
+    def is_leader(cls) -> bool:
+        return cls._lock_file is not None
+
+    @classmethod
+    def is_follower(cls) -> bool:
+        return cls.enabled() and not cls.is_leader()
+
+    @classmethod
+    def try_lead(cls) -> bool:
+        """Take the scraper-leader lock if nobody holds it. Never blocks."""
+        if cls._lock_file is not None:
+            return True
+        lock_file = open(os.path.join(cls._dir, "leader.lock"), "a+")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        cls._lock_file = lock_file
+        cls._stats["promotions"] += 1
+        logger.info(f"Worker {os.getpid()} is the scraper leader.")
+        return True
+
+    # ── Leader side ───────────────────────────────────────────────────────────
+
+    @classmethod
+    def publish(cls, snapshot: Snapshot) -> None:
+        """Write ``snapshot`` to its segment and bump the symbol's sequence number."""
+        if not cls.is_leader() or snapshot.symbol not in cls._symbols:
+            return
+        path = cls._segment_path(snapshot.symbol)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_encode_segment(snapshot))
+        os.replace(tmp, path)
+        slot = cls._symbols.index(snapshot.symbol) * _SEQ.size
+        (seq,) = _SEQ.unpack_from(cls._seq, slot)
+        _SEQ.pack_into(cls._seq, slot, seq + 1)
+        cls._seen[snapshot.symbol] = seq + 1
+        cls._stats["published"] += 1
+
+    @classmethod
+    def take_cookies(cls) -> Optional[str]:
+        """Cookies a follower received via /api/set-cookies, if any (consumed)."""
+        if not cls.is_leader():
+            return None
+        path = os.path.join(cls._dir, "cookies")
+        try:
+            with open(path) as f:
+                cookies = f.read().strip()
+            os.remove(path)
+        except FileNotFoundError:
+            return None
+        return cookies or None
+
+    # ── Follower side ─────────────────────────────────────────────────────────
+
+    @classmethod
+    def poll(cls) -> List[Snapshot]:
+        """Snapshots the leader published since the last poll, mapped from their segments."""
+        fresh = []
+        for i, symbol in enumerate(cls._symbols):
+            (seq,) = _SEQ.unpack_from(cls._seq, i * _SEQ.size)
+            if seq == cls._seen.get(symbol):
+                continue
+            try:
+                with open(cls._segment_path(symbol), "rb") as f:
+                    buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                snapshot = _decode_segment(buf)
+                if snapshot.symbol != symbol:
+                    raise ValueError(f"segment holds {snapshot.symbol}")
+            except (OSError, ValueError) as e:
+                cls._stats["load_errors"] += 1
+                logger.warning(f"Could not load shared snapshot for {symbol}: {e}")
+                continue
+            cls._seen[symbol] = seq
+            cls._stats["loaded"] += 1
+            fresh.append(snapshot)
+        return fresh
+
+    @classmethod
+    def post_cookies(cls, cookies: str) -> None:
+        """Hand cookies received by a follower to the leader's next cycle."""
+        path = os.path.join(cls._dir, "cookies")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(cookies)
+        os.replace(tmp, path)
+
+    # ── Misc ──────────────────────────────────────────────────────────────────
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        if not cls.enabled():
+            return {"enabled": False}
+        return {
+            "enabled": True,
+            "role": "leader" if cls.is_leader() else "follower",
+            "pid": os.getpid(),
+            "sequence": dict(cls._seen),
+            **cls._stats,
+        }
+
+    @classmethod
+    def close(cls) -> None:
+        """Release the leader lock (if held) so another worker can take over."""
+        if cls._lock_file is not None:
+            cls._lock_file.close()
+            cls._lock_file = None
+
+    @classmethod
+    def _segment_path(cls, symbol: str) -> str:
+        return os.path.join(cls._dir, f"{symbol}.snap")
@@ -0,0 +1,402 @@
+"""
+Pre-encoded Snapshots
+---------------------
+The background scraper turns every scrape result into an immutable
+``Snapshot``: a version number plus, for each expiry view, the JSON body
+already encoded and compressed (gzip, and brotli when installed). Request
+handlers just pick the right bytes, so serving ``/api/data`` costs a dict
+lookup no matter how many dashboards are polling, and pollers that already
+hold the current version get a 304 via ``ETag`` / ``If-None-Match``.
+
+``SnapshotStore`` also keeps the last few snapshots per symbol so a poller
+that sends the version it already has gets a delta of only the changed strike
+rows and scalar fields, encoded once and shared by every client on that base.
+
+Full-chain analytics (``data["analytics"]``, per expiry) are kept out of the
+views and encoded as their own bodies, served by ``/api/analytics``.
+
+Every processed strike (``data["chain"]``, per expiry) is kept too, behind a
+sorted NumPy ``StrikeIndex``: a ``?window=N`` or ``?from=&to=`` request is two
+binary searches, and each distinct slice is encoded once per snapshot.
+
+With a page renderer set, each snapshot also carries its rendered HTML page
+per expiry view (compressed the same way), built before the snapshot becomes
+current — page loads never run the template.
+
+Usage:
+    from backend.snapshot import SnapshotStore
+    store = SnapshotStore(["NIFTY"])
+    snap = store.publish("NIFTY", result)
+    body = snap.view(expiry)          # EncodedBody or None
+    stats = snap.analytics(expiry)    # EncodedBody or None
+    body = snap.strike_slice(expiry, *snap.strike_index(expiry).around_atm(10))
+    store.set_renderer(render_page)   # (snapshot, expiry) -> HTML bytes
+    page = store.page("NIFTY", expiry)
+    body = store.delta("NIFTY", since, expiry) or body
+    payload, encoding = body.negotiate(request.headers.get("accept-encoding"))
+"""
+
+import gzip
+import json
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import brotli
+except ImportError:  # optional — gzip only
+    brotli = None
+
+try:
+    import orjson
+except ImportError:  # optional — fall back to the stdlib encoder
+    orjson = None
+
+# Distinguishes ETags across restarts, when versions start again at 0
+BOOT_ID = format(int(time.time() * 1000) ^ os.getpid(), "x")
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 512
+
+# Snapshots kept per symbol as delta bases (30s cycles -> ~10 minutes)
+DELTA_HISTORY = int(os.environ.get("DELTA_HISTORY", "20"))
+
+# Encoded strike slices kept per snapshot (least recently used dropped first)
+SLICE_CACHE_SIZE = int(os.environ.get("SLICE_CACHE_SIZE", "64"))
+
+# Per-expiry parts of a scrape result that are served separately, never in views
+_SIDE_KEYS = ("expiries", "analytics", "chain")
+
+
+def dumps(payload: Any) -> bytes:
+    """Compact JSON bytes, via orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(payload, default=str)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def expiry_view(data: Dict[str, Any], expiry: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Flatten a scrape result to one expiry. Top-level fields describe that
+    expiry; the per-expiry breakdown and analytics are dropped. None if not tracked.
+    """
+    view = {k: v for k, v in data.items() if k not in _SIDE_KEYS}
+    if expiry is None:
+        return view
+    expiries = data.get("expiries") or {}
+    if expiry not in expiries:
+        return None
+    view.update(expiries[expiry])
+    return view
+
+
+class EncodedBody:
+    """One JSON body in every encoding we serve, plus its ETag."""
+
+    __slots__ = ("identity", "gzip", "br", "etag")
+
+    def __init__(self, payload: Dict[str, Any], etag: str):
+        self._encode(dumps(payload), etag)
+
+    @classmethod
+    def of_bytes(cls, identity: bytes, etag: str) -> "EncodedBody":
+        """Compress a body that is already serialised (e.g. a rendered page)."""
+        body = cls.__new__(cls)
+        body._encode(identity, etag)
+        return body
+
+    def _encode(self, identity: bytes, etag: str) -> None:
+        self.identity = identity
+        self.etag = etag
+        self.gzip = self.br = None
+        if len(identity) >= MIN_COMPRESS_BYTES:
+            self.gzip = gzip.compress(identity, compresslevel=6)
+            if brotli is not None:
+                self.br = brotli.compress(identity, quality=5)
+
+    @classmethod
+    def from_encoded(cls, identity: bytes, gzip_body: Optional[bytes], br_body: Optional[bytes], etag: str) -> "EncodedBody":
+        """Wrap bodies encoded elsewhere (e.g. buffers in a shared segment) without re-encoding."""
+        body = cls.__new__(cls)
+        body.identity, body.gzip, body.br, body.etag = identity, gzip_body, br_body, etag
+        return body
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """(body, Content-Encoding) for a request's Accept-Encoding header."""
+        accept = (accept_encoding or "").lower()
+        if self.br is not None and "br" in accept:
+            return self.br, "br"
+        if self.gzip is not None and "gzip" in accept:
+            return self.gzip, "gzip"
+        return self.identity, None
+
+
+class StrikeIndex:
+    """Every processed strike of one expiry, sorted, over the rows that describe them."""
+
+    __slots__ = ("strikes", "rows", "atm")
+
+    def __init__(self, rows: List[Dict[str, Any]], atm: float):
+        self.rows = rows
+        self.strikes = np.fromiter((row["strike"] for row in rows), dtype=np.float64, count=len(rows))
+        self.atm = atm
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def around_atm(self, n: int) -> Tuple[int, int]:
+        """Row range of ``n`` strikes either side of ATM (plus ATM itself when listed)."""
+        i = int(self.strikes.searchsorted(self.atm, "left"))
+        exact = i < len(self.rows) and self.strikes[i] == self.atm
+        return max(i - n, 0), min(i + n + (1 if exact else 0), len(self.rows))
+
+    def between(self, low: Optional[float], high: Optional[float]) -> Tuple[int, int]:
+        """Row range of strikes with ``low <= strike <= high`` (open-ended when None)."""
+        lo = int(self.strikes.searchsorted(low, "left")) if low is not None else 0
+        hi = int(self.strikes.searchsorted(high, "right")) if high is not None else len(self.rows)
+        return lo, max(hi, lo)
+
+
+class Snapshot:
+    """
+    Immutable result of one scrape for one symbol.
+
+    Attributes:
+        symbol: Index the snapshot belongs to.
+        version: Monotonically increasing per symbol within one ``boot``.
+        data: The scrape result dict (treat as read-only).
+        boot: BOOT_ID of the process that built it (the scraper leader when
+            snapshots are shared between workers).
+        created_at: Epoch seconds when the snapshot was built.
+    """
+
+    __slots__ = ("symbol", "version", "data", "boot", "created_at", "_views", "_analytics", "_pages", "_deltas",
+                 "_indexes", "_slices")
+
+    def __init__(self, symbol: str, version: int, data: Dict[str, Any], views: Dict[Optional[str], EncodedBody],
+                 boot: str = BOOT_ID, created_at: Optional[float] = None,
+                 pages: Optional[Dict[Optional[str], EncodedBody]] = None,
+                 analytics: Optional[Dict[Optional[str], EncodedBody]] = None):
+        self.symbol = symbol
+        self.version = version
+        self.data = data
+        self.boot = boot
+        self.created_at = created_at if created_at is not None else time.time()
+        self._views = views
+        self._analytics = analytics or {}
+        self._pages = pages or {}
+        self._deltas: Dict[Tuple[int, Optional[str]], EncodedBody] = {}
+        self._indexes: Dict[Optional[str], Optional[StrikeIndex]] = {}
+        self._slices: "OrderedDict[Tuple[Optional[str], int, int], EncodedBody]" = OrderedDict()
+
+    @classmethod
+    def build(cls, symbol: str, version: int, data: Dict[str, Any]) -> "Snapshot":
+        """Encode the default view, every tracked expiry view and their analytics up front."""
+        views: Dict[Optional[str], EncodedBody] = {}
+        analytics: Dict[Optional[str], EncodedBody] = {}
+        per_expiry = data.get("analytics") or {}
+        for expiry in [None, *(data.get("expiries") or {})]:
+            view = expiry_view(data, expiry)
+            view["version"] = version
+            view["boot"] = BOOT_ID
+            views[expiry] = EncodedBody(view, f'W/"{BOOT_ID}-{symbol}-{version}-{expiry or "default"}"')
+            stats = per_expiry.get(view.get("expiry_date") or "")
+            if stats is not None:
+                analytics[expiry] = EncodedBody({
+                    "symbol": symbol,
+                    "expiry_date": view.get("expiry_date"),
+                    "version": version,
+                    "boot": BOOT_ID,
+                    "last_updated": view.get("last_updated"),
+                    **({"stale": view["stale"]} if view.get("stale") else {}),
+                    **stats,
+                }, f'W/"{BOOT_ID}-{symbol}-{version}-{expiry or "default"}-analytics"')
+        return cls(symbol, version, data, views, analytics=analytics)
+
+    @classmethod
+    def empty(cls, symbol: str) -> "Snapshot":
+        """Version-0 placeholder served before the first scrape completes."""
+        return cls.build(symbol, 0, {})
+
+    @property
+    def expiries(self) -> Tuple[str, ...]:
+        return tuple(e for e in self._views if e is not None)
+
+    def resolve_expiry(self, expiry: Optional[str]) -> Optional[str]:
+        """Case-insensitive match of a query value to a tracked expiry key."""
+        if not expiry:
+            return None
+        return next((e for e in self.expiries if e.lower() == expiry.lower()), None)
+
+    def view(self, expiry: Optional[str] = None) -> Optional[EncodedBody]:
+        """Pre-encoded body for ``expiry`` (None = default view)."""
+        return self._views.get(expiry)
+
+    def views(self) -> List[Tuple[Optional[str], EncodedBody]]:
+        return list(self._views.items())
+
+    def analytics(self, expiry: Optional[str] = None) -> Optional[EncodedBody]:
+        """Pre-encoded full-chain analytics for ``expiry`` (None = default view), if computed."""
+        return self._analytics.get(expiry)
+
+    def analytics_bodies(self) -> List[Tuple[Optional[str], EncodedBody]]:
+        return list(self._analytics.items())
+
+    def strike_index(self, expiry: Optional[str] = None) -> Optional[StrikeIndex]:
+        """Full-chain strike index for an expiry view (built on first use), or None without chain data."""
+        if expiry in self._indexes:
+            return self._indexes[expiry]
+        index = None
+        view = expiry_view(self.data, expiry)
+        if view is not None:
+            rows = (self.data.get("chain") or {}).get(view.get("expiry_date") or "")
+            if rows is not None:
+                index = StrikeIndex(rows, view.get("atm_strike", 0))
+        self._indexes[expiry] = index
+        return index
+
+    def strike_slice(self, expiry: Optional[str], lo: int, hi: int) -> Optional[EncodedBody]:
+        """
+        The expiry view with ``oi_data`` replaced by index rows ``lo:hi``,
+        encoded once per (expiry, range) and kept in a small LRU.
+        """
+        key = (expiry, lo, hi)
+        cached = self._slices.get(key)
+        if cached is not None:
+            self._slices.move_to_end(key)
+            return cached
+        index = self.strike_index(expiry)
+        if index is None:
+            return None
+        rows = index.rows[lo:hi]
+        view = expiry_view(self.data, expiry)
+        view.update({
+            "oi_data": rows,
+            "window": {
+                "from": rows[0]["strike"] if rows else None,
+                "to": rows[-1]["strike"] if rows else None,
+                "strikes": len(rows),
+                "available": len(index),
+            },
+            "version": self.version,
+            "boot": self.boot,
+        })
+        tag = f"{rows[0]['strike']}-{rows[-1]['strike']}" if rows else "none"
+        body = EncodedBody(view, f'W/"{self.boot}-{self.symbol}-{self.version}-{expiry or "default"}-{tag}"')
+        self._slices[key] = body
+        while len(self._slices) > SLICE_CACHE_SIZE:
+            self._slices.popitem(last=False)
+        return body
+
+    def page(self, expiry: Optional[str] = None) -> Optional[EncodedBody]:
+        """Pre-rendered HTML page for ``expiry``, if one was rendered."""
+        return self._pages.get(expiry)
+
+    def pages(self) -> List[Tuple[Optional[str], EncodedBody]]:
+        return list(self._pages.items())
+
+    def page_etag(self, expiry: Optional[str]) -> str:
+        return f'W/"{self.boot}-{self.symbol}-{self.version}-{expiry or "default"}-html"'
+
+
+def diff_views(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Changes between two flattened views: top-level fields whose value differs
+    (fields that disappeared come through as None), ``oi_data`` rows (keyed by
+    strike) that are new or changed, and strikes that disappeared.
+    """
+    changed = {
+        k: v for k, v in new.items()
+        if k not in ("oi_data", "version") and old.get(k) != v
+    }
+    changed.update((k, None) for k in old if k not in new and k not in ("oi_data", "version"))
+    old_rows = {row.get("strike"): row for row in old.get("oi_data") or []}
+    new_rows = new.get("oi_data") or []
+    rows = [row for row in new_rows if old_rows.get(row.get("strike")) != row]
+    new_strikes = {row.get("strike") for row in new_rows}
+    removed = [strike for strike in old_rows if strike not in new_strikes]
+    return {"changed": changed, "rows": rows, "removed": removed}
+
+
+PageRenderer = Callable[[Snapshot, Optional[str]], bytes]
+
+
+class SnapshotStore:
+    """Current snapshot per symbol plus a short history used as delta bases."""
+
+    def __init__(self, symbols: Iterable[str], keep: int = DELTA_HISTORY):
+        self._history: Dict[str, Deque[Snapshot]] = {
+            symbol: deque([Snapshot.empty(symbol)], maxlen=max(keep, 1)) for symbol in symbols
+        }
+        self._render: Optional[PageRenderer] = None
+
+    def set_renderer(self, render: PageRenderer) -> None:
+        """Render ``render(snapshot, expiry)`` for every view of each snapshot published from now on."""
+        self._render = render
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._history
+
+    def items(self) -> List[Tuple[str, Snapshot]]:
+        return [(symbol, history[-1]) for symbol, history in self._history.items()]
+
+    def current(self, symbol: str) -> Snapshot:
+        return self._history[symbol][-1]
+
+    def publish(self, symbol: str, data: Dict[str, Any]) -> Snapshot:
+        """Encode ``data`` as the symbol's next version and make it current."""
+        history = self._history[symbol]
+        snapshot = Snapshot.build(symbol, history[-1].version + 1, data)
+        if self._render is not None:
+            for expiry in [None, *snapshot.expiries]:
+                snapshot._pages[expiry] = EncodedBody.of_bytes(self._render(snapshot, expiry), snapshot.page_etag(expiry))
+        history.append(snapshot)
+        return snapshot
+
+    def page(self, symbol: str, expiry: Optional[str] = None) -> Optional[EncodedBody]:
+        """
+        The current snapshot's rendered page for ``expiry``. Pages missing
+        from it (the startup placeholder, a leader without a renderer) are
+        rendered on first request and kept with the snapshot.
+        """
+        snapshot = self._history[symbol][-1]
+        page = snapshot.page(expiry)
+        if page is None and self._render is not None:
+            page = EncodedBody.of_bytes(self._render(snapshot, expiry), snapshot.page_etag(expiry))
+            snapshot._pages[expiry] = page
+        return page
+
+    def ingest(self, snapshot: Snapshot) -> None:
+        """Make a snapshot built by another process (the scraper leader) current."""
+        self._history[snapshot.symbol].append(snapshot)
+
+    def delta(self, symbol: str, since: int, expiry: Optional[str] = None) -> Optional[EncodedBody]:
+        """
+        Pre-encoded delta from version ``since`` to the current snapshot, or
+        None when ``since`` is no longer (or never was) in the history — the
+        caller then serves the full view.
+        """
+        history = self._history[symbol]
+        current = history[-1]
+        cached = current._deltas.get((since, expiry))
+        if cached is not None:
+            return cached
+        base = next((snap for snap in history if snap.version == since and snap.boot == current.boot), None)
+        if base is None or current.view(expiry) is None:
+            return None
+        old = expiry_view(base.data, expiry)
+        if old is None:
+            return None
+        payload = {
+            "delta": True,
+            "since": since,
+            "version": current.version,
+            "boot": current.boot,
+            **diff_views(old, expiry_view(current.data, expiry)),
+        }
+        body = EncodedBody(payload, f'W/"{current.boot}-{symbol}-{since}-{current.version}-{expiry or "default"}"')
+        current._deltas[(since, expiry)] = body
+        return body
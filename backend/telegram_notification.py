@@ -1,47 +1,301 @@
-import requests
-import os
+"""
+Telegram OI Alerts
+------------------
+Turns large OI percentage changes into Telegram alerts without ever blocking
+the event loop.
+
+The scraper hands each cycle's alerts to ``TelegramDispatcher.submit``, which
+only appends to a bounded queue. A single background worker drains the queue,
+coalesces everything that arrived in the same cycle (all strikes, expiries and
+symbols) into one message, drops (strike, interval) pairs that already alerted
+within the cooldown, and posts through one pooled ``httpx.AsyncClient``,
+honouring Telegram's ``429 retry_after``.
+
+Usage:
+    from backend.telegram_notification import TelegramDispatcher, collect_oi_alerts
+    await TelegramDispatcher.start()
+    TelegramDispatcher.submit(collect_oi_alerts(rows, symbol="NIFTY", expiry=expiry))
+    await TelegramDispatcher.close()
+"""
+
+import asyncio
 import logging
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
 from dotenv import load_dotenv
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "YOUR_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID", "YOUR_CHAT_ID")
 
-def send_telegram_message(message: str):
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    payload = {
-        "chat_id": TELEGRAM_CHAT_ID,
-        "text": message,
-        "parse_mode": "HTML"
-    }
-    try:
-        response = requests.post(url, json=payload, timeout=10)
-        response.raise_for_status()
-    except Exception as e:
-        print(f"Failed to send Telegram message: {e}")
+ALERT_THRESHOLD_PCT = float(os.environ.get("ALERT_THRESHOLD_PCT", "30"))
+# Same (strike, interval) is not re-alerted within this many seconds
+ALERT_COOLDOWN_SECONDS = float(os.environ.get("ALERT_COOLDOWN_SECONDS", "300"))
+# Cycles waiting to be sent before the oldest is dropped
+ALERT_QUEUE_SIZE = int(os.environ.get("ALERT_QUEUE_SIZE", "64"))
+# How long the worker waits for the other symbols of a cycle before sending
+ALERT_BATCH_SECONDS = float(os.environ.get("ALERT_BATCH_SECONDS", "2"))
+MAX_SEND_ATTEMPTS = 3
+MAX_MESSAGE_CHARS = 4096  # Telegram's sendMessage limit
+
+
+class OIAlert(NamedTuple):
+    symbol: Optional[str]
+    expiry: Optional[str]
+    strike: Any
+    key: str  # e.g. call_pct_5m
+    value: float
+
+    @property
+    def dedup_key(self) -> Tuple:
+        return (self.symbol, self.expiry, self.strike, self.key)
 
-def check_and_notify_oi_changes(oi_data: list):
+
+def collect_oi_alerts(oi_data: list, symbol: str = None, expiry: str = None,
+                      threshold: Optional[float] = None) -> List[OIAlert]:
     """
-    Checks each row for OI percentage changes above 30% and sends a Telegram notification.
+    Every ``call_pct_*`` / ``put_pct_*`` value at or above ``threshold``
+    (default ALERT_THRESHOLD_PCT).
     Expects oi_data to be a list of dicts as returned by scraper.py's process_data()['data'].
     """
+    if threshold is None:
+        threshold = ALERT_THRESHOLD_PCT
+    alerts = []
     for row in oi_data:
         strike = row.get('strike')
-        alerts = []
         for key, value in row.items():
             if key.startswith('call_pct_') or key.startswith('put_pct_'):
                 try:
-                    if abs(float(value)) >= 30:
-                        alerts.append(f"{key}: {float(value):.2f}%")
+                    value = float(value)
                 except Exception:
                     continue
-        if alerts:
-            msg = (
-                f"⚠️ <b>OI Change Alert</b>\n"
-                f"Strike: <b>{strike}</b>\n"
-                + "\n".join(alerts)
-            )
-            send_telegram_message(msg)
+                if abs(value) >= threshold:
+                    alerts.append(OIAlert(symbol, expiry, strike, key, value))
+    return alerts
+
+
+def format_alerts(alerts: List[OIAlert]) -> List[str]:
+    """One HTML message for a batch, split on section boundaries to fit Telegram's limit."""
+    return [message for message, _ in split_alerts(alerts)]
+
+
+def split_alerts(alerts: List[OIAlert]) -> List[Tuple[str, List[OIAlert]]]:
+    """The messages of ``format_alerts``, each with the alerts it carries."""
+    sections: Dict[Tuple, Dict[Any, List[OIAlert]]] = {}
+    for alert in alerts:
+        strikes = sections.setdefault((alert.symbol, alert.expiry), {})
+        strikes.setdefault(alert.strike, []).append(alert)
+
+    blocks = []
+    for (symbol, expiry), strikes in sections.items():
+        lines = []
+        if symbol:
+            lines.append(f"Index: <b>{symbol}</b>")
+        if expiry:
+            lines.append(f"Expiry: <b>{expiry}</b>")
+        for strike, changes in strikes.items():
+            lines.append(f"Strike: <b>{strike}</b>\n" + "\n".join(f"{a.key}: {a.value:.2f}%" for a in changes))
+        blocks.append(("\n".join(lines), [a for changes in strikes.values() for a in changes]))
+
+    header = "⚠️ <b>OI Change Alert</b>"
+    messages, current, carried = [], header, []
+    for block, block_alerts in blocks:
+        if len(current) + len(block) + 2 > MAX_MESSAGE_CHARS and current != header:
+            messages.append((current, carried))
+            current, carried = header, []
+        current += "\n\n" + block
+        carried.extend(block_alerts)
+    messages.append((current[:MAX_MESSAGE_CHARS], carried))
+    return messages
+
+
+class TelegramDispatcher:
+    """
+    Process-wide async singleton: bounded alert queue, one worker task and a
+    pooled HTTP client.
+    """
+
+    _queue: Optional[Deque[Tuple[float, List[OIAlert]]]] = None
+    _wakeup: Optional[asyncio.Event] = None
+    _worker: Optional[asyncio.Task] = None
+    _client: Optional[httpx.AsyncClient] = None
+    _last_sent: Dict[Tuple, float] = {}
+    _stats: Dict[str, Any] = {
+        "enqueued_batches": 0,
+        "dropped_batches": 0,
+        "sent_messages": 0,
+        "sent_alerts": 0,
+        "suppressed_alerts": 0,
+        "failed_messages": 0,
+        "rate_limited": 0,
+        "last_latency_ms": None,
+        "max_latency_ms": None,
+    }
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return TELEGRAM_BOT_TOKEN != "YOUR_BOT_TOKEN" and TELEGRAM_CHAT_ID != "YOUR_CHAT_ID"
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+
+    @classmethod
+    async def start(cls) -> None:
+        """Create the queue, client and worker (no-op if already running)."""
+        if cls._worker is not None:
+            return
+        if not cls.enabled():
+            logger.warning("TELEGRAM_BOT_TOKEN / TELEGRAM_CHAT_ID not set — OI alerts disabled.")
+            return
+        cls._queue = deque()
+        cls._wakeup = asyncio.Event()
+        cls._client = httpx.AsyncClient(
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=2, max_keepalive_connections=1),
+        )
+        cls._worker = asyncio.create_task(cls._run())
+        logger.info("Telegram alert dispatcher started.")
+
+    @classmethod
+    async def close(cls, drain_timeout: float = 5.0) -> None:
+        """Give queued alerts a moment to go out, then stop the worker and client."""
+        if cls._worker is None:
+            return
+        deadline = time.monotonic() + drain_timeout
+        while cls._queue and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        cls._worker.cancel()
+        try:
+            await cls._worker
+        except asyncio.CancelledError:
+            pass
+        await cls._client.aclose()
+        cls._worker = cls._client = None
+        logger.info("Telegram alert dispatcher stopped.")
+
+    # ── Producer side ─────────────────────────────────────────────────────────
+
+    @classmethod
+    def submit(cls, alerts: List[OIAlert]) -> None:
+        """Queue one cycle's alerts. Never blocks; drops the oldest cycle when full."""
+        if not alerts or cls._queue is None:
+            return
+        if len(cls._queue) >= ALERT_QUEUE_SIZE:
+            cls._queue.popleft()
+            cls._stats["dropped_batches"] += 1
+        cls._queue.append((time.monotonic(), alerts))
+        cls._stats["enqueued_batches"] += 1
+        cls._wakeup.set()
+
+    # ── Worker ────────────────────────────────────────────────────────────────
+
+    @classmethod
+    async def _run(cls) -> None:
+        while True:
+            await cls._wakeup.wait()
+            # Let the other symbols of this scrape cycle land in the same message
+            await asyncio.sleep(ALERT_BATCH_SECONDS)
+            cls._wakeup.clear()
+            if not cls._queue:
+                continue
+            oldest = cls._queue[0][0]
+            batch: Dict[Tuple, OIAlert] = {}
+            while cls._queue:
+                for alert in cls._queue.popleft()[1]:
+                    batch[alert.dedup_key] = alert  # latest value wins
+            try:
+                await cls._dispatch(list(batch.values()), oldest)
+            except Exception as e:
+                logger.error(f"Telegram dispatch failed: {e}")
+
+    @classmethod
+    async def _dispatch(cls, alerts: List[OIAlert], enqueued_at: float) -> None:
+        now = time.monotonic()
+        fresh = [a for a in alerts if now - cls._last_sent.get(a.dedup_key, -ALERT_COOLDOWN_SECONDS) >= ALERT_COOLDOWN_SECONDS]
+        cls._stats["suppressed_alerts"] += len(alerts) - len(fresh)
+        if not fresh:
+            return
+        # Cooldowns start per message, so alerts in a failed message are retried next cycle
+        sent = 0
+        for message, carried in split_alerts(fresh):
+            if not await cls._send(message):
+                continue
+            sent_at = time.monotonic()
+            for alert in carried:
+                cls._last_sent[alert.dedup_key] = sent_at
+            sent += len(carried)
+        if sent:
+            cls._stats["sent_alerts"] += sent
+            latency = int((sent_at - enqueued_at) * 1000)
+            cls._stats["last_latency_ms"] = latency
+            cls._stats["max_latency_ms"] = max(latency, cls._stats["max_latency_ms"] or 0)
+        # Forget cooldowns that have expired
+        for key in [k for k, t in cls._last_sent.items() if now - t >= ALERT_COOLDOWN_SECONDS]:
+            del cls._last_sent[key]
+
+    @classmethod
+    async def _send(cls, message: str) -> bool:
+        url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+        payload = {"chat_id": TELEGRAM_CHAT_ID, "text": message, "parse_mode": "HTML"}
+        for attempt in range(1, MAX_SEND_ATTEMPTS + 1):
+            try:
+                response = await cls._client.post(url, json=payload)
+            except httpx.HTTPError as e:
+                logger.warning(f"Telegram send attempt {attempt} failed: {e}")
+                await asyncio.sleep(2 ** attempt)
+                continue
+            if response.status_code == 429:
+                cls._stats["rate_limited"] += 1
+                retry_after = _retry_after(response)
+                logger.warning(f"Telegram rate limit hit — retrying in {retry_after}s.")
+                await asyncio.sleep(retry_after)
+                continue
+            if response.status_code >= 500:
+                await asyncio.sleep(2 ** attempt)
+                continue
+            if response.is_success:
+                cls._stats["sent_messages"] += 1
+                return True
+            logger.error(f"Telegram rejected message: HTTP {response.status_code} {response.text[:200]}")
+            break
+        cls._stats["failed_messages"] += 1
+        return False
+
+    # ── Stats ─────────────────────────────────────────────────────────────────
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        """Queue depth, delivery counters and latency for /health."""
+        stats = dict(cls._stats)
+        stats["enabled"] = cls._worker is not None
+        stats["queue_depth"] = len(cls._queue) if cls._queue is not None else 0
+        stats["cooldown_keys"] = len(cls._last_sent)
+        return stats
+
+
+def _retry_after(response: httpx.Response) -> float:
+    try:
+        return float(response.json()["parameters"]["retry_after"])
+    except Exception:
+        pass
+    try:
+        return float(response.headers.get("retry-after", 5))
+    except ValueError:
+        return 5.0
+
+
+def check_and_notify_oi_changes(oi_data: list, symbol: str = None, expiry: str = None):
+    """
+    Queues an alert for every OI percentage change above the threshold.
+    symbol and expiry, when given, are included in the alert so multi-index,
+    multi-expiry deployments stay readable.
+    """
+    TelegramDispatcher.submit(collect_oi_alerts(oi_data, symbol=symbol, expiry=expiry))
 
 
 if __name__ == "__main__":
@@ -52,6 +306,11 @@ if __name__ == "__main__":
         {"strike": 5300, "call_pct_oi": 15, "put_pct_oi": 20},  # should not trigger
     ]
 
-    # Call your function with the test data
-    check_and_notify_oi_changes(test_oi_data)
+    async def _demo():
+        await TelegramDispatcher.start()
+        check_and_notify_oi_changes(test_oi_data)
+        await asyncio.sleep(ALERT_BATCH_SECONDS + 1)
+        await TelegramDispatcher.close()
+        print(TelegramDispatcher.stats())
 
+    asyncio.run(_demo())
@@ -0,0 +1,197 @@
+"""
+Scrape Tracing & Profiling
+--------------------------
+Opt-in diagnostics for slow cycles, off by default and close to free when off.
+
+``Tracer`` records nested timing spans — ``cycle`` → ``scrape`` (per symbol)
+→ ``fetch_nse_data`` / ``build_response`` → ``http``, ``decode``,
+``process_data``, ``publish``… — and keeps the last ``TRACE_RING_SIZE``
+finished root spans (whole cycles, cookie refreshes, page renders) in memory.
+Spans follow ``contextvars``, so children started in tasks spawned by
+``asyncio.gather`` land under the right parent. Enable with ``TRACE_SCRAPES=1``
+or at runtime through ``/admin/trace``.
+
+``Profiler`` is a sampling profiler for the next N scrape cycles: a thread
+samples the event-loop thread's stack every ``PROFILE_INTERVAL_SECONDS`` and
+counts collapsed stacks ("module:function;module:function count" lines), the
+input format of flamegraph.pl, speedscope and inferno.
+
+Usage:
+    from backend.tracing import Profiler, Tracer
+    with Tracer.span("decode", bytes=len(body)):
+        data = loads(body)
+    Profiler.arm(cycles=3)           # admin endpoint
+    Profiler.cycle_started(); ...; Profiler.cycle_finished()
+    folded = Profiler.folded()
+"""
+
+import contextlib
+import contextvars
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+TRACE_RING_SIZE = int(os.environ.get("TRACE_RING_SIZE", "50"))
+PROFILE_INTERVAL_SECONDS = float(os.environ.get("PROFILE_INTERVAL_SECONDS", "0.005"))
+# Deepest stack kept per sample (innermost frames win)
+PROFILE_MAX_DEPTH = 64
+
+_NOOP = contextlib.nullcontext()
+
+
+class Span:
+    __slots__ = ("name", "attrs", "start", "duration", "children")
+
+    def __init__(self, name: str, attrs: Dict[str, Any]):
+        self.name = name
+        self.attrs = attrs
+        self.start = time.time()
+        self.duration: Optional[float] = None
+        self.children: List["Span"] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            **({"attrs": self.attrs} if self.attrs else {}),
+            **({"children": [child.to_dict() for child in self.children]} if self.children else {}),
+        }
+
+
+class Tracer:
+    """Process-wide span recorder with a bounded ring of finished traces."""
+
+    enabled: bool = os.environ.get("TRACE_SCRAPES", "0") == "1"
+    _current: contextvars.ContextVar = contextvars.ContextVar("trace_span", default=None)
+    _ring: Deque[Span] = deque(maxlen=TRACE_RING_SIZE)
+
+    @classmethod
+    def span(cls, name: str, **attrs: Any):
+        """Context manager timing a span under the current one (a root span if there is none)."""
+        if not cls.enabled:
+            return _NOOP
+        return cls._span(name, attrs)
+
+    @classmethod
+    @contextlib.contextmanager
+    def _span(cls, name: str, attrs: Dict[str, Any]) -> Iterator[Span]:
+        parent = cls._current.get()
+        span = Span(name, attrs)
+        if parent is not None:
+            parent.children.append(span)
+        token = cls._current.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.duration = time.perf_counter() - started
+            cls._current.reset(token)
+            if parent is None:
+                cls._ring.append(span)
+
+    @classmethod
+    def annotate(cls, **attrs: Any) -> None:
+        """Add attributes to the current span, if tracing."""
+        span = cls._current.get() if cls.enabled else None
+        if span is not None:
+            span.attrs.update(attrs)
+
+    @classmethod
+    def set_enabled(cls, enabled: bool) -> None:
+        cls.enabled = enabled
+
+    @classmethod
+    def traces(cls, limit: int = 10, name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """The most recent finished root spans, newest first."""
+        spans = [s for s in reversed(cls._ring) if name is None or s.name == name]
+        return [s.to_dict() for s in spans[:limit]]
+
+
+class Profiler:
+    """Sampling profiler armed for a number of scrape cycles; one run at a time."""
+
+    _state: str = "idle"  # idle -> armed -> running -> done
+    _cycles_left: int = 0
+    _target: Optional[int] = None  # thread id of the event loop
+    _thread: Optional[threading.Thread] = None
+    _stop = threading.Event()
+    _active = threading.Event()  # set while a profiled cycle is running
+    _stacks: Counter = Counter()
+    _samples: int = 0
+    _started_at: Optional[float] = None
+    _duration: Optional[float] = None
+
+    @classmethod
+    def arm(cls, cycles: int) -> bool:
+        """Profile the next ``cycles`` scrape cycles. False if a run is already armed or running."""
+        if cls._state in ("armed", "running"):
+            return False
+        cls._stacks = Counter()
+        cls._samples = 0
+        cls._duration = None
+        cls._cycles_left = max(1, cycles)
+        cls._state = "armed"
+        return True
+
+    @classmethod
+    def cycle_started(cls) -> None:
+        """Start (or resume) sampling; the sleep between cycles is not sampled."""
+        if cls._state == "armed":
+            cls._state = "running"
+            cls._target = threading.get_ident()
+            cls._duration = 0.0
+            cls._stop.clear()
+            cls._thread = threading.Thread(target=cls._sample, name="profiler", daemon=True)
+            cls._thread.start()
+        if cls._state == "running":
+            cls._started_at = time.perf_counter()
+            cls._active.set()
+
+    @classmethod
+    def cycle_finished(cls) -> None:
+        if cls._state != "running":
+            return
+        cls._active.clear()
+        cls._duration += time.perf_counter() - cls._started_at
+        cls._cycles_left -= 1
+        if cls._cycles_left > 0:
+            return
+        cls._stop.set()
+        cls._thread.join()
+        cls._thread = None
+        cls._state = "done"
+
+    @classmethod
+    def status(cls) -> Dict[str, Any]:
+        return {
+            "state": cls._state,
+            "cycles_left": cls._cycles_left if cls._state in ("armed", "running") else 0,
+            "samples": cls._samples,
+            "interval_ms": PROFILE_INTERVAL_SECONDS * 1000,
+            "duration_s": round(cls._duration, 3) if cls._duration is not None else None,
+        }
+
+    @classmethod
+    def folded(cls) -> str:
+        """Collapsed stacks of the last finished run, heaviest first."""
+        return "".join(f"{stack} {count}\n" for stack, count in cls._stacks.most_common())
+
+    @classmethod
+    def _sample(cls) -> None:
+        while not cls._stop.wait(PROFILE_INTERVAL_SECONDS):
+            if not cls._active.is_set():
+                continue
+            frame = sys._current_frames().get(cls._target)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None and len(names) < PROFILE_MAX_DEPTH:
+                code = frame.f_code
+                names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+                frame = frame.f_back
+            cls._stacks[";".join(reversed(names))] += 1
+            cls._samples += 1
@@ -0,0 +1,84 @@
+"""
+Benchmark: option-chain-v3 body -> strikes around ATM.
+
+Compares the original path (``json`` decode, ``pd.DataFrame(...).fillna(0)``,
+``iterrows`` window filter) against ``parse_option_chain`` with a strike
+window, on recorded payloads or synthetic chains.
+
+Usage:
+    python -m benchmarks.bench_parse                       # synthetic 100..2000 strikes
+    python -m benchmarks.bench_parse --payloads recordings/ # recorded NSE bodies
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Callable, List, Tuple
+
+from backend.option_chain import orjson, parse_option_chain
+from backend.scraper import WebScraper
+from benchmarks.synthetic import SYMBOL, load_bodies, make_body
+
+SCRAPER = WebScraper(SYMBOL)
+
+
+def pandas_path(body: bytes):
+    import pandas as pd
+
+    data = json.loads(body)
+    rows = data["filtered"]["data"] if data.get("filtered", {}).get("data") else data["records"]["data"]
+    rawop = pd.DataFrame(rows).fillna(0)
+    low, high = SCRAPER.strike_bounds(data["records"]["underlyingValue"])
+    return [row for _, row in rawop.iterrows() if low <= row["strikePrice"] <= high]
+
+
+def fast_path(body: bytes):
+    return parse_option_chain(body, window=SCRAPER.strike_bounds)
+
+
+def measure(fn: Callable[[bytes], object], bodies: List[bytes], repeat: int) -> Tuple[float, float]:
+    """(mean ms per body, peak KiB for one pass)."""
+    fn(bodies[0])  # warm imports / caches
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for body in bodies:
+            fn(body)
+    elapsed_ms = (time.perf_counter() - start) * 1000 / (repeat * len(bodies))
+
+    tracemalloc.start()
+    for body in bodies:
+        fn(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed_ms, peak / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--payloads", help="directory of recorded option-chain-v3 *.json bodies")
+    parser.add_argument("--strikes", type=int, nargs="+", default=[100, 250, 500, 1000, 2000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.payloads:
+        cases = [(f"recorded ({args.payloads})", load_bodies(args.payloads))]
+        if not cases[0][1]:
+            parser.error(f"no *.json files in {args.payloads}")
+    else:
+        cases = [(f"{n} strikes", [make_body(n)]) for n in args.strikes]
+
+    print(f"decoder: {'orjson' if orjson is not None else 'json'}  window: ±{SCRAPER.strikes_to_show} strikes")
+    print(f"{'case':<28}{'KiB':>8}{'pandas ms':>12}{'fast ms':>10}{'speedup':>9}{'pandas peak':>13}{'fast peak':>11}")
+    for label, bodies in cases:
+        size_kib = sum(len(b) for b in bodies) / len(bodies) / 1024
+        slow_ms, slow_peak = measure(pandas_path, bodies, args.repeat)
+        fast_ms, fast_peak = measure(fast_path, bodies, args.repeat)
+        print(
+            f"{label:<28}{size_kib:>8.0f}{slow_ms:>12.2f}{fast_ms:>10.2f}"
+            f"{slow_ms / fast_ms:>8.1f}x{slow_peak:>12.0f}K{fast_peak:>10.0f}K"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Benchmark: per-cycle hot path, stage by stage.
+
+Times each stage of one scrape cycle on synthetic chains of 50–2000 strikes
+and OI history depths of 1–1000 points per key, with the Telegram send
+stubbed out:
+
+    decode     JSON body -> dict (orjson when installed)
+    parse      dict -> OptionChain (WebScraper.parse_payload)
+    process    WebScraper.process_data for one expiry; each op advances the
+               clock one history step so pruning holds every key at the
+               case's depth
+    analytics  backend.analytics.chain_analytics over the whole expiry chain
+    alerts     collect_oi_alerts + TelegramDispatcher.submit
+    debug      WebScraper.log_response, the per-cycle response dump (one
+               level check unless backend.scraper logs at DEBUG)
+
+Each case reports ns/op, peak traced memory per op and blocks still held
+after one op (tracemalloc). ``--save`` writes the results as a baseline;
+``--compare`` re-runs and exits non-zero if any case is slower than the
+baseline by more than ``--tolerance``.
+
+Usage:
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --save benchmarks/baseline.json
+    python -m benchmarks.bench_pipeline --compare benchmarks/baseline.json --tolerance 0.25
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+from backend.analytics import chain_analytics
+from backend.oi_history import OIHistoryStore
+from backend.option_chain import loads, orjson
+from backend.replay import ReplayClock
+from backend.scraper import WebScraper
+from backend.telegram_notification import TelegramDispatcher, collect_oi_alerts
+from benchmarks.synthetic import SYMBOL, make_body
+
+NOW = WebScraper.IST.localize(datetime(2026, 1, 5, 11, 0))
+MIN_BENCH_SECONDS = 0.2
+
+
+def time_op(fn: Callable[[], Any]) -> float:
+    """Mean ns per call, repeating until at least MIN_BENCH_SECONDS have elapsed."""
+    fn()
+    n = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(n):
+            fn()
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= MIN_BENCH_SECONDS * 1e9:
+            return elapsed / n
+        n = max(n * 2, int(n * MIN_BENCH_SECONDS * 1e9 / max(elapsed, 1) * 1.2))
+
+
+def memory_op(fn: Callable[[], Any]) -> Dict[str, float]:
+    """Peak KiB traced during one call and blocks it left allocated."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained = sum(max(stat.count_diff, 0) for stat in after.compare_to(before, "filename"))
+    return {"peak_kib": round((peak - base) / 1024, 1), "retained_blocks": retained}
+
+
+def prefilled_scraper(depth: int, strikes: int) -> WebScraper:
+    """
+    Scraper whose OI history holds ``depth`` points per key inside the
+    retention window, with room for every CE/PE key of a ``strikes`` chain
+    (sized as build_response would, so no case measures eviction).
+    """
+    scraper = WebScraper(SYMBOL, clock=lambda: NOW, alert_sink=lambda alerts: None)
+    scraper.oi_history = OIHistoryStore(
+        capacity=max(depth + 1, WebScraper.OI_HISTORY_CAPACITY),
+        max_keys=max(WebScraper.OI_HISTORY_MAX_KEYS, int(2 * strikes * WebScraper.OI_HISTORY_KEY_HEADROOM)),
+    )
+    return scraper
+
+
+def history_step(depth: int) -> timedelta:
+    """Point spacing at which exactly ``depth`` points per key survive the retention prune."""
+    return timedelta(minutes=WebScraper.OI_HISTORY_RETENTION_MIN) / (depth - 0.5)
+
+
+def fill_history(scraper: WebScraper, chain, price: float, expiry: str, depth: int) -> ReplayClock:
+    """Append ``depth`` points per key, one ``history_step`` apart and ending at NOW."""
+    clock = ReplayClock()
+    scraper.clock = clock
+    step = history_step(depth)
+    for i in range(depth):
+        clock.set(NOW - step * (depth - 1 - i))
+        scraper.process_data(chain, price, expiry)
+    return clock
+
+
+def steady_process(scraper: WebScraper, clock: ReplayClock, chain, price: float, expiry: str,
+                   depth: int) -> Callable[[], Any]:
+    """process_data one step later each call: one point in, the oldest pruned, depth unchanged."""
+    step = history_step(depth)
+
+    def op():
+        clock.set(clock() + step)
+        return scraper.process_data(chain, price, expiry)
+    return op
+
+
+def cases(strikes: List[int], depths: List[int]) -> Dict[str, Callable[[], Any]]:
+    ops: Dict[str, Callable[[], Any]] = {}
+    for n in strikes:
+        body = make_body(n, expiries=1)
+        data = loads(body)
+        scraper = prefilled_scraper(1, n)
+        chain, price, expiry_dates = scraper.parse_payload(data)
+        ops[f"decode/{n}"] = lambda body=body: loads(body)
+        ops[f"parse/{n}"] = lambda data=data, s=scraper: s.parse_payload(data)
+        for depth in depths:
+            s = prefilled_scraper(depth, n)
+            clock = fill_history(s, chain, price, expiry_dates[0], depth)
+            ops[f"process/{n}/h{depth}"] = steady_process(s, clock, chain, price, expiry_dates[0], depth)
+        ops[f"analytics/{n}"] = lambda c=chain, p=price, s=scraper: chain_analytics(c, p, s.strike_step)
+        response = scraper.build_response(chain, price, expiry_dates)
+        rows = response["oi_data"]
+        ops[f"alerts/{n}"] = lambda rows=rows: TelegramDispatcher.submit(collect_oi_alerts(rows, symbol=SYMBOL, expiry="x"))
+        ops[f"debug/{n}"] = lambda response=response, s=scraper: s.log_response(response)
+    return ops
+
+
+def run(strikes: List[int], depths: List[int]) -> Dict[str, Dict[str, float]]:
+    results = {}
+    ops = cases(strikes, depths)
+    for name, fn in ops.items():
+        results[name] = {"ns_op": round(time_op(fn)), **memory_op(fn)}
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--strikes", type=int, nargs="+", default=[50, 250, 1000, 2000])
+    parser.add_argument("--depths", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--save", help="write results to this baseline file")
+    parser.add_argument("--compare", help="baseline file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    results = run(args.strikes, args.depths)
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    print(f"decoder: {'orjson' if orjson is not None else 'json'}  window: ±{WebScraper.STRIKES_TO_SHOW} strikes")
+    print(f"{'case':<24}{'ns/op':>14}{'peak KiB':>10}{'retained':>10}{'vs base':>9}")
+    regressions = []
+    for name, r in results.items():
+        delta = ""
+        if name in baseline:
+            ratio = r["ns_op"] / baseline[name]["ns_op"]
+            delta = f"{(ratio - 1) * 100:+.0f}%"
+            if ratio > 1 + args.tolerance:
+                regressions.append(name)
+                delta += " !"
+        print(f"{name:<24}{r['ns_op']:>14,.0f}{r['peak_kib']:>10}{r['retained_blocks']:>10}{delta:>9}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": sys.version.split()[0],
+                "decoder": "orjson" if orjson is not None else "json",
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "results": results,
+            }, f, indent=2)
+        print(f"baseline written to {args.save}")
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than baseline by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Local NSE stand-in for offline load and failure testing.
+
+Serves the URLs the app touches — the homepage and ``/option-chain`` (which
+set session cookies), ``/api/option-chain-v3`` and the small
+``/api/option-chain-contract-info`` used to check fresh cookies (which
+require them) — from recorded payloads, or synthetic chains when none are
+given.
+Every response can be delayed and any API response can be replaced by a
+401/403, a 500, an empty ``{}`` body or truncated JSON, each with its own
+probability. Session cookies expire after ``--session-ttl`` seconds to
+exercise cookie refreshes.
+
+Faults can be changed while running via ``POST /_mock/faults`` (JSON with
+any of the fields below) and counters are at ``GET /_mock/stats``.
+
+Usage:
+    python -m benchmarks.nse_mock --port 9000 --payloads recordings/ --latency-ms 150 --forbidden 0.05
+    NSE_BASE_URL=http://127.0.0.1:9000 uvicorn main:app
+    curl -X POST localhost:9000/_mock/faults -d '{"malformed": 0.2}' -H 'Content-Type: application/json'
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+import secrets
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response
+from pydantic import BaseModel
+
+from benchmarks.synthetic import make_body
+
+UNDERLYING = {"NIFTY": 22512.35, "BANKNIFTY": 48230.6, "FINNIFTY": 23410.15, "MIDCPNIFTY": 12105.4}
+SESSION_COOKIES = ("nsit", "nseappid")
+
+
+class Faults(BaseModel):
+    """Injected behaviour. Rates are per-request probabilities (0–1)."""
+
+    latency_ms: float = 0
+    jitter_ms: float = 0
+    unauthorized: float = 0  # 401
+    forbidden: float = 0  # 403
+    server_error: float = 0  # 500
+    empty: float = 0  # 200 with {}
+    malformed: float = 0  # 200 with truncated JSON
+    session_ttl: float = 0  # seconds before issued cookies stop working (0 = never)
+
+
+class MockNSE:
+    """State shared by the mock's routes: payload sources, issued sessions, counters."""
+
+    def __init__(self, payloads: Optional[str], faults: Faults, seed: Optional[int] = None):
+        self.faults = faults
+        self.rng = random.Random(seed)
+        self.stats: Counter = Counter()
+        self.sessions: Dict[str, float] = {}  # nsit value -> issued at
+        self._bodies: Dict[str, Iterator[bytes]] = {}
+        self._recorded: List[bytes] = [p.read_bytes() for p in sorted(Path(payloads).glob("*.json"))] if payloads else []
+        self._seq = itertools.count()
+
+    def next_body(self, symbol: str) -> bytes:
+        """Next recorded payload (cycling) or a fresh synthetic chain for ``symbol``."""
+        if self._recorded:
+            if symbol not in self._bodies:
+                self._bodies[symbol] = itertools.cycle(self._recorded)
+            return next(self._bodies[symbol])
+        return make_body(120, underlying=UNDERLYING.get(symbol, 22512.35), expiries=2, seed=next(self._seq))
+
+    async def delay(self) -> None:
+        wait = self.faults.latency_ms + self.rng.uniform(0, self.faults.jitter_ms)
+        if wait > 0:
+            await asyncio.sleep(wait / 1000)
+
+    def roll(self, rate: float) -> bool:
+        return rate > 0 and self.rng.random() < rate
+
+    def session_valid(self, request: Request) -> bool:
+        if not all(request.cookies.get(name) for name in SESSION_COOKIES):
+            return False
+        issued = self.sessions.get(request.cookies["nsit"])
+        if issued is None:
+            return False
+        return not self.faults.session_ttl or time.time() - issued < self.faults.session_ttl
+
+
+def create_app(payloads: Optional[str] = None, faults: Optional[Faults] = None, seed: Optional[int] = None) -> FastAPI:
+    app = FastAPI(title="NSE mock")
+    mock = MockNSE(payloads, faults or Faults(), seed)
+    app.state.mock = mock
+
+    @app.get("/", response_class=HTMLResponse)
+    async def homepage():
+        await mock.delay()
+        mock.stats["homepage"] += 1
+        token = secrets.token_hex(16)
+        mock.sessions[token] = time.time()
+        response = HTMLResponse("<html><body>NSE mock</body></html>")
+        response.set_cookie("nsit", token, httponly=True)
+        response.set_cookie("bm_sv", secrets.token_hex(8))
+        return response
+
+    @app.get("/option-chain", response_class=HTMLResponse)
+    async def option_chain_page():
+        await mock.delay()
+        mock.stats["option_chain_page"] += 1
+        response = HTMLResponse("<html><body>Option chain</body></html>")
+        response.set_cookie("nseappid", secrets.token_hex(16), httponly=True)
+        return response
+
+    @app.get("/api/option-chain-v3")
+    async def option_chain_api(request: Request, symbol: str = "NIFTY"):
+        await mock.delay()
+        mock.stats["api_requests"] += 1
+        faults = mock.faults
+        if not mock.session_valid(request) or mock.roll(faults.unauthorized):
+            mock.stats["api_401"] += 1
+            return JSONResponse({}, status_code=401)
+        if mock.roll(faults.forbidden):
+            mock.stats["api_403"] += 1
+            return Response("Access Denied", status_code=403)
+        if mock.roll(faults.server_error):
+            mock.stats["api_500"] += 1
+            return Response("Internal Server Error", status_code=500)
+        if mock.roll(faults.empty):
+            mock.stats["api_empty"] += 1
+            return Response(b"{}", media_type="application/json")
+        body = mock.next_body(symbol.upper())
+        if mock.roll(faults.malformed):
+            mock.stats["api_malformed"] += 1
+            body = body[: len(body) // 2]
+        mock.stats["api_200"] += 1
+        return Response(body, media_type="application/json")
+
+    @app.get("/api/option-chain-contract-info")
+    async def contract_info(request: Request, symbol: str = "NIFTY"):
+        await mock.delay()
+        mock.stats["contract_info_requests"] += 1
+        if not mock.session_valid(request):
+            return JSONResponse({}, status_code=401)
+        return {"expiryDates": ["30-Oct-2026", "27-Nov-2026"], "strikePrice": []}
+
+    @app.get("/_mock/stats")
+    async def stats():
+        return {"faults": mock.faults.model_dump(), "counters": dict(mock.stats), "sessions": len(mock.sessions)}
+
+    @app.post("/_mock/faults")
+    async def set_faults(request: Request):
+        mock.faults = mock.faults.model_copy(update=await request.json())
+        return mock.faults.model_dump()
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--payloads", help="directory of recorded option-chain-v3 *.json bodies (default: synthetic)")
+    parser.add_argument("--seed", type=int, help="seed for fault injection")
+    for name, field in Faults.model_fields.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, default=field.default)
+    args = parser.parse_args()
+
+    faults = Faults(**{name: getattr(args, name) for name in Faults.model_fields})
+    uvicorn.run(create_app(args.payloads, faults, args.seed), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Synthetic option-chain-v3 payloads for benchmarks.
+
+Rows mirror the shape NSE returns (one dict per strike with nested CE/PE legs
+carrying the full set of quote fields) so decode and extraction costs are
+representative even without recorded responses.
+"""
+
+import json
+import random
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+SYMBOL = "NIFTY"
+STRIKE_STEP = 50
+
+
+def _leg(strike: float, expiry: str, underlying: float, kind: str, rng: random.Random) -> Dict[str, Any]:
+    oi = rng.randint(0, 200_000)
+    return {
+        "strikePrice": strike,
+        "expiryDate": expiry,
+        "underlying": SYMBOL,
+        "identifier": f"OPTIDX{SYMBOL}{expiry}{kind}{strike:.2f}",
+        "openInterest": oi,
+        "changeinOpenInterest": rng.randint(-5_000, 5_000),
+        "pchangeinOpenInterest": round(rng.uniform(-10, 10), 2),
+        "totalTradedVolume": rng.randint(0, 2_000_000),
+        "impliedVolatility": round(rng.uniform(8, 40), 2),
+        "lastPrice": round(rng.uniform(0.05, 900), 2),
+        "change": round(rng.uniform(-50, 50), 2),
+        "pChange": round(rng.uniform(-30, 30), 2),
+        "totalBuyQuantity": rng.randint(0, 500_000),
+        "totalSellQuantity": rng.randint(0, 500_000),
+        "bidQty": rng.randint(0, 5_000),
+        "bidprice": round(rng.uniform(0.05, 900), 2),
+        "askQty": rng.randint(0, 5_000),
+        "askPrice": round(rng.uniform(0.05, 900), 2),
+        "underlyingValue": underlying,
+    }
+
+
+def make_payload(
+    n_strikes: int,
+    underlying: float = 22512.35,
+    expiries: int = 1,
+    seed: Optional[int] = 0,
+    timestamp: str = "05-Jan-2026 10:15:00",
+) -> Dict[str, Any]:
+    """Option-chain-v3 style payload with ``n_strikes`` strikes centred on ``underlying``."""
+    rng = random.Random(seed)
+    atm = round(underlying / STRIKE_STEP) * STRIKE_STEP
+    first = atm - (n_strikes // 2) * STRIKE_STEP
+    start = date(2026, 1, 1)
+    expiry_dates = [(start + timedelta(days=7 * i)).strftime("%d-%b-%Y") for i in range(max(expiries, 1))]
+
+    rows: List[Dict[str, Any]] = []
+    for expiry in expiry_dates:
+        for i in range(n_strikes):
+            strike = float(first + i * STRIKE_STEP)
+            rows.append({
+                "strikePrice": strike,
+                "expiryDates": expiry,
+                "CE": _leg(strike, expiry, underlying, "CE", rng),
+                "PE": _leg(strike, expiry, underlying, "PE", rng),
+            })
+
+    nearest = [row for row in rows if row["expiryDates"] == expiry_dates[0]]
+    return {
+        "records": {
+            "timestamp": timestamp,
+            "underlyingValue": underlying,
+            "expiryDates": expiry_dates,
+            "strikePrices": sorted({row["strikePrice"] for row in rows}),
+            "data": rows,
+        },
+        "filtered": {
+            "data": nearest,
+            "CE": {"totOI": sum(r["CE"]["openInterest"] for r in nearest), "totVol": 0},
+            "PE": {"totOI": sum(r["PE"]["openInterest"] for r in nearest), "totVol": 0},
+        },
+    }
+
+
+def make_body(n_strikes: int, **kwargs) -> bytes:
+    return json.dumps(make_payload(n_strikes, **kwargs)).encode("utf-8")
+
+
+def write_session(
+    directory: str,
+    n_snapshots: int,
+    n_strikes: int = 100,
+    expiries: int = 2,
+    interval: int = 30,
+    start: datetime = datetime(2026, 1, 5, 9, 15),
+) -> List[Path]:
+    """
+    Write a recorded-looking trading session: ``n_snapshots`` bodies, one per
+    ``interval`` seconds from ``start``, with a random-walk underlying.
+    """
+    out = Path(directory)
+    out.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(0)
+    underlying = 22512.35
+    paths = []
+    for i in range(n_snapshots):
+        underlying = round(underlying + rng.gauss(0, 8), 2)
+        ts = (start + timedelta(seconds=i * interval)).strftime("%d-%b-%Y %H:%M:%S")
+        path = out / f"{i:05d}.json"
+        path.write_bytes(make_body(n_strikes, underlying=underlying, expiries=expiries, seed=i, timestamp=ts))
+        paths.append(path)
+    return paths
+
+
+def load_bodies(directory: str) -> List[bytes]:
+    """Raw bodies of every ``*.json`` file in ``directory``, sorted by name."""
+    return [path.read_bytes() for path in sorted(Path(directory).glob("*.json"))]
@@ -1,18 +1,31 @@
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, Request, HTTPException, Query
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 from contextlib import asynccontextmanager
 import os
+import hmac
 import json
 import locale
 import logging
 import asyncio
+import time
 from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
 from dotenv import load_dotenv
 from backend.scraper import WebScraper
+from backend.nse_session import BASE_URL as NSE_BASE_URL, NSESession
+from backend.cookie_manager import CookieManager
+from backend.broadcaster import Broadcaster, encode_event
+from backend.telegram_notification import TelegramDispatcher
+from backend.history_db import HISTORY_DB_FULL_CHAIN, HISTORY_DB_PATH, HistoryDB
+from backend.market_calendar import ScrapeScheduler
+from backend.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, EVENT_LOOP_LAG, REGISTRY, SCRAPE_PHASE, RequestTimer
+from backend.shared_snapshot import SharedSnapshots
+from backend.snapshot import EncodedBody, Snapshot, SnapshotStore, expiry_view
+from backend.tracing import Profiler, Tracer
 
 # Load .env before anything else so NSE_COOKIES etc. are available
 load_dotenv()
@@ -34,43 +47,277 @@ except Exception:
         locale.setlocale(locale.LC_ALL, '')
 
 # ---------------------------------------------------------------------------
-# In-memory data cache — populated by the background scraper task
+# In-memory snapshot cache — populated by the background scraper task.
+# Snapshots are immutable and swapped in whole, so readers need no lock.
 # ---------------------------------------------------------------------------
-_cached_data: Dict[str, Any] = {}
-_cache_lock = asyncio.Lock()
+_hub = Broadcaster()  # SSE fan-out, one topic per (symbol, expiry) view
 _scraper_task: Optional[asyncio.Task] = None
+_follower_task: Optional[asyncio.Task] = None
+
+# Multi-worker mode (SHARED_SNAPSHOT_DIR): followers check for new snapshots
+# this often and retry the leader lock every LEADER_RETRY_SECONDS
+FOLLOW_POLL_SECONDS = 0.25
+LEADER_RETRY_SECONDS = 5
+
+# Adaptive cadence: SCRAPE_INTERVAL / SCRAPE_INTERVAL_FAST / SCRAPE_JITTER, idle when closed
+_scheduler = ScrapeScheduler()
+
+# Indices tracked by this process. Only NIFTY by default — each extra index is
+# another NSE request per cycle, so opt in with e.g. SYMBOLS=NIFTY,BANKNIFTY,FINNIFTY,MIDCPNIFTY
+SYMBOLS = [
+    s.strip().upper()
+    for s in os.environ.get("SYMBOLS", "NIFTY").split(",")
+    if s.strip()
+]
+DEFAULT_SYMBOL = SYMBOLS[0]
+_scrapers: Dict[str, WebScraper] = {
+    symbol: WebScraper(symbol, record_points=bool(HISTORY_DB_PATH), record_full_chain=HISTORY_DB_FULL_CHAIN)
+    for symbol in SYMBOLS
+}
+_store = SnapshotStore(SYMBOLS)
+
+OI_URL = f"{NSE_BASE_URL}/option-chain"
+
+
+async def _scrape_symbol(scraper: WebScraper) -> None:
+    """Run one scrape for a symbol and publish it as that symbol's next snapshot."""
+    try:
+        with Tracer.span("scrape", symbol=scraper.symbol):
+            result = await scraper.scrape_oi_data(OI_URL)
+            Tracer.annotate(status=result.get("status", "unknown"))
+    except Exception as e:
+        logger.exception(f"Background scraper error ({scraper.symbol}): {e}")
+        return
+    status = result.get("status", "unknown")
+    current = _store.current(scraper.symbol).data
+    if status == "unchanged":
+        # Same NSE payload as last cycle — keep serving the current snapshot version
+        logger.info(f"Background scraper: {scraper.symbol} unchanged since last fetch")
+        if current.get("stale"):
+            _publish(scraper.symbol, {k: v for k, v in current.items() if k not in ("stale", "version")})
+        return
+    result.setdefault("symbol", scraper.symbol)
+    _publish(scraper.symbol, _keep_last_good(scraper, current, result))
+    HistoryDB.record(scraper.symbol, result, scraper.take_new_points())
+    logger.info(f"Background scraper: {scraper.symbol} fetch complete (status={status})")
+
+
+def _keep_last_good(scraper: WebScraper, current: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Stale-while-revalidate: a failed cycle keeps serving the last good data,
+    flagged with how stale it is, rather than replacing it with the error.
+    """
+    if result.get("status") != "error" or current.get("status") != "success":
+        return result
+    return {
+        **{k: v for k, v in current.items() if k not in ("version", "stale")},
+        "stale": _stale_info(scraper, result.get("message")),
+    }
 
-SCRAPE_INTERVAL_SECONDS = int(os.environ.get("SCRAPE_INTERVAL", "30"))
 
-OI_URL = "https://www.nseindia.com/option-chain"
+def _stale_info(scraper: WebScraper, error: Optional[str], restored: bool = False) -> Dict[str, Any]:
+    """The ``stale`` block of a snapshot served from the symbol's last good data."""
+    last_success = scraper.last_success_at
+    return {
+        "since": datetime.fromtimestamp(last_success, WebScraper.IST).isoformat(timespec="seconds") if last_success else None,
+        "age_seconds": int(time.time() - last_success) if last_success else None,
+        "consecutive_failures": scraper.consecutive_failures,
+        "error": error,
+        "restored": restored,
+    }
 
 
 async def _background_scraper():
-    """Continuously scrape NSE data in the background and update the cache."""
-    global _cached_data
+    """
+    Scrape every configured symbol in the background and update the cache.
+    Symbols run concurrently; NSESession caps in-flight requests. Cycles are
+    paced by the market-calendar scheduler: one scrape at startup, then only
+    around the trading session.
+    """
     while True:
+        forwarded = SharedSnapshots.take_cookies()
+        if forwarded:
+            CookieManager.submit(forwarded)
+        logger.info(f"Background scraper: fetching NSE data for {', '.join(SYMBOLS)}...")
+        Profiler.cycle_started()
         try:
-            logger.info("Background scraper: fetching NSE data...")
-            result = await WebScraper.scrape_oi_data(OI_URL)
-            async with _cache_lock:
-                _cached_data = result
-            status = result.get("status", "unknown")
-            logger.info(f"Background scraper: fetch complete (status={status})")
-        except Exception as e:
-            logger.exception(f"Background scraper error: {e}")
-        await asyncio.sleep(SCRAPE_INTERVAL_SECONDS)
+            with Tracer.span("cycle", symbols=len(_scrapers)):
+                await asyncio.gather(*(_scrape_symbol(scraper) for scraper in _scrapers.values()))
+        finally:
+            Profiler.cycle_finished()
+        for scraper in _scrapers.values():
+            _scheduler.observe(scraper.last_payload_timestamp)
+        expiries = {e for _, snap in _store.items() for e in snap.expiries}
+        delay = _scheduler.next_delay(expiries=expiries)
+        logger.info(f"Background scraper: next cycle in {delay:.0f}s ({_scheduler.last_reason}).")
+        await asyncio.sleep(delay)
+
+
+def _publish(symbol: str, result: Dict[str, Any]) -> None:
+    """
+    Encode the next immutable snapshot once, swap it in, share it with the
+    other workers and push it to SSE subscribers.
+    """
+    with SCRAPE_PHASE.time("publish"), Tracer.span("publish", symbol=symbol):
+        snapshot = _store.publish(symbol, result)
+        SharedSnapshots.publish(snapshot)
+        _broadcast(snapshot)
+
+
+async def _follow_leader() -> None:
+    """
+    Follower worker: serve the snapshots the scraper leader shares, and take
+    over scraping if the leader goes away.
+    """
+    last_try = time.monotonic()
+    while True:
+        for snapshot in SharedSnapshots.poll():
+            _store.ingest(snapshot)
+            _broadcast(snapshot)
+        if time.monotonic() - last_try >= LEADER_RETRY_SECONDS:
+            last_try = time.monotonic()
+            if SharedSnapshots.try_lead():
+                await _start_leader()
+                return
+        await asyncio.sleep(FOLLOW_POLL_SECONDS)
+
+
+def _restore_history() -> None:
+    """Warm restart: reload recent OI history and the last snapshot of every symbol."""
+    started = time.perf_counter()
+    since = time.time() - WebScraper.OI_HISTORY_RETENTION_MIN * 60
+    for symbol, scraper in _scrapers.items():
+        points, latest, latest_ts = HistoryDB.load(symbol, since)
+        scraper.restore_history(points)
+        if latest is not None and not _store.current(symbol).version:
+            # Served as stale until the first live scrape replaces it
+            scraper.last_success_at = latest_ts
+            _publish(symbol, {**latest, "stale": _stale_info(scraper, None, restored=True)})
+        logger.info(f"Restored {len(points)} OI points for {symbol} (snapshot: {'yes' if latest else 'no'}).")
+    logger.info(f"History restore took {(time.perf_counter() - started) * 1000:.1f} ms.")
+
+
+def _resolve_symbol(symbol: Optional[str]) -> str:
+    """Map a ?symbol= query value to a tracked symbol (404 if unknown)."""
+    if not symbol:
+        return DEFAULT_SYMBOL
+    symbol = symbol.upper()
+    if symbol not in _scrapers:
+        raise HTTPException(status_code=404, detail=f"Unknown symbol {symbol}. Tracked: {', '.join(SYMBOLS)}")
+    return symbol
+
+
+def _resolve_expiry(snapshot: Snapshot, expiry: Optional[str]) -> Optional[str]:
+    """Map a ?expiry= query value to a tracked expiry (None = default view, 404 if unknown)."""
+    if not expiry or not snapshot.expiries:
+        return None
+    match = snapshot.resolve_expiry(expiry)
+    if match is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Expiry {expiry} not tracked. Available: {', '.join(snapshot.expiries)}",
+        )
+    return match
+
+
+def _encoded_response(request: Request, body: EncodedBody, media_type: str = "application/json",
+                      last_modified: Optional[float] = None) -> Response:
+    """Serve pre-encoded bytes, answering 304 when the client already has this version."""
+    headers = {"ETag": body.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if last_modified is not None:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        if if_none_match.strip() == "*" or body.etag in [t.strip() for t in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+    elif last_modified is not None and _not_modified_since(request.headers.get("if-modified-since"), last_modified):
+        return Response(status_code=304, headers=headers)
+    payload, encoding = body.negotiate(request.headers.get("accept-encoding"))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=payload, media_type=media_type, headers=headers)
+
+
+def _not_modified_since(header: Optional[str], last_modified: float) -> bool:
+    """True if an If-Modified-Since date is at or after ``last_modified`` (HTTP dates have 1s resolution)."""
+    if not header:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    return since.tzinfo is not None and int(last_modified) <= since.timestamp()
+
+
+def _stream_frame(snapshot: Snapshot, expiry: Optional[str]) -> Optional[bytes]:
+    """SSE frame of a snapshot's pre-encoded view, or None if the expiry isn't tracked."""
+    if expiry:
+        expiry = snapshot.resolve_expiry(expiry)
+        if expiry is None:
+            return None  # expiry rolled off — keep the stream open until it reappears
+    body = snapshot.view(expiry)
+    return encode_event(snapshot.version, body.identity) if body is not None else None
+
+
+def _broadcast(snapshot: Snapshot) -> None:
+    """Fan the new snapshot's already-encoded views out to subscribed topics."""
+    for topic in _hub.topics():
+        if topic[0] != snapshot.symbol:
+            continue
+        frame = _stream_frame(snapshot, topic[1])
+        if frame is not None:
+            _hub.publish(topic, snapshot.version, frame)
 
 
 # ---------------------------------------------------------------------------
-# Lifespan — start / stop the background scraper
+# Lifespan — start / stop the background scraper and the NSE session pool
 # ---------------------------------------------------------------------------
-@asynccontextmanager
-async def lifespan(app: FastAPI):
+async def _start_leader() -> None:
+    """Bring up everything that talks to NSE and start the background scraper."""
     global _scraper_task
+    await NSESession.start()
+    await CookieManager.start()
+    await TelegramDispatcher.start()
+    if HistoryDB.start():
+        _restore_history()
     logger.info("Starting background NSE scraper task...")
     _scraper_task = asyncio.create_task(_background_scraper())
+
+
+# Event-loop lag is sampled by a timer that should fire this often
+LOOP_LAG_INTERVAL_SECONDS = 0.5
+
+
+async def _watch_loop_lag() -> None:
+    """Record how late a periodic timer fires — time the loop spent blocked."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(LOOP_LAG_INTERVAL_SECONDS)
+        EVENT_LOOP_LAG.observe(max(loop.time() - started - LOOP_LAG_INTERVAL_SECONDS, 0.0))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _follower_task
+    lag_watch = asyncio.create_task(_watch_loop_lag())
+    if SharedSnapshots.configure(symbols=SYMBOLS) and not SharedSnapshots.try_lead():
+        logger.info("Follower worker: serving snapshots published by the scraper leader.")
+        for snapshot in SharedSnapshots.poll():
+            _store.ingest(snapshot)
+        _follower_task = asyncio.create_task(_follow_leader())
+    else:
+        await _start_leader()
     yield
     # Shutdown
+    _hub.close()
+    lag_watch.cancel()
+    if _follower_task:
+        _follower_task.cancel()
+        try:
+            await _follower_task
+        except asyncio.CancelledError:
+            pass
     if _scraper_task:
         _scraper_task.cancel()
         try:
@@ -78,10 +325,19 @@ async def lifespan(app: FastAPI):
         except asyncio.CancelledError:
             pass
     logger.info("Background scraper stopped.")
+    await TelegramDispatcher.close()
+    await asyncio.to_thread(HistoryDB.close)
+    await CookieManager.close()
+    await NSESession.close()
+    SharedSnapshots.close()
 
 
 # Initialize FastAPI
-app = FastAPI(title="OI Change Tracker", lifespan=lifespan)
+# Path prefix the app is served under behind a proxy, e.g. ROOT_PATH=/oi
+ROOT_PATH = os.environ.get("ROOT_PATH", "")
+
+app = FastAPI(title="OI Change Tracker", lifespan=lifespan, root_path=ROOT_PATH)
+app.add_middleware(RequestTimer, routes={"/": "home", "/api/data": "api_data", "/api/analytics": "api_analytics"})
 
 # Configure templates with custom filters
 templates = Jinja2Templates(directory="frontend/templates")
@@ -110,56 +366,184 @@ app.mount("/static", StaticFiles(directory="frontend/static"), name="static")
 # ---------------------------------------------------------------------------
 
 @app.get("/", response_class=HTMLResponse)
-async def home(request: Request):
-    """Serve the UI instantly from the cache. Never blocks on NSE."""
-    async with _cache_lock:
-        data = dict(_cached_data)  # shallow copy
-
-    if data.get("status") == "success":
-        return templates.TemplateResponse(
-            request=request,
-            name="index.html",
-            context={
-                "request": request,
+async def home(request: Request, symbol: Optional[str] = None, expiry: Optional[str] = None):
+    """
+    Serve the UI instantly from the cache. Never blocks on NSE. The page for
+    each snapshot version is rendered and compressed once, when the snapshot
+    is published, and revalidates with ETag / Last-Modified.
+    """
+    symbol = _resolve_symbol(symbol)
+    snapshot = _store.current(symbol)
+    expiry = _resolve_expiry(snapshot, expiry)
+    root_path = request.scope.get("root_path", "")
+    if root_path == ROOT_PATH:
+        page = _store.page(symbol, expiry)
+    else:
+        # Mounted under a prefix the cached pages weren't rendered for (e.g. uvicorn --root-path)
+        page = EncodedBody.of_bytes(_render_page(snapshot, expiry, root_path), snapshot.page_etag(expiry))
+    return _encoded_response(request, page, media_type="text/html; charset=utf-8", last_modified=snapshot.created_at)
+
+
+def _render_page(snapshot: Snapshot, expiry: Optional[str], root_path: Optional[str] = None) -> bytes:
+    """
+    Render index.html for one snapshot view. Runs once per version, not per
+    request, so ``url_for`` resolves paths under ``root_path`` (ROOT_PATH by
+    default) instead of from a request.
+    """
+    if root_path is None:
+        root_path = ROOT_PATH
+
+    def url_for(name: str, **params: Any) -> str:
+        return f"{root_path}{app.url_path_for(name, **params)}"
+
+    with Tracer.span("render_page", symbol=snapshot.symbol, expiry=expiry):
+        data = expiry_view(snapshot.data, expiry) or {}
+        if data.get("status") == "success":
+            context = {
+                "symbol": snapshot.symbol,
+                "symbols": SYMBOLS,
+                "expiry": expiry,
                 "oi_data": data.get("oi_data", []),
                 "current_price": data.get("current_price", 0),
                 "atm_strike": data.get("atm_strike", 0),
                 "timestamp": data.get("timestamp", "—"),
                 "expiry_date": data.get("expiry_date"),
+                "expiry_dates": data.get("expiry_dates", []),
                 "last_updated": data.get("last_updated", ""),
                 "pcr": data.get("pcr", 0),
                 "total_call_oi": data.get("total_call_oi", 0),
                 "total_put_oi": data.get("total_put_oi", 0),
+                "stale": data.get("stale"),
                 "data_available": True,
-            },
-        )
-    else:
-        return templates.TemplateResponse(
-            request=request,
-            name="index.html",
-            context={
-                "request": request,
+            }
+        else:
+            context = {
+                "symbol": snapshot.symbol,
+                "symbols": SYMBOLS,
+                "expiry": expiry,
                 "oi_data": [],
                 "current_price": 0,
                 "atm_strike": 0,
                 "timestamp": "—",
                 "expiry_date": None,
+                "expiry_dates": [],
                 "last_updated": "",
                 "pcr": 0,
                 "total_call_oi": 0,
                 "total_put_oi": 0,
                 "data_available": False,
                 "error_message": data.get("message", "Waiting for first data fetch..."),
-            },
-        )
+            }
+        context["url_for"] = url_for
+        return templates.get_template("index.html").render(context).encode("utf-8")
+
+
+_store.set_renderer(_render_page)
 
 
 @app.get("/api/data")
-async def api_data():
-    """Return cached OI data as JSON for AJAX polling."""
-    async with _cache_lock:
-        data = dict(_cached_data)
-    return JSONResponse(content=data)
+async def api_data(
+    request: Request,
+    symbol: Optional[str] = None,
+    expiry: Optional[str] = None,
+    since: Optional[int] = None,
+    boot: Optional[str] = None,
+    window: Optional[int] = None,
+    from_strike: Optional[float] = Query(None, alias="from"),
+    to_strike: Optional[float] = Query(None, alias="to"),
+):
+    """
+    Return cached OI data for one symbol (and optionally one expiry) as JSON for
+    AJAX polling. Bodies are pre-encoded per snapshot; If-None-Match gets a 304.
+
+    With ?since=<version>&boot=<boot> (both taken from a previous response) only
+    the rows and fields changed since that version are returned, flagged with
+    "delta": true. Unknown or expired versions get the full snapshot instead.
+
+    ?window=N (strikes either side of ATM) or ?from=<strike>&to=<strike> slice
+    the snapshot's full-chain strike index instead of the default window; the
+    response carries a "window" block. Slices are always full, never deltas.
+    """
+    symbol = _resolve_symbol(symbol)
+    snapshot = _store.current(symbol)
+    expiry = _resolve_expiry(snapshot, expiry)
+    body = None
+    if window is not None or from_strike is not None or to_strike is not None:
+        body = _strike_slice(snapshot, expiry, window, from_strike, to_strike)
+    elif since is not None and boot == snapshot.boot:
+        body = _store.delta(symbol, since, expiry)
+    return _encoded_response(request, body or snapshot.view(expiry))
+
+
+def _strike_slice(snapshot: Snapshot, expiry: Optional[str], window: Optional[int],
+                  low: Optional[float], high: Optional[float]) -> Optional[EncodedBody]:
+    """Encoded slice of the strike index, or None (full view) when the snapshot has no chain data."""
+    if window is not None and (low is not None or high is not None):
+        raise HTTPException(status_code=400, detail="Use either window or from/to, not both")
+    if window is not None and window < 0:
+        raise HTTPException(status_code=400, detail="window must be 0 or more")
+    if low is not None and high is not None and low > high:
+        raise HTTPException(status_code=400, detail="from must not be above to")
+    index = snapshot.strike_index(expiry)
+    if index is None:
+        return None
+    lo, hi = index.around_atm(window) if window is not None else index.between(low, high)
+    return snapshot.strike_slice(expiry, lo, hi)
+
+
+@app.get("/api/analytics")
+async def api_analytics(request: Request, symbol: Optional[str] = None, expiry: Optional[str] = None):
+    """
+    Full-chain analytics for one symbol/expiry: max pain, OI walls, OI-weighted
+    support/resistance, PCR over PCR_WINDOWS and change-in-OI aggregates.
+    Computed once per snapshot version and served pre-encoded like /api/data.
+    """
+    symbol = _resolve_symbol(symbol)
+    snapshot = _store.current(symbol)
+    body = snapshot.analytics(_resolve_expiry(snapshot, expiry))
+    if body is None:
+        return JSONResponse(
+            {"status": "error", "message": snapshot.data.get("message", "Waiting for first data fetch...")},
+            status_code=503,
+        )
+    return _encoded_response(request, body, last_modified=snapshot.created_at)
+
+
+STREAM_KEEPALIVE_SECONDS = 15
+
+
+@app.get("/api/stream")
+async def api_stream(request: Request, symbol: Optional[str] = None, expiry: Optional[str] = None):
+    """
+    Server-Sent Events feed of new snapshots for one symbol/expiry view.
+    Each snapshot is pushed once when the background scraper publishes it;
+    browsers resume with Last-Event-ID and only get a frame they missed.
+    """
+    symbol = _resolve_symbol(symbol)
+    topic = (symbol, expiry.upper() if expiry else None)
+    last_event_id = request.headers.get("last-event-id")
+
+    snapshot = _store.current(symbol)
+    latest = _hub.latest(topic)
+    if latest is None or latest[0] != snapshot.version:
+        frame = _stream_frame(snapshot, topic[1])
+        if frame is not None:
+            _hub.publish(topic, snapshot.version, frame)
+
+    async def events():
+        with _hub.subscribe(topic, last_event_id) as sub:
+            yield f"retry: {STREAM_KEEPALIVE_SECONDS * 1000}\n\n".encode()
+            while True:
+                frame = await sub.next_frame(timeout=STREAM_KEEPALIVE_SECONDS)
+                if frame is None or await request.is_disconnected():
+                    break
+                yield frame or b": keep-alive\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -179,34 +563,149 @@ async def set_cookies(payload: CookiePayload):
              -H "Content-Type: application/json" \\
              -d '{"cookies": "YOUR_COOKIE_STRING_HERE"}'
     """
-    from backend.cookie_manager import CookieManager
-    import time
     if not payload.cookies or len(payload.cookies) < 20:
         return JSONResponse({"status": "error", "message": "Cookie string too short"}, status_code=400)
-    CookieManager._cookie_string = payload.cookies
-    CookieManager._fetched_at = time.time()
-    CookieManager._source = "api"
-    logger.info(f"Cookies updated via /api/set-cookies ({len(payload.cookies)} chars)")
-    return {"status": "ok", "message": f"Cookies updated ({len(payload.cookies)} chars). Next scrape will use them."}
+    if SharedSnapshots.is_follower():
+        SharedSnapshots.post_cookies(payload.cookies)
+        logger.info(f"Cookies forwarded to the scraper leader ({len(payload.cookies)} chars)")
+        return {"status": "ok", "message": f"Cookies forwarded to the scraper worker ({len(payload.cookies)} chars)."}
+    CookieManager.submit(payload.cookies)
+    logger.info(f"Cookies received via /api/set-cookies ({len(payload.cookies)} chars)")
+    return {"status": "ok", "message": f"Cookies queued ({len(payload.cookies)} chars). They replace the current set once NSE accepts them."}
 
 
 # Health check endpoint for hosting platforms
 @app.get("/health")
 async def health_check():
-    from backend.cookie_manager import CookieManager
-    import time
-    async with _cache_lock:
-        has_data = _cached_data.get("status") == "success"
-    cookie_age = int(time.time() - CookieManager._fetched_at)
+    has_data = {symbol: snap.data.get("status") == "success" for symbol, snap in _store.items()}
     return {
         "status": "healthy",
-        "has_data": has_data,
-        "cookie_source": CookieManager._source,
-        "cookie_age_seconds": cookie_age,
+        "has_data": any(has_data.values()),
+        "symbols": has_data,
+        "unchanged_cycles": {symbol: scraper.unchanged_cycles for symbol, scraper in _scrapers.items()},
+        "consecutive_failures": {symbol: scraper.consecutive_failures for symbol, scraper in _scrapers.items()},
+        "circuit": WebScraper.BREAKER.stats(),
+        "latency": WebScraper.LATENCY.stats(),
+        "cookie_source": CookieManager.get_source(),
+        "cookie_age_seconds": CookieManager.cookie_age(),
+        "cookies": CookieManager.stats(),
+        "nse_session": NSESession.stats(),
+        "stream": _hub.stats(),
+        "scheduler": _scheduler.stats(),
+        "workers": SharedSnapshots.stats(),
+        "telegram": TelegramDispatcher.stats(),
+        "history_db": HistoryDB.stats(),
         "timestamp": datetime.now().isoformat(),
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of scrape phases, NSE retries, cookies, snapshots and latency."""
+    return Response(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+# ---------------------------------------------------------------------------
+# Admin diagnostics — traces and an on-demand sampling profiler.
+# Disabled unless ADMIN_TOKEN is set; callers send it as X-Admin-Token.
+# ---------------------------------------------------------------------------
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+PROFILE_MAX_CYCLES = 20
+
+
+def _require_admin(request: Request) -> None:
+    token = request.headers.get("x-admin-token", "")
+    if not ADMIN_TOKEN or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Admin endpoints need ADMIN_TOKEN and a matching X-Admin-Token header")
+
+
+@app.get("/admin/traces")
+async def admin_traces(request: Request, limit: int = 10, name: Optional[str] = None):
+    """Most recent traces (cycle, cookie_refresh, render_page…), newest first."""
+    _require_admin(request)
+    return {"enabled": Tracer.enabled, "traces": Tracer.traces(limit=max(1, limit), name=name)}
+
+
+@app.post("/admin/trace")
+async def admin_trace(request: Request, enabled: bool = True):
+    """Turn span recording on or off at runtime (TRACE_SCRAPES sets the startup value)."""
+    _require_admin(request)
+    Tracer.set_enabled(enabled)
+    logger.info(f"Tracing {'enabled' if enabled else 'disabled'} via /admin/trace")
+    return {"enabled": Tracer.enabled}
+
+
+@app.post("/admin/profile")
+async def admin_profile_start(request: Request, cycles: int = 1):
+    """Sample the event loop's stacks during the next `cycles` scrape cycles."""
+    _require_admin(request)
+    if SharedSnapshots.is_follower():
+        return JSONResponse(
+            {"status": "error", "message": f"Worker {os.getpid()} does not scrape; retry until the leader answers."},
+            status_code=409,
+        )
+    if not 1 <= cycles <= PROFILE_MAX_CYCLES:
+        raise HTTPException(status_code=400, detail=f"cycles must be between 1 and {PROFILE_MAX_CYCLES}")
+    if not Profiler.arm(cycles):
+        return JSONResponse({"status": "error", "message": "A profile is already in progress", **Profiler.status()}, status_code=409)
+    logger.info(f"Profiling the next {cycles} scrape cycle(s) via /admin/profile")
+    return Profiler.status()
+
+
+@app.get("/admin/profile")
+async def admin_profile(request: Request):
+    """
+    Status of the profiler while armed or running; once done, the collected
+    stacks in folded format (flamegraph.pl / speedscope / inferno input).
+    """
+    _require_admin(request)
+    if Profiler.status()["state"] != "done":
+        return Profiler.status()
+    return PlainTextResponse(Profiler.folded())
+
+
+def _cookie_strategy_metrics():
+    for strategy, s in CookieManager.stats()["strategies"].items():
+        yield (strategy, "accepted"), s["accepted"]
+        yield (strategy, "rejected"), s["attempts"] - s["accepted"]
+
+
+REGISTRY.callback(
+    "snapshot_age_seconds", "Seconds since each symbol's current snapshot was published.",
+    ["symbol"], lambda: [((symbol,), time.time() - snap.created_at) for symbol, snap in _store.items() if snap.version],
+)
+REGISTRY.callback(
+    "snapshot_version", "Current snapshot version per symbol.",
+    ["symbol"], lambda: [((symbol,), snap.version) for symbol, snap in _store.items()],
+)
+REGISTRY.callback(
+    "snapshot_stale", "1 while a symbol is serving its last good data after failed scrapes.",
+    ["symbol"], lambda: [((symbol,), 1 if snap.data.get("stale") else 0) for symbol, snap in _store.items()],
+)
+REGISTRY.callback(
+    "scrape_consecutive_failures", "Failed scrape cycles since the last good one, per symbol.",
+    ["symbol"], lambda: [((symbol,), scraper.consecutive_failures) for symbol, scraper in _scrapers.items()],
+)
+REGISTRY.callback(
+    "cookie_refreshes_total", "Cookie candidates tried by the background refresher, by strategy and outcome.",
+    ["strategy", "result"], _cookie_strategy_metrics, kind="counter",
+)
+REGISTRY.callback(
+    "nse_session_score", "Health score of each pooled NSE session (0 while warming or quarantined).",
+    ["session"], lambda: [((f"{i}:{s['profile']}",), s["score"]) for i, s in enumerate(CookieManager.stats()["sessions"])],
+)
+REGISTRY.callback(
+    "circuit_open", "1 while the NSE circuit breaker is open or half-open.",
+    [], lambda: [((), 0 if WebScraper.BREAKER.state == "closed" else 1)],
+)
+REGISTRY.callback(
+    "worker_role", "1 for this process's role (single, leader or follower).",
+    ["role"], lambda: [((
+        "single" if not SharedSnapshots.enabled() else "leader" if SharedSnapshots.is_leader() else "follower",
+    ), 1)],
+)
+
+
 # Graceful error handling for NSE API issues
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -0,0 +1,34 @@
+"""Small, deterministic option-chain-v3 payloads for the tests."""
+
+from typing import Any, Callable, Dict, Sequence
+
+EXPIRIES = ("27-Jan-2026", "24-Feb-2026")
+
+
+def flat_oi(strike: float, side: str) -> int:
+    return 100_000 + int(strike) % 1000 * (1 if side == "CE" else 2)
+
+
+def payload(strikes: int, expiries: Sequence[str] = EXPIRIES[:1], spot: float = 22510.0, step: int = 50,
+            oi: Callable[[float, str], int] = flat_oi, timestamp: str = "05-Jan-2026 10:15:00") -> Dict[str, Any]:
+    """``strikes`` strikes per expiry on the ``step`` grid, centred on ``spot``."""
+    first = round(spot / step) * step - (strikes // 2) * step
+    rows = [
+        {
+            "strikePrice": first + i * step,
+            "expiryDate": expiry,
+            **{
+                side: {"strikePrice": first + i * step, "expiryDate": expiry, "openInterest": oi(first + i * step, side),
+                       "changeinOpenInterest": 0, "totalTradedVolume": 10, "impliedVolatility": 12.5,
+                       "lastPrice": 100.0, "change": 1.0}
+                for side in ("CE", "PE")
+            },
+        }
+        for expiry in expiries
+        for i in range(strikes)
+    ]
+    nearest = [row for row in rows if row["expiryDate"] == expiries[0]]
+    return {
+        "records": {"underlyingValue": spot, "expiryDates": list(expiries), "timestamp": timestamp, "data": rows},
+        "filtered": {"data": nearest},
+    }
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from backend.analytics import chain_analytics, max_pain, oi_walls
+from backend.option_chain import parse_option_chain
+from tests.payloads import payload
+
+
+def brute_force_payout(strike, call_oi, put_oi):
+    """Writer payout at each candidate expiry price, from the full n×n payoff grid."""
+    expiry = strike[:, None]
+    calls = (np.maximum(expiry - strike[None, :], 0) * call_oi[None, :]).sum(axis=1)
+    puts = (np.maximum(strike[None, :] - expiry, 0) * put_oi[None, :]).sum(axis=1)
+    return calls + puts
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_max_pain_matches_the_payoff_grid(seed):
+    rng = np.random.default_rng(seed)
+    strike = np.arange(21000, 24001, 50, dtype=np.float64)
+    call_oi = rng.integers(0, 200_000, strike.size)
+    put_oi = rng.integers(0, 200_000, strike.size)
+
+    pain, payout = max_pain(strike, call_oi, put_oi)
+    expected = brute_force_payout(strike, call_oi, put_oi)
+    np.testing.assert_allclose(payout, expected)
+    assert pain == strike[int(np.argmin(expected))]
+
+
+def test_max_pain_of_an_empty_chain():
+    pain, payout = max_pain(np.zeros(0), np.zeros(0), np.zeros(0))
+    assert pain is None and payout.size == 0
+
+
+def test_oi_walls_are_largest_first():
+    strike = np.array([100.0, 200.0, 300.0, 400.0])
+    assert oi_walls(strike, np.array([5, 40, 0, 20]), n=3) == [
+        {"strike": 200, "oi": 40}, {"strike": 400, "oi": 20}, {"strike": 100, "oi": 5},
+    ]
+    assert oi_walls(strike, np.zeros(4, dtype=np.int64)) == []
+
+
+def test_chain_analytics_pcr_windows():
+    chain, spot, _ = parse_option_chain(payload(41, oi=lambda strike, side: 100 if side == "CE" else 300))
+    stats = chain_analytics(chain, spot, strike_step=50, windows=(3, None))
+
+    assert stats["atm_strike"] == 22500
+    assert stats["strikes"] == 41
+    payout = brute_force_payout(chain.strike, chain.ce_oi, chain.pe_oi)
+    assert stats["max_pain"] == chain.strike[int(np.argmin(payout))]
+    small, whole = stats["pcr_windows"]
+    assert (small["window"], small["strikes"], small["pcr"]) == (3, 7, 3.0)
+    assert (whole["window"], whole["strikes"], whole["call_oi"]) == ("all", 41, 4100)
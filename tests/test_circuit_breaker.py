@@ -0,0 +1,135 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from backend import resilience, scraper as scraper_module
+from backend.cookie_manager import CookieManager
+from backend.resilience import CircuitBreaker
+from backend.scraper import WebScraper
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resilience, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def tripped(clock, failures=2):
+    breaker = CircuitBreaker(failures=failures, open_seconds=60, max_open_seconds=240)
+    for _ in range(failures):
+        assert breaker.allow()
+        breaker.record(False)
+    return breaker
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failures=3, open_seconds=60)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record(False)
+    assert breaker.state == "closed"
+    breaker.allow()
+    breaker.record(False)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.retry_in() == 60
+
+
+def test_success_resets_the_streak(clock):
+    breaker = CircuitBreaker(failures=2)
+    breaker.allow()
+    breaker.record(False)
+    breaker.allow()
+    breaker.record(True)
+    breaker.allow()
+    breaker.record(False)
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_a_single_probe_through(clock):
+    breaker = tripped(clock)
+    clock[0] += 61
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()  # probe still in flight
+    breaker.record(True)
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_for_longer(clock):
+    breaker = tripped(clock)
+    clock[0] += 61
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == "open"
+    assert breaker.retry_in() == 120
+    clock[0] += 121
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.retry_in() == 240  # capped at max_open_seconds from here on
+
+
+class FakeResponse:
+    status_code = 200
+    encoding = None
+
+    def __init__(self, payload):
+        self.content = json.dumps(payload).encode()
+        self.text = self.content.decode()
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def test_probe_that_raises_reopens_the_circuit(clock, monkeypatch):
+    """A half-open probe whose parse blows up must still be recorded as a failure."""
+    breaker = tripped(clock)
+    clock[0] += 61
+    monkeypatch.setattr(WebScraper, "BREAKER", breaker)
+    monkeypatch.setattr(scraper_module, "backoff_delay", lambda attempt: 0)
+    slot = SimpleNamespace(name="0:test", profile=None)
+
+    async def acquire(exclude=None):
+        return slot
+
+    async def get(api_url, slot):
+        return slot, FakeResponse({"records": {"underlyingValue": 22500}})
+
+    def parse_payload(data):
+        raise KeyError("filtered")
+
+    monkeypatch.setattr(CookieManager, "acquire", acquire)
+    scraper = WebScraper("NIFTY")
+    monkeypatch.setattr(scraper, "_get", get)
+    monkeypatch.setattr(scraper, "parse_payload", parse_payload)
+
+    assert asyncio.run(scraper.fetch_nse_data()) == (None, None, [])
+    assert breaker.state == "open"
+    assert not breaker._probing
+    assert breaker.retry_in() == 120
+
+
+def test_market_closed_body_has_the_same_shape(monkeypatch):
+    """An empty body off-hours is a success for the breaker and returns (None, None, [])."""
+    breaker = CircuitBreaker(failures=1, open_seconds=60)
+    monkeypatch.setattr(WebScraper, "BREAKER", breaker)
+    monkeypatch.setattr(WebScraper.CALENDAR, "is_session_window", lambda now: False)
+    slot = SimpleNamespace(name="0:test", profile=None)
+
+    async def acquire(exclude=None):
+        return slot
+
+    async def get(api_url, slot):
+        return slot, FakeResponse({})
+
+    monkeypatch.setattr(CookieManager, "acquire", acquire)
+    scraper = WebScraper("NIFTY")
+    monkeypatch.setattr(scraper, "_get", get)
+
+    assert asyncio.run(scraper.fetch_nse_data()) == (None, None, [])
+    assert breaker.state == "closed"
+    assert asyncio.run(scraper.scrape_oi_data(""))["status"] == "market_closed"
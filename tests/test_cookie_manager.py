@@ -0,0 +1,38 @@
+import asyncio
+
+from backend import cookie_manager
+from backend.cookie_manager import CookieManager
+
+
+def test_off_hours_startup_warms_the_whole_pool(monkeypatch):
+    monkeypatch.setattr(cookie_manager, "POOL_SIZE", 2)
+    monkeypatch.setattr(CookieManager.CALENDAR, "is_session_window", lambda now: False)
+    monkeypatch.setattr(CookieManager, "_slots", [])
+    monkeypatch.setattr(CookieManager, "_demand", False)
+    monkeypatch.setattr(CookieManager, "_refresher", None)
+    warmed = []
+
+    async def refresh(slot):
+        warmed.append(slot.index)
+        CookieManager._swap(slot, f"nsit={slot.index}", "auto")
+        return True
+
+    monkeypatch.setattr(CookieManager, "_refresh", refresh)
+
+    async def startup():
+        monkeypatch.setattr(CookieManager, "_wake", asyncio.Event())
+        monkeypatch.setattr(CookieManager, "_ready", asyncio.Event())
+        slot = await CookieManager.acquire()
+        for _ in range(100):
+            if len(warmed) == 2:
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)  # nothing further is due until shortly before the open
+        await CookieManager.close()
+        return slot
+
+    slot = asyncio.run(startup())
+    assert slot is not None
+    assert warmed == [0, 1]
+    assert all(s.ready for s in CookieManager._slots)
+    assert not CookieManager._demand
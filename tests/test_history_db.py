@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.history_db import HistoryDB
+from backend.replay import ReplayClock
+from backend.scraper import WebScraper
+from tests.payloads import payload
+
+NOW = WebScraper.IST.localize(datetime(2026, 1, 5, 10, 15))
+
+
+def scraper_at(clock):
+    return WebScraper("NIFTY", clock=clock, alert_sink=lambda alerts: None, record_points=True)
+
+
+def run_cycle(scraper, data):
+    return scraper.build_response(*scraper.parse_payload(data))
+
+
+@pytest.fixture
+def history_db(tmp_path):
+    path = str(tmp_path / "history" / "oi.sqlite3")
+    assert HistoryDB.start(path)
+    yield path
+    HistoryDB.close()
+
+
+def test_write_then_restore_round_trip(history_db):
+    scraper = scraper_at(lambda: NOW)
+    result = run_cycle(scraper, payload(41, oi=lambda strike, side: 100_000))
+    points = scraper.take_new_points()
+    assert len(points) == 2 * (2 * scraper.strikes_to_show + 1)
+    HistoryDB.record("NIFTY", result, points)
+    HistoryDB.close()  # flushes the queued cycle
+
+    assert HistoryDB.start(history_db)
+    restored, latest, latest_ts = HistoryDB.load("NIFTY", since=0)
+    assert sorted(restored) == sorted(points)
+    assert "chain" not in latest
+    assert latest["oi_data"] == result["oi_data"]
+    assert latest_ts is not None
+    assert HistoryDB.load("BANKNIFTY", since=0) == ([], None, None)
+
+    # A fresh process picks up the change columns where the old one left off
+    clock = ReplayClock(NOW + timedelta(minutes=6))
+    fresh = scraper_at(clock)
+    fresh.restore_history(restored)
+    grown = run_cycle(fresh, payload(41, oi=lambda strike, side: 110_000))
+    assert all(row["call_pct_5m"] == pytest.approx(10.0) for row in grown["oi_data"])
+    assert all(row["put_pct_5m"] == pytest.approx(10.0) for row in grown["oi_data"])
+
+
+def test_failed_results_are_not_stored(history_db):
+    HistoryDB.record("NIFTY", {"status": "error", "message": "down"}, [])
+    HistoryDB.close()
+    assert HistoryDB.start(history_db)
+    assert HistoryDB.load("NIFTY", since=0) == ([], None, None)
@@ -0,0 +1,42 @@
+from datetime import date, datetime
+
+import pytest
+
+from backend.market_calendar import IST, MarketCalendar
+
+# Monday 2026-01-26 is a holiday in this calendar
+CALENDAR = MarketCalendar(holidays={date(2026, 1, 26)})
+
+
+def ist(*args):
+    return IST.localize(datetime(*args))
+
+
+@pytest.mark.parametrize("when, in_window", [
+    (ist(2026, 1, 5, 8, 59), False),    # before pre-open
+    (ist(2026, 1, 5, 9, 0), True),      # pre-open
+    (ist(2026, 1, 5, 9, 15), True),     # open
+    (ist(2026, 1, 5, 15, 29), True),
+    (ist(2026, 1, 5, 15, 44), True),    # post-close grace
+    (ist(2026, 1, 5, 15, 45), False),
+    (ist(2026, 1, 10, 11, 0), False),   # Saturday
+    (ist(2026, 1, 26, 11, 0), False),   # holiday
+])
+def test_is_session_window(when, in_window):
+    assert CALENDAR.is_session_window(when) is in_window
+
+
+def test_is_session_window_converts_to_ist():
+    # 04:00 UTC is 09:30 IST
+    assert CALENDAR.is_session_window(datetime.fromisoformat("2026-01-05T04:00:00+00:00"))
+    assert not CALENDAR.is_session_window(datetime.fromisoformat("2026-01-05T12:00:00+00:00"))
+
+
+@pytest.mark.parametrize("when, expected", [
+    (ist(2026, 1, 5, 8, 0), ist(2026, 1, 5, 9, 15)),     # same day, before the open
+    (ist(2026, 1, 5, 9, 15), ist(2026, 1, 6, 9, 15)),    # strictly after now
+    (ist(2026, 1, 9, 16, 0), ist(2026, 1, 12, 9, 15)),   # Friday evening -> Monday
+    (ist(2026, 1, 23, 16, 0), ist(2026, 1, 27, 9, 15)),  # skips the weekend and the holiday
+])
+def test_next_open(when, expected):
+    assert CALENDAR.next_open(when) == expected
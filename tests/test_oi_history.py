@@ -0,0 +1,90 @@
+import numpy as np
+
+from backend.oi_history import OIHistoryStore, _OIRing
+
+
+def ring_of(capacity, points):
+    ring = _OIRing(capacity)
+    for ts, oi in points:
+        ring.append(ts, oi)
+    return ring
+
+
+def test_ring_lookups_before_wraparound():
+    ring = ring_of(4, [(10, 100), (20, 200), (30, 300)])
+    assert len(ring) == 3
+    assert ring.latest_ts == 30
+    assert ring.value_at_or_before(5) is None
+    assert ring.value_at_or_before(10) == 100
+    assert ring.value_at_or_before(25) == 200
+    assert ring.value_at_or_before(99) == 300
+
+
+def test_ring_wraparound_overwrites_oldest():
+    ring = ring_of(3, [(t, t * 10) for t in range(1, 6)])  # 1..5 into 3 slots -> 3, 4, 5
+    assert len(ring) == 3
+    assert ring.latest_ts == 5
+    assert ring.value_at_or_before(2) is None  # 1 and 2 were overwritten
+    assert ring.value_at_or_before(3) == 30
+    assert ring.value_at_or_before(4.5) == 40
+    assert ring.value_at_or_before(7) == 50
+
+
+def test_ring_vector_lookup_matches_scalar_when_wrapped():
+    ring = ring_of(5, [(t, t) for t in range(1, 9)])  # holds 4..8, split across the wrap
+    ts = np.array([0.0, 3.9, 4.0, 5.5, 6.0, 7.2, 8.0, 100.0])
+    got = ring.values_at_or_before(ts)
+    for t, value in zip(ts.tolist(), got.tolist()):
+        expected = ring.value_at_or_before(t)
+        assert (np.isnan(value) and expected is None) or value == expected
+
+
+def test_ring_prune_drops_strictly_older_points():
+    ring = ring_of(4, [(t, t) for t in range(1, 7)])  # holds 3..6, wrapped
+    ring.prune(4)
+    assert len(ring) == 3
+    assert ring.value_at_or_before(3.5) is None
+    assert ring.value_at_or_before(4) == 4
+    ring.prune(100)
+    assert len(ring) == 0
+    assert ring.latest_ts is None
+
+
+def test_ring_keeps_appending_after_prune_across_the_wrap():
+    ring = ring_of(3, [(1, 1), (2, 2), (3, 3)])
+    ring.prune(3)
+    ring.append(4, 4)
+    ring.append(5, 5)
+    assert len(ring) == 3
+    assert [ring.value_at_or_before(t) for t in (3, 4, 5)] == [3, 4, 5]
+
+
+def test_store_prune_forgets_empty_keys_and_evicts_least_recent():
+    store = OIHistoryStore(capacity=4, max_keys=2)
+    store.begin_cycle()
+    store.append(22000, "CE", 10, 1)
+    store.append(22050, "CE", 20, 2)
+    store.begin_cycle()
+    store.append(22000, "CE", 30, 3)  # 22000 is now the most recently updated key
+    store.append(22100, "CE", 40, 4)  # evicts 22050
+    assert (22050, "CE") not in store
+    assert len(store) == 2
+
+    store.prune(35)
+    assert (22000, "CE") not in store
+    assert store.value_at_or_before(22100, "CE", 40) == 4
+    assert store.values_at_or_before(22000, "CE", np.array([40.0])) is None
+
+
+def test_store_never_evicts_keys_written_this_cycle():
+    store = OIHistoryStore(capacity=4, max_keys=2)
+    store.begin_cycle()
+    for strike in (22000, 22050, 22100, 22150):
+        store.append(strike, "CE", 10, strike)
+    assert len(store) == 4  # over the cap rather than evicting this cycle's keys
+
+    store.begin_cycle()
+    store.append(22150, "CE", 20, 1)
+    store.append(22200, "CE", 20, 1)  # now the untouched keys go, oldest first
+    assert len(store) == 2
+    assert (22150, "CE") in store and (22200, "CE") in store
@@ -0,0 +1,71 @@
+import json
+
+import numpy as np
+import pytest
+
+from backend.option_chain import parse_option_chain
+from backend.scraper import WebScraper
+from tests.payloads import EXPIRIES, payload
+
+SCRAPER = WebScraper("NIFTY")
+
+
+def pandas_window(body, low, high):
+    """The original path: DataFrame(...).fillna(0) filtered row by row with iterrows()."""
+    pd = pytest.importorskip("pandas")
+    data = json.loads(body)
+    rawop = pd.DataFrame(data["filtered"]["data"]).fillna(0)
+    rows = [row for _, row in rawop.iterrows() if low <= row["strikePrice"] <= high]
+    leg_oi = lambda leg: [row[leg]["openInterest"] if isinstance(row[leg], dict) else 0 for row in rows]
+    return [row["strikePrice"] for row in rows], leg_oi("CE"), leg_oi("PE")
+
+
+def chain_body():
+    data = payload(61, oi=lambda strike, side: int(strike) * (3 if side == "CE" else 5))
+    rows = data["filtered"]["data"]
+    del rows[30]["PE"]        # ATM strike with no put leg
+    rows[31]["CE"] = None     # and one with a null call leg
+    rows.reverse()            # NSE order is not guaranteed
+    return json.dumps(data).encode()
+
+
+def test_windowed_parse_matches_the_pandas_path():
+    body = chain_body()
+    chain, underlying, expiry_dates = parse_option_chain(body, window=SCRAPER.strike_bounds)
+    low, high = SCRAPER.strike_bounds(underlying)
+    strikes, ce_oi, pe_oi = pandas_window(body, low, high)
+
+    assert underlying == 22510.0
+    assert expiry_dates == [EXPIRIES[0]]
+    order = np.argsort(strikes)
+    assert chain.strike.tolist() == [strikes[i] for i in order]
+    assert chain.ce_oi.tolist() == [ce_oi[i] for i in order]
+    assert chain.pe_oi.tolist() == [pe_oi[i] for i in order]
+    assert chain.pe_present.tolist().count(False) == 1
+    assert chain.ce_present.tolist().count(False) == 1
+
+
+def test_without_a_window_the_whole_chain_is_kept():
+    chain, _, _ = parse_option_chain(chain_body())
+    assert len(chain) == 61
+    assert np.all(np.diff(chain.strike) > 0)
+
+
+@pytest.mark.parametrize("body", [b"{}", b'{"records": {}}', b'{"records": {"underlyingValue": 1}}'])
+def test_bodies_without_option_rows(body):
+    assert parse_option_chain(body) is None
+
+
+def test_records_first_reads_every_expiry():
+    data = payload(11, expiries=EXPIRIES)
+    assert set(parse_option_chain(data)[0].expiries()) == {EXPIRIES[0]}
+    assert set(parse_option_chain(data, records_first=True)[0].expiries()) == set(EXPIRIES)
+
+
+def test_scraper_parse_payload_uses_the_same_parser(monkeypatch):
+    monkeypatch.setattr(WebScraper, "FAST_PARSE", True)
+    data = json.loads(chain_body())
+    chain, underlying, _ = SCRAPER.parse_payload(data)
+    expected, _, _ = parse_option_chain(data, window=SCRAPER.strike_bounds)
+    assert chain.strike.tolist() == expected.strike.tolist()
+    assert SCRAPER.last_payload_timestamp == data["records"]["timestamp"]
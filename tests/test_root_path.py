@@ -0,0 +1,51 @@
+import re
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from backend.scraper import WebScraper
+from tests.payloads import EXPIRIES, payload
+
+
+def scrape_result():
+    """A view with an expiry switcher: two tracked expiries."""
+    scraper = WebScraper("NIFTY", clock=lambda: WebScraper.IST.localize(datetime(2026, 1, 5, 10, 15)),
+                         alert_sink=lambda alerts: None)
+    return scraper.build_response(*scraper.parse_payload(payload(41, expiries=EXPIRIES)))
+
+
+def page_urls(html):
+    links = re.findall(r'<a href="([^"]*\?symbol=[^"]*)"', html)
+    data_url = re.search(r"const DATA_URL = (.*);", html).group(1)
+    stream_url = re.search(r"const STREAM_URL = (.*);", html).group(1)
+    return links, data_url, stream_url
+
+
+@pytest.mark.parametrize("configured", ["/oi", ""])
+def test_page_urls_stay_under_the_root_path(configured, monkeypatch):
+    monkeypatch.setattr(WebScraper, "EXPIRIES", ["0", "1"])
+    # Cached pages are rendered for ROOT_PATH; any other prefix is rendered per request
+    monkeypatch.setattr(main, "ROOT_PATH", configured)
+    main._store.publish("NIFTY", scrape_result())
+    client = TestClient(main.app, root_path="/oi")
+
+    response = client.get("/", params={"symbol": "NIFTY"})
+    assert response.status_code == 200
+    links, data_url, stream_url = page_urls(response.text)
+    assert "/oi/?symbol=NIFTY" in links
+    assert f"/oi/?symbol=NIFTY&expiry={EXPIRIES[0]}" in links
+    assert all(link.startswith("/oi/") for link in links)
+    assert data_url == '"/oi/api/data"'
+    assert stream_url == '"/oi/api/stream"'
+    assert 'href="/oi/static/css/style.css"' in response.text
+
+
+def test_page_urls_without_a_root_path(monkeypatch):
+    monkeypatch.setattr(WebScraper, "EXPIRIES", ["0", "1"])
+    main._store.publish("NIFTY", scrape_result())
+    links, data_url, stream_url = page_urls(TestClient(main.app).get("/").text)
+    assert "/?symbol=NIFTY" in links
+    assert f"/?symbol=NIFTY&expiry={EXPIRIES[1]}" in links
+    assert (data_url, stream_url) == ('"/api/data"', '"/api/stream"')
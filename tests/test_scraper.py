@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.replay import ReplayClock
+from backend.scraper import WebScraper
+from tests.payloads import payload
+
+NOW = WebScraper.IST.localize(datetime(2026, 1, 5, 10, 15))
+
+
+def scraper_at(clock):
+    return WebScraper("NIFTY", clock=clock, alert_sink=lambda alerts: None)
+
+
+def run_cycle(scraper, data):
+    return scraper.build_response(*scraper.parse_payload(data))
+
+
+def grown(strike, side):
+    return 110_000 if side == "CE" else 120_000
+
+
+@pytest.mark.parametrize("strikes", [200, 1500])
+def test_chain_larger_than_the_key_cap_keeps_history(strikes, monkeypatch):
+    monkeypatch.setattr(WebScraper, "OI_HISTORY_MAX_KEYS", 64)
+    clock = ReplayClock(NOW)
+    scraper = scraper_at(clock)
+    run_cycle(scraper, payload(strikes, oi=lambda strike, side: 100_000))
+    clock.set(NOW + timedelta(minutes=6))
+    result = run_cycle(scraper, payload(strikes, oi=grown))
+
+    window = result["oi_data"]
+    assert len(window) == 2 * scraper.strikes_to_show + 1
+    assert all(row["call_pct_5m"] == pytest.approx(10.0) for row in window)
+    assert all(row["put_pct_5m"] == pytest.approx(20.0) for row in window)
+    chain = result["chain"][result["expiry_date"]]
+    assert len(chain) == strikes
+    assert all("call_pct_5m" in row for row in chain)
+
+
+def test_process_data_slices_the_atm_window():
+    scraper = scraper_at(lambda: NOW)
+    chain, price, expiry_dates = scraper.parse_payload(payload(41, spot=22510.0))
+    result = scraper.process_data(chain, price, expiry_dates[0])
+
+    assert result["atm_strike"] == 22500
+    assert [row["strike"] for row in result["data"]] == list(range(22350, 22651, 50))
+    assert [row["is_atm"] for row in result["data"]].count(True) == 1
+    assert len(result["chain"]) == 41
+    window_rows = {row["strike"]: row for row in result["chain"] if 22350 <= row["strike"] <= 22650}
+    assert result["data"] == [window_rows[row["strike"]] for row in result["data"]]
+
+
+def test_one_fetch_builds_a_view_per_expiry(monkeypatch):
+    monkeypatch.setattr(WebScraper, "EXPIRIES", ["0", "1"])
+    near, next_month = "27-Jan-2026", "24-Feb-2026"
+    scraper = scraper_at(lambda: NOW)
+
+    def oi(strike, side):
+        return 1000 if side == "CE" else 2000
+
+    data = payload(21, expiries=(near, next_month), oi=oi)
+    for row in data["records"]["data"]:
+        if row["expiryDate"] == next_month:
+            row["PE"]["openInterest"] = 3000
+    result = run_cycle(scraper, data)
+
+    assert result["status"] == "success"
+    assert result["expiry_dates"] == [near, next_month]
+    assert set(result["expiries"]) == set(result["chain"]) == {near, next_month}
+    assert result["expiry_date"] == near  # top level mirrors the nearest expiry
+    assert result["expiries"][near]["pcr"] == pytest.approx(2.0)
+    assert result["expiries"][next_month]["pcr"] == pytest.approx(3.0)
+    for expiry, view in result["expiries"].items():
+        assert view["expiry_date"] == expiry
+        assert len(view["oi_data"]) == 2 * scraper.strikes_to_show + 1
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from backend.snapshot import SnapshotStore
+
+EXPIRY = "27-Jan-2026"
+
+
+def row(strike, call_oi, put_oi):
+    return {"strike": strike, "call_oi": call_oi, "put_oi": put_oi, "call_oi_change": 0, "put_oi_change": 0}
+
+
+def result(atm, rows, **extra):
+    pcr = round(sum(r["put_oi"] for r in rows) / sum(r["call_oi"] for r in rows), 3)
+    view = {"expiry_date": EXPIRY, "atm_strike": atm, "oi_data": rows, "pcr": pcr}
+    return {"status": "success", "symbol": "NIFTY", "current_price": atm + 3.5, **view, "expiries": {EXPIRY: view}, **extra}
+
+
+def apply_delta(full, delta):
+    """What the page's applyDelta() does with a delta body."""
+    merged = {**full, **delta["changed"], "version": delta["version"]}
+    by_strike = {r["strike"]: r for r in full.get("oi_data") or []}
+    for strike in delta["removed"]:
+        by_strike.pop(strike, None)
+    by_strike.update((r["strike"], r) for r in delta["rows"])
+    merged["oi_data"] = sorted(by_strike.values(), key=lambda r: r["strike"])
+    return {k: v for k, v in merged.items() if v is not None}  # a removed field arrives as null
+
+
+def round_trip(old, new, expiry=None):
+    store = SnapshotStore(["NIFTY"])
+    base = store.publish("NIFTY", old)
+    current = store.publish("NIFTY", new)
+    full = json.loads(base.view(expiry).identity)
+    delta = json.loads(store.delta("NIFTY", base.version, expiry).identity)
+    assert delta["delta"] and delta["since"] == base.version
+    return apply_delta(full, delta), json.loads(current.view(expiry).identity)
+
+
+@pytest.mark.parametrize("expiry", [None, EXPIRY])
+def test_changed_rows_round_trip(expiry):
+    old = result(22500, [row(22450, 100, 90), row(22500, 120, 130), row(22550, 80, 150)])
+    new = result(22500, [row(22450, 100, 90), row(22500, 125, 130), row(22550, 80, 160)])
+    patched, expected = round_trip(old, new, expiry)
+    assert patched == expected
+
+
+def test_atm_shift_adds_and_removes_strikes():
+    old = result(22500, [row(22450, 100, 90), row(22500, 120, 130), row(22550, 80, 150)])
+    new = result(22550, [row(22500, 120, 130), row(22550, 85, 150), row(22600, 60, 170)])
+    patched, expected = round_trip(old, new)
+    assert patched == expected
+
+
+def test_dropped_field_round_trips():
+    rows = [row(22500, 120, 130)]
+    stale = {"since": "2026-01-05T10:00:00+05:30", "age_seconds": 30, "consecutive_failures": 1, "error": "HTTP 503"}
+    patched, expected = round_trip(result(22500, rows, stale=stale), result(22500, rows))
+    assert "stale" not in expected
+    assert patched == expected
+
+
+def test_unknown_base_version_gets_no_delta():
+    store = SnapshotStore(["NIFTY"])
+    store.publish("NIFTY", result(22500, [row(22500, 120, 130)]))
+    assert store.delta("NIFTY", 42) is None
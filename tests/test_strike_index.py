@@ -0,0 +1,82 @@
+import json
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from backend.scraper import WebScraper
+from backend.snapshot import SnapshotStore, StrikeIndex
+from tests.payloads import payload
+
+
+def rows(*strikes):
+    return [{"strike": s, "call_oi": 1, "put_oi": 1} for s in strikes]
+
+
+def test_around_atm_is_centred_and_clipped():
+    index = StrikeIndex(rows(*range(22000, 23001, 50)), atm=22500)
+    lo, hi = index.around_atm(2)
+    assert [r["strike"] for r in index.rows[lo:hi]] == [22400, 22450, 22500, 22550, 22600]
+    assert index.around_atm(0) == (10, 11)
+    assert index.around_atm(100) == (0, len(index))
+
+
+def test_around_atm_between_listed_strikes():
+    index = StrikeIndex(rows(22400, 22450, 22550, 22600), atm=22500)
+    lo, hi = index.around_atm(1)
+    assert [r["strike"] for r in index.rows[lo:hi]] == [22450, 22550]
+
+
+@pytest.mark.parametrize("low, high, expected", [
+    (22440, 22560, [22450, 22500, 22550]),
+    (22450, 22550, [22450, 22500, 22550]),   # inclusive bounds
+    (None, 22450, [22400, 22450]),
+    (22550, None, [22550, 22600]),
+    (22460, 22490, []),
+    (23000, 24000, []),
+])
+def test_between(low, high, expected):
+    index = StrikeIndex(rows(22400, 22450, 22500, 22550, 22600), atm=22500)
+    lo, hi = index.between(low, high)
+    assert [r["strike"] for r in index.rows[lo:hi]] == expected
+
+
+def scrape_result(strikes=41):
+    scraper = WebScraper("NIFTY", clock=lambda: WebScraper.IST.localize(datetime(2026, 1, 5, 10, 15)),
+                         alert_sink=lambda alerts: None)
+    return scraper.build_response(*scraper.parse_payload(payload(strikes)))
+
+
+def test_snapshot_slices_are_cached_views_of_the_full_chain():
+    store = SnapshotStore(["NIFTY"])
+    snapshot = store.publish("NIFTY", scrape_result())
+    index = snapshot.strike_index()
+    assert len(index) == 41
+
+    body = snapshot.strike_slice(None, *index.between(22000, 22200))
+    assert snapshot.strike_slice(None, *index.between(22000, 22200)) is body
+    view = json.loads(body.identity)
+    assert [r["strike"] for r in view["oi_data"]] == [22000, 22050, 22100, 22150, 22200]
+    assert view["window"] == {"from": 22000, "to": 22200, "strikes": 5, "available": 41}
+    assert view["version"] == snapshot.version
+
+
+@pytest.fixture(scope="module")
+def client():
+    main._store.publish("NIFTY", scrape_result())
+    return TestClient(main.app)
+
+
+def test_api_from_to_and_window(client):
+    data = client.get("/api/data", params={"from": 21600, "to": 21750}).json()
+    assert [r["strike"] for r in data["oi_data"]] == [21600, 21650, 21700, 21750]
+
+    data = client.get("/api/data", params={"window": 10}).json()
+    assert len(data["oi_data"]) == 21
+    assert data["window"]["available"] == 41
+
+
+@pytest.mark.parametrize("params", [{"window": 3, "from": 22000}, {"window": -1}, {"from": 22600, "to": 22400}])
+def test_api_rejects_bad_slices(client, params):
+    assert client.get("/api/data", params=params).status_code == 400
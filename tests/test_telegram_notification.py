@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from backend import telegram_notification
+from backend.telegram_notification import OIAlert, TelegramDispatcher, format_alerts, split_alerts
+
+ALERTS = [OIAlert(symbol, "27-Jan-2026", strike, "call_pct_5m", 42.0)
+          for symbol in ("NIFTY", "BANKNIFTY") for strike in (22400, 22450)]
+
+
+@pytest.fixture
+def dispatcher(monkeypatch):
+    # Small enough that each symbol's section goes out as its own message
+    monkeypatch.setattr(telegram_notification, "MAX_MESSAGE_CHARS", 120)
+    monkeypatch.setattr(TelegramDispatcher, "_last_sent", {})
+    monkeypatch.setattr(TelegramDispatcher, "_stats", dict(TelegramDispatcher._stats, sent_alerts=0))
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+        return "<b>NIFTY</b>" in message  # the BANKNIFTY message never gets through
+
+    monkeypatch.setattr(TelegramDispatcher, "_send", send)
+    return sent
+
+
+def test_split_alerts_matches_format_alerts(dispatcher):
+    pairs = split_alerts(ALERTS)
+    assert [message for message, _ in pairs] == format_alerts(ALERTS)
+    assert [{a.symbol for a in carried} for _, carried in pairs] == [{"NIFTY"}, {"BANKNIFTY"}]
+    assert sum(len(carried) for _, carried in pairs) == len(ALERTS)
+
+
+def test_partly_delivered_batch_cools_down_the_delivered_alerts(dispatcher):
+    asyncio.run(TelegramDispatcher._dispatch(ALERTS, enqueued_at=0.0))
+    assert {key[0] for key in TelegramDispatcher._last_sent} == {"NIFTY"}
+    assert len(TelegramDispatcher._last_sent) == 2
+    assert TelegramDispatcher._stats["sent_alerts"] == 2
+
+    # Next cycle: only the undelivered BANKNIFTY alerts are retried
+    dispatcher.clear()
+    asyncio.run(TelegramDispatcher._dispatch(ALERTS, enqueued_at=0.0))
+    assert len(dispatcher) == 1 and "BANKNIFTY" in dispatcher[0]